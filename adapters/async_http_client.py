@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+import weakref
+
+import httpx
+
+from adapters.http_client import RETRY_STATUSES, BaseHttpClient
+
+
+class AsyncHttpClient(BaseHttpClient):
+    """
+    Asyncio sibling of HttpClient, with the same timeouts and retry policy.
+    A httpx connection pool can only be used by the event loop which created it,
+    so one pool is kept for each running loop
+    """
+
+    def __init__(self, base_url: str, headers: dict = None, pool_size: int = None):
+        """
+        Initialize HTTP client, its connections are kept alive between the requests
+        :param base_url: URL of the API.
+        :param headers: common headers for all requests
+        :param pool_size: maximum number of connections kept open
+        """
+        super().__init__(base_url, headers)
+        pool_size = pool_size or int(os.environ.get("HTTP_POOL_SIZE", "10"))
+        self.limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size
+        )
+        self._clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Connection pool of the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self.limits)
+            self._clients[loop] = client
+        return client
+
+    async def _request(self, method: str, endpoint: str, idempotent: bool, **kwargs):
+        """
+        Send a request, retried while the time budget allows it.
+        Requests which are not idempotent are only retried when the connection failed
+        :param method: HTTP method
+        :param endpoint: endpoint to call
+        :param idempotent: True if the request can be sent twice
+        :return: the successful response, None if error
+        """
+        url = self._url(endpoint)
+        start = time.monotonic()
+        deadline = start + self.retry_budget
+        attempt = 0
+
+        while True:
+            attempt += 1
+            response = None
+            retryable = False
+            try:
+                response = await self.client.request(
+                    method, url, timeout=self._timeout(deadline), **kwargs
+                )
+                response.raise_for_status()
+                break
+            except (httpx.UnsupportedProtocol, httpx.InvalidURL):
+                pass
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # The request has not been sent
+                retryable = True
+            except httpx.TransportError:
+                retryable = idempotent
+            except httpx.HTTPStatusError:
+                retryable = idempotent and response.status_code in RETRY_STATUSES
+            except httpx.HTTPError:
+                pass
+            response = None
+
+            delay = self._retry_delay(attempt, retryable, deadline)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+        self._record(f"{method} {url}", start, attempt, response is not None)
+        return response
+
+    async def get(
+            self,
+            endpoint: str,
+            params: dict = None,
+            extra_headers: dict = None,
+            raw_text=False
+    ):
+        """
+        GET request with error management and retries
+        :param endpoint: endpoint to call
+        :param params: request params
+        :param extra_headers: additional header
+        :param raw_text: if True, returns text instead of json
+        :return: response, json or text format, None if error
+        """
+        response = await self._request(
+            "GET", endpoint, True, params=params, headers=self._headers(extra_headers)
+        )
+        if response is None:
+            return None
+        try:
+            return response.text if raw_text else response.json()
+        except ValueError:
+            return None
+
+    async def post(self, endpoint: str, data: dict = None, extra_headers: dict = None):
+        """
+        POST request with error management, only retried when the server was not reached
+        :param endpoint: endpoint to call
+        :param data: payload of the request
+        :param extra_headers: additional header
+        :return: response, jsonformat or None if error
+        """
+        response = await self._request(
+            "POST", endpoint, False, json=data, headers=self._headers(extra_headers)
+        )
+        if response is None:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def reset(self):
+        """
+        Forget the connection pools without closing them, in a forked process whose
+        inherited connections belong to the parent
+        """
+        self._clients = weakref.WeakKeyDictionary()
+
+    async def aclose(self):
+        """
+        Close the connection pool of the running event loop
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
@@ -1,18 +1,324 @@
+import asyncio
 import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
 
+from adapters.async_http_client import AsyncHttpClient
 from adapters.http_client import HttpClient
+from adapters.pwned_index import PwnedIndex, PwnedRange
+from utils.cache import TTLCache
+
+
+class RangeStore:
+    """
+    SQLite file holding the downloaded HIBP ranges, shared by the processes of the API
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+
+    def _check_file(self):
+        """
+        Create the file readable and writable by this account only, and refuse a file
+        another account could have written: forged ranges would let breached passwords pass
+        :raise sqlite3.Error: if the file cannot be trusted
+        """
+        try:
+            descriptor = os.open(
+                self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600
+            )
+            try:
+                status = os.fstat(descriptor)
+            finally:
+                os.close(descriptor)
+        except OSError as error:
+            raise sqlite3.Error(f"Cannot open {self.path}") from error
+
+        if status.st_uid != os.getuid() or status.st_mode & 0o077:
+            raise sqlite3.Error(f"{self.path} must be owned by this account, with mode 0600")
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self._check_file()
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS hibp_range ("
+                "prefix TEXT PRIMARY KEY, suffixes TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._initialized = True
+        return connection
+
+    def get(self, prefix: str) -> tuple[frozenset, float] | None:
+        """
+        Read a range from the store
+        :param prefix: the hash prefix of the range
+        :return: the suffixes of the range and the timestamp of the download, None if missing
+        """
+        try:
+            with closing(self._connect()) as connection:
+                row = connection.execute(
+                    "SELECT suffixes, fetched_at FROM hibp_range WHERE prefix = ?",
+                    (prefix,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+
+        if row is None:
+            return None
+        return frozenset(row[0].split()), row[1]
+
+    def set(self, prefix: str, suffixes: frozenset, fetched_at: float):
+        """
+        Write a range in the store, failures are ignored since the store is only a cache
+        :param prefix: the hash prefix of the range
+        :param suffixes: the suffixes of the range
+        :param fetched_at: timestamp of the download
+        """
+        try:
+            with closing(self._connect()) as connection:
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO hibp_range VALUES (?, ?, ?)",
+                        (prefix, "\n".join(sorted(suffixes)), fetched_at)
+                    )
+        except sqlite3.Error:
+            pass
+
+
+class RangeCache:
+    """
+    Cache of the HIBP ranges, a LRU in memory in front of an optional disk store.
+    Ranges older than ttl are stale: they are still served while being refreshed
+    in the background, until they are older than max_stale
+    """
+
+    def __init__(self, store: RangeStore | None, max_size: int, ttl: float, max_stale: float):
+        self.memory = TTLCache(max_size=max_size)
+        self.store = store
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, prefix: str) -> tuple[frozenset, float] | None:
+        entry = self.memory.get(prefix)
+        if entry is None and self.store is not None:
+            entry = self.store.get(prefix)
+            if entry is not None:
+                self.memory.set(prefix, entry)
+        return entry
+
+    def set(self, prefix: str, suffixes: frozenset):
+        entry = (suffixes, time.time())
+        self.memory.set(prefix, entry)
+        if self.store is not None:
+            self.store.set(prefix, *entry)
+
+    def lookup(self, prefix: str) -> tuple[tuple[frozenset, float] | None, bool, bool]:
+        """
+        Get a range with its freshness
+        :param prefix: the hash prefix of the range
+        :return: the cached entry, True if it can be served, True if it must be refreshed
+        """
+        entry = self.get(prefix)
+        if entry is None:
+            return None, False, True
+
+        age = time.time() - entry[1]
+        return entry, age < self.max_stale, age >= self.ttl
+
+    def start_refresh(self, prefix: str) -> bool:
+        """
+        Mark a range as being refreshed
+        :param prefix: the hash prefix of the range
+        :return: False if a refresh of the range is already running
+        """
+        with self._lock:
+            if prefix in self._refreshing:
+                return False
+            self._refreshing.add(prefix)
+            return True
+
+    def finish_refresh(self, prefix: str):
+        with self._lock:
+            self._refreshing.discard(prefix)
+
+    def refresh_in_background(self, prefix: str, fetch) -> threading.Thread | None:
+        """
+        Refresh a range in a background thread, unless it is already being refreshed
+        :param prefix: the hash prefix of the range
+        :param fetch: function downloading and caching the range
+        :return: the refreshing thread, None if a refresh is already running
+        """
+        if not self.start_refresh(prefix):
+            return None
+
+        def refresh():
+            try:
+                fetch(prefix)
+            finally:
+                self.finish_refresh(prefix)
+
+        thread = threading.Thread(target=refresh, daemon=True)
+        thread.start()
+        return thread
+
+
+# The ranges are kept in memory only unless HIBP_CACHE_PATH is set, to a file in a
+# directory owned by the API
+HIBP_CACHE_PATH = os.environ.get("HIBP_CACHE_PATH")
+
+RANGE_CACHE = RangeCache(
+    store=RangeStore(HIBP_CACHE_PATH) if HIBP_CACHE_PATH else None,
+    max_size=int(os.environ.get("HIBP_CACHE_SIZE", "4096")),
+    ttl=float(os.environ.get("HIBP_CACHE_TTL", "86400")),
+    max_stale=float(os.environ.get("HIBP_CACHE_MAX_STALE", "2592000")),
+)
+
+# Path of a file built by adapters.pwned_index, HIBP is not called when it is set
+HIBP_OFFLINE_INDEX = os.environ.get("HIBP_OFFLINE_INDEX")
+PWNED_INDEX = PwnedIndex(HIBP_OFFLINE_INDEX) if HIBP_OFFLINE_INDEX else None
+
+
+def parse_range(response: str) -> frozenset:
+    """
+    Parse a range returned by HIBP
+    :param response: one "SUFFIX:count" per line
+    :return: Set of the compromised hashed suffixes
+    """
+    return frozenset(line.split(":", 1)[0] for line in response.splitlines())
 
 
 class HibpClient(HttpClient):
 
-    def __init__(self):
+    def __init__(self, cache: RangeCache | None = None, index: PwnedIndex | None = None):
         base_url = os.environ.get("HIBP_API_URL", "https://api.pwnedpasswords.com/range/")
         super().__init__(base_url)
+        self.cache = cache or RANGE_CACHE
+        self.index = index or PWNED_INDEX
+
+    @property
+    def offline(self) -> bool:
+        return self.index is not None
+
+    def fetch_range(self, hashed_prefix: str) -> frozenset | None:
+        """
+        Download the range of a hashed password prefix and cache it
+        :param hashed_prefix: First segment of the password's SHA1 hash
+        :return: Set of the compromised hashed suffixes, None if HIBP is unavailable
+        """
+        response = self.get(hashed_prefix, raw_text=True)
+        if response is None:
+            return None
+
+        suffixes = parse_range(response)
+        self.cache.set(hashed_prefix, suffixes)
+        return suffixes
 
-    def check_breach(self, hashed_prefix: str):
+    def check_breach(self, hashed_prefix: str) -> frozenset | PwnedRange | None:
         """
         Checks whether a hashed password prefix has been compromised
         :param hashed_prefix: First segment of the password's SHA1 hash
-        :return: List of hashed suffixes and number of occurrences
+        :return: Set of the compromised hashed suffixes, None if HIBP is unavailable
         """
-        return self.get(hashed_prefix, raw_text=True).splitlines()
+        if self.offline:
+            return self.index.range(hashed_prefix)
+
+        hashed_prefix = hashed_prefix.upper()
+        entry, usable, outdated = self.cache.lookup(hashed_prefix)
+
+        if usable:
+            if outdated:
+                self.cache.refresh_in_background(hashed_prefix, self.fetch_range)
+            return entry[0]
+
+        suffixes = self.fetch_range(hashed_prefix)
+        if suffixes is None and entry is not None:
+            # HIBP unavailable, an outdated range is better than nothing
+            return entry[0]
+        return suffixes
+
+
+class AsyncHibpClient(AsyncHttpClient):
+    """
+    Asyncio sibling of HibpClient, sharing its cache and offline index
+    """
+
+    def __init__(self, cache: RangeCache | None = None, index: PwnedIndex | None = None):
+        base_url = os.environ.get("HIBP_API_URL", "https://api.pwnedpasswords.com/range/")
+        super().__init__(base_url)
+        self.cache = cache or RANGE_CACHE
+        self.index = index or PWNED_INDEX
+        self._refreshes = set()
+
+    @property
+    def offline(self) -> bool:
+        return self.index is not None
+
+    async def fetch_range(self, hashed_prefix: str) -> frozenset | None:
+        """
+        Download the range of a hashed password prefix and cache it
+        :param hashed_prefix: First segment of the password's SHA1 hash
+        :return: Set of the compromised hashed suffixes, None if HIBP is unavailable
+        """
+        response = await self.get(hashed_prefix, raw_text=True)
+        if response is None:
+            return None
+
+        suffixes = parse_range(response)
+        self.cache.set(hashed_prefix, suffixes)
+        return suffixes
+
+    async def _refresh(self, hashed_prefix: str):
+        try:
+            await self.fetch_range(hashed_prefix)
+        finally:
+            self.cache.finish_refresh(hashed_prefix)
+
+    def refresh_in_background(self, hashed_prefix: str) -> asyncio.Task | None:
+        """
+        Refresh a range in a background task, unless it is already being refreshed
+        :param hashed_prefix: First segment of the password's SHA1 hash
+        :return: the refreshing task, None if a refresh is already running
+        """
+        if not self.cache.start_refresh(hashed_prefix):
+            return None
+
+        task = asyncio.get_running_loop().create_task(self._refresh(hashed_prefix))
+        # The loop only keeps a weak reference to its tasks
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+        return task
+
+    async def check_breach(self, hashed_prefix: str) -> frozenset | PwnedRange | None:
+        """
+        Checks whether a hashed password prefix has been compromised
+        :param hashed_prefix: First segment of the password's SHA1 hash
+        :return: Set of the compromised hashed suffixes, None if HIBP is unavailable
+        """
+        if self.offline:
+            return self.index.range(hashed_prefix)
+
+        hashed_prefix = hashed_prefix.upper()
+        entry, usable, outdated = self.cache.lookup(hashed_prefix)
+
+        if usable:
+            if outdated:
+                self.refresh_in_background(hashed_prefix)
+            return entry[0]
+
+        suffixes = await self.fetch_range(hashed_prefix)
+        if suffixes is None and entry is not None:
+            # HIBP unavailable, an outdated range is better than nothing
+            return entry[0]
+        return suffixes
+
+
+# Shared by the controllers so the connections to HIBP are reused between requests
+hibp_client = HibpClient()
+async_hibp_client = AsyncHibpClient()
@@ -1,9 +1,71 @@
+import logging
+import os
+import random
+import threading
+import time
+
 import requests
-from requests.exceptions import RequestException
-from retry import retry
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import ConnectTimeout, RequestException, Timeout
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth another attempt, the other errors will not change by retrying
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def is_not_sent(error: RequestException) -> bool:
+    """
+    Tell whether a request failed before being sent, so sending it again can not repeat it
+    :param error: the error raised by requests
+    :return: True if the connection to the server could not be opened
+    """
+    if isinstance(error, ConnectTimeout):
+        return True
+    # A connection reset or closed by the server may come after the request was received
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
 
+class RequestStats:
+    """
+    Timing metrics of the calls made by a client
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, duration: float, attempts: int, success: bool):
+        with self._lock:
+            self.calls += 1
+            self.retries += attempts - 1
+            self.failures += 0 if success else 1
+            self.total_time += duration
+            self.max_time = max(self.max_time, duration)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "retries": self.retries,
+                "mean_time": self.total_time / self.calls if self.calls else 0.0,
+                "max_time": self.max_time,
+            }
+
+
+class BaseHttpClient:
+    """
+    Settings and retry policy shared by the blocking and the asyncio clients
+    """
 
-class HttpClient:
     def __init__(self, base_url: str, headers: dict = None):
         """
         Initialize HTTP client
@@ -13,7 +75,123 @@ class HttpClient:
         self.base_url = base_url.rstrip("/")
         self.headers = headers or {}
 
-    @retry(RequestException, tries=5, delay=2)
+        self.timeout = float(os.environ.get("HTTP_TIMEOUT", "5"))
+        self.max_attempts = int(os.environ.get("HTTP_MAX_ATTEMPTS", "3"))
+        self.backoff = float(os.environ.get("HTTP_BACKOFF", "0.2"))
+        self.max_backoff = float(os.environ.get("HTTP_MAX_BACKOFF", "2"))
+        self.retry_budget = float(os.environ.get("HTTP_RETRY_BUDGET", "10"))
+        self.stats = RequestStats()
+
+    def _url(self, endpoint: str) -> str:
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def _headers(self, extra_headers: dict = None) -> dict:
+        return {**self.headers, **(extra_headers or {})}
+
+    def _timeout(self, deadline: float) -> float:
+        """
+        Timeout of an attempt, never going past the time budget of the call
+        :param deadline: end of the time budget of the call
+        :return: seconds given to the attempt
+        """
+        return max(0.001, min(self.timeout, deadline - time.monotonic()))
+
+    def _delay(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter, spreading the retries of the workers
+        :param attempt: number of the failed attempt, starting at 1
+        :return: seconds to wait before the next attempt
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def _retry_delay(self, attempt: int, retryable: bool, deadline: float) -> float | None:
+        """
+        Decide whether a failed attempt is retried
+        :param attempt: number of the failed attempt, starting at 1
+        :param retryable: True if the error may not happen again
+        :param deadline: end of the time budget of the call
+        :return: seconds to wait before the next attempt, None to give up
+        """
+        delay = self._delay(attempt)
+        if (
+            not retryable
+            or attempt >= self.max_attempts
+            or time.monotonic() + delay >= deadline
+        ):
+            return None
+        return delay
+
+    def _record(self, request: str, start: float, attempts: int, success: bool):
+        duration = time.monotonic() - start
+        self.stats.record(duration, attempts, success)
+        logger.debug(
+            "%s %s in %.1f ms after %d attempt(s)",
+            request, "succeeded" if success else "failed", duration * 1000, attempts
+        )
+
+
+class HttpClient(BaseHttpClient):
+    def __init__(self, base_url: str, headers: dict = None, pool_size: int = None):
+        """
+        Initialize HTTP client, its connections are kept alive between the requests
+        :param base_url: URL of the API.
+        :param headers: common headers for all requests
+        :param pool_size: maximum number of connections kept open
+        """
+        super().__init__(base_url, headers)
+
+        self.pool_size = pool_size or int(os.environ.get("HTTP_POOL_SIZE", "10"))
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, method: str, endpoint: str, idempotent: bool, **kwargs):
+        """
+        Send a request, retried while the time budget allows it.
+        Requests which are not idempotent are only retried when the connection failed
+        :param method: HTTP method
+        :param endpoint: endpoint to call
+        :param idempotent: True if the request can be sent twice
+        :return: the successful response, None if error
+        """
+        url = self._url(endpoint)
+        start = time.monotonic()
+        deadline = start + self.retry_budget
+        attempt = 0
+
+        while True:
+            attempt += 1
+            response = None
+            retryable = False
+            try:
+                response = self.session.request(
+                    method, url, timeout=self._timeout(deadline), **kwargs
+                )
+                response.raise_for_status()
+                break
+            except (RequestsConnectionError, Timeout) as error:
+                retryable = idempotent or is_not_sent(error)
+            except RequestException:
+                retryable = (
+                    idempotent
+                    and response is not None
+                    and response.status_code in RETRY_STATUSES
+                )
+            response = None
+
+            delay = self._retry_delay(attempt, retryable, deadline)
+            if delay is None:
+                break
+            time.sleep(delay)
+
+        self._record(f"{method} {url}", start, attempt, response is not None)
+        return response
+
     def get(self, endpoint: str, params: dict = None, extra_headers: dict = None, raw_text=False):
         """
         GET request with error management and retries
@@ -23,31 +201,40 @@ class HttpClient:
         :param raw_text: if True, returns text instead of json
         :return: response, json or text format, None if error
         """
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        headers = {**self.headers, **(extra_headers or {})}
-
+        response = self._request(
+            "GET", endpoint, True, params=params, headers=self._headers(extra_headers)
+        )
+        if response is None:
+            return None
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=5)
-            response.raise_for_status()
             return response.text if raw_text else response.json()
-        except RequestException:
+        except ValueError:
             return None
 
-    @retry(RequestException, tries=5, delay=2)
     def post(self, endpoint: str, data: dict = None, extra_headers: dict = None):
         """
-        POST request with error management and retries
+        POST request with error management, only retried when the server was not reached
         :param endpoint: endpoint to call
         :param data: payload of the request
         :param extra_headers: additional header
         :return: response, jsonformat or None if error
         """
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        headers = {**self.headers, **(extra_headers or {})}
-
+        response = self._request(
+            "POST", endpoint, False, json=data, headers=self._headers(extra_headers)
+        )
+        if response is None:
+            return None
         try:
-            response = requests.post(url, json=data, headers=headers, timeout=5)
-            response.raise_for_status()
             return response.json()
-        except RequestException:
+        except ValueError:
             return None
+
+    def close(self):
+        self.session.close()
+
+    def reset(self):
+        """
+        Replace the connection pool without closing it, in a forked process whose
+        inherited connections belong to the parent
+        """
+        self.session = self._build_session()
@@ -0,0 +1,169 @@
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from contextlib import ExitStack
+
+MAGIC = b"TPWNED01"
+HEADER = struct.Struct("<8sQ")
+DIGEST_SIZE = 20
+INDEX_BITS = 16
+INDEX_SIZE = (1 << INDEX_BITS) + 1
+INDEX = struct.Struct(f"<{INDEX_SIZE}Q")
+RECORDS_OFFSET = HEADER.size + INDEX.size
+
+
+class PwnedRange:
+    """
+    Breached hashes sharing a 5 characters prefix, looked up in the index
+    without being loaded in memory
+    """
+
+    def __init__(self, index: "PwnedIndex", prefix: str):
+        self.index = index
+        self.prefix = prefix
+
+    def __contains__(self, suffix: str) -> bool:
+        try:
+            digest = bytes.fromhex(self.prefix + suffix)
+        except (TypeError, ValueError):
+            return False
+        return digest in self.index
+
+
+class PwnedIndex:
+    """
+    Offline Pwned Passwords database: a file of sorted SHA1 digests read through mmap,
+    so the processes of the API share the same pages of the system cache.
+    The file starts with a header, then the position of the first digest for each
+    16 bits prefix, then the 20 bytes digests
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count = HEADER.unpack(self._mmap[:HEADER.size].ljust(HEADER.size, b"\0"))
+        if magic != MAGIC or len(self._mmap) != RECORDS_OFFSET + self.count * DIGEST_SIZE:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a valid pwned passwords index")
+        self._index = INDEX.unpack_from(self._mmap, HEADER.size)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, digest: bytes) -> bool:
+        if len(digest) != DIGEST_SIZE:
+            return False
+
+        bucket = int.from_bytes(digest[:2], "big")
+        low, high = self._index[bucket], self._index[bucket + 1]
+        while low < high:
+            middle = (low + high) // 2
+            start = RECORDS_OFFSET + middle * DIGEST_SIZE
+            current = self._mmap[start:start + DIGEST_SIZE]
+            if current == digest:
+                return True
+            if current < digest:
+                low = middle + 1
+            else:
+                high = middle
+        return False
+
+    def range(self, prefix: str) -> PwnedRange:
+        """
+        Get the breached hashes of a prefix, like the range API of HIBP
+        :param prefix: First segment of the password's SHA1 hash
+        :return: Container of the compromised hashed suffixes
+        """
+        return PwnedRange(self, prefix.upper())
+
+    def close(self):
+        self._mmap.close()
+
+
+def _split_dump(source: str, buckets: list):
+    """
+    Write the digests of a dump in the bucket of their first byte
+    :param source: path of the text dump
+    :param buckets: the 256 temporary files
+    """
+    with open(source, "rb") as dump:
+        for line in dump:
+            hexdigest = line.split(b":", 1)[0].strip()
+            if len(hexdigest) != 2 * DIGEST_SIZE:
+                continue
+            buckets[int(hexdigest[:2], 16)].write(bytes.fromhex(hexdigest.decode("ascii")))
+
+
+def _write_index(buckets: list, destination: str) -> int:
+    """
+    Sort each bucket and write the index file
+    :param buckets: the 256 temporary files, in the order of their byte
+    :param destination: path of the index file
+    :return: the number of digests written
+    """
+    counts = array("Q", bytes(8 * (1 << INDEX_BITS)))
+    total = 0
+    with open(destination, "wb") as output:
+        output.seek(RECORDS_OFFSET)
+        for bucket in buckets:
+            bucket.seek(0)
+            data = bucket.read()
+            digests = sorted({
+                data[start:start + DIGEST_SIZE]
+                for start in range(0, len(data), DIGEST_SIZE)
+            })
+            for digest in digests:
+                counts[int.from_bytes(digest[:2], "big")] += 1
+            output.write(b"".join(digests))
+            total += len(digests)
+
+        offsets = [0]
+        for count in counts:
+            offsets.append(offsets[-1] + count)
+        output.seek(0)
+        output.write(HEADER.pack(MAGIC, total))
+        output.write(INDEX.pack(*offsets))
+    return total
+
+
+def build_index(source: str, destination: str) -> int:
+    """
+    Convert a Pwned Passwords dump (one "SHA1:count" per line) into an index file.
+    The digests are first split by their first byte in temporary files,
+    so only 1/256 of the dump is sorted in memory at once
+    :param source: path of the text dump
+    :param destination: path of the index file
+    :return: the number of digests in the index
+    """
+    temporary = destination + ".tmp"
+    with tempfile.TemporaryDirectory() as directory, ExitStack() as stack:
+        buckets = [
+            stack.enter_context(open(os.path.join(directory, f"{byte:02x}"), "w+b"))
+            for byte in range(256)
+        ]
+        _split_dump(source, buckets)
+        total = _write_index(buckets, temporary)
+
+    # The index is replaced at once, so running workers never read a partial file
+    os.replace(temporary, destination)
+    return total
+
+
+def main():  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description="Build the offline Pwned Passwords index from the SHA1 dump"
+    )
+    parser.add_argument("source", help="text dump, one SHA1:count per line")
+    parser.add_argument("destination", help="index file to write")
+    arguments = parser.parse_args()
+
+    total = build_index(arguments.source, arguments.destination)
+    print(f"{total} hashes written to {arguments.destination}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,215 @@
+import os
+import smtplib
+import threading
+import time
+
+from flask_mail import Connection, Message
+
+
+class PooledConnection(Connection):
+    """Flask-Mail connection kept open by the pool between two sends"""
+
+    def __init__(self, mail):
+        super().__init__(mail)
+        self.last_used = time.monotonic()
+        self.fresh = True
+
+    def open(self):
+        self.host = None if self.mail.suppress else self.configure_host()
+        self.fresh = True
+
+    def close(self):
+        if self.host is None:
+            return
+        try:
+            self.host.quit()
+        except (smtplib.SMTPException, OSError):
+            self.host.close()
+        self.host = None
+
+    def is_alive(self) -> bool:
+        if self.host is None:
+            return bool(self.mail.suppress)
+        try:
+            return self.host.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+
+class SmtpPool:
+    """
+    Pool of authenticated SMTP connections kept open across sends, so the TLS
+    handshake and the login are only paid when a new connection is opened.
+    Connections idle for too long are closed, the ones idle for a while are
+    checked with a NOOP before being reused
+    """
+
+    def __init__(
+            self,
+            mail_state,
+            max_size: int | None = None,
+            idle_timeout: float | None = None,
+            check_after: float | None = None
+    ):
+        """
+        Initialize the pool
+        :param mail_state: the Flask-Mail state holding the SMTP configuration
+        :param max_size: maximum number of open connections
+        :param idle_timeout: seconds after which an idle connection is closed
+        :param check_after: seconds after which an idle connection is checked before reuse
+        """
+        self.mail_state = mail_state
+        self.max_size = max_size or int(os.environ.get("SMTP_POOL_SIZE", "4"))
+        self.idle_timeout = (
+            idle_timeout if idle_timeout is not None
+            else float(os.environ.get("SMTP_POOL_IDLE_TIMEOUT", "60"))
+        )
+        self.check_after = (
+            check_after if check_after is not None
+            else float(os.environ.get("SMTP_POOL_CHECK_AFTER", "5"))
+        )
+        self.acquire_timeout = float(os.environ.get("SMTP_POOL_ACQUIRE_TIMEOUT", "30"))
+
+        self._idle = []
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+        self.opened = 0
+        self.reused = 0
+        self.health_checks = 0
+        self.discarded = 0
+
+    def _open(self) -> PooledConnection:
+        connection = PooledConnection(self.mail_state)
+        try:
+            connection.open()
+        except BaseException:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self.opened += 1
+        return connection
+
+    def _take_idle(self) -> PooledConnection | None:
+        """
+        Take the most recently used idle connection which is still usable,
+        the slot of the stale connections is kept for the caller
+        """
+        while True:
+            with self._condition:
+                if not self._idle:
+                    return None
+                connection = self._idle.pop()
+
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for >= self.idle_timeout:
+                self._discard(connection)
+                continue
+
+            if idle_for >= self.check_after:
+                with self._condition:
+                    self.health_checks += 1
+                if not connection.is_alive():
+                    self._discard(connection)
+                    continue
+
+            with self._condition:
+                self.reused += 1
+            return connection
+
+    def _discard(self, connection: PooledConnection):
+        connection.close()
+        with self._condition:
+            self.discarded += 1
+
+    def acquire(self) -> PooledConnection:
+        """
+        Get an open connection, waits for a connection to be released if the pool is full
+        :return: the connection
+        :raise TimeoutError: if no connection has been released in time
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while not self._idle and self._in_use >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise TimeoutError("No SMTP connection available in the pool")
+            self._in_use += 1
+
+        connection = self._take_idle()
+        if connection is None:
+            connection = self._open()
+        return connection
+
+    def release(self, connection: PooledConnection, broken: bool = False):
+        """
+        Give a connection back to the pool
+        :param connection: the connection
+        :param broken: True to close the connection instead of reusing it
+        """
+        if broken:
+            self._discard(connection)
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            return
+
+        connection.last_used = time.monotonic()
+        connection.fresh = False
+        with self._condition:
+            self._idle.append(connection)
+            self._in_use -= 1
+            self._condition.notify()
+
+    def send(self, message: Message):
+        """
+        Send a message with a pooled connection, the message is sent again
+        on another connection if a reused one has been closed by the server
+        :param message: the message
+        """
+        while True:
+            connection = self.acquire()
+            try:
+                connection.send(message)
+            except smtplib.SMTPServerDisconnected:
+                self.release(connection, broken=True)
+                if connection.fresh:
+                    raise
+                continue
+            except smtplib.SMTPException:
+                # Refused by the server, the connection itself is still usable
+                self.release(connection)
+                raise
+            except OSError:
+                self.release(connection, broken=True)
+                raise
+            except BaseException:
+                self.release(connection)
+                raise
+
+            self.release(connection)
+            return
+
+    def close(self):
+        """
+        Close the idle connections
+        """
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "opened": self.opened,
+                "reused": self.reused,
+                "handshakes_saved": self.reused,
+                "health_checks": self.health_checks,
+                "discarded": self.discarded,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+            }
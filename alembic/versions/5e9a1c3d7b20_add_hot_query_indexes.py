@@ -0,0 +1,73 @@
+"""add hot query indexes
+
+Revision ID: 5e9a1c3d7b20
+Revises: 8d41c7e2b5a3
+Create Date: 2026-10-17 15:02:31.540219
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9a1c3d7b20'
+down_revision: Union[str, None] = '8d41c7e2b5a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY does not lock the tables for writes,
+    # but it cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_connection_user_id_date',
+            'connection',
+            ['user_id', sa.text('date DESC')],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_token_value',
+            'token',
+            ['value'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_token_user_id_active',
+            'token',
+            ['user_id'],
+            postgresql_where=sa.text('is_active'),
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_user_question_user_id',
+            'user_question',
+            ['user_id'],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_user_role_user_id',
+            'user_role',
+            ['user_id'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_role_user_id', table_name='user_role', postgresql_concurrently=True)
+        op.drop_index(
+            'ix_user_question_user_id',
+            table_name='user_question',
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_token_user_id_active', table_name='token', postgresql_concurrently=True)
+        op.drop_index('ix_token_value', table_name='token', postgresql_concurrently=True)
+        op.drop_index(
+            'ix_connection_user_id_date',
+            table_name='connection',
+            postgresql_concurrently=True
+        )
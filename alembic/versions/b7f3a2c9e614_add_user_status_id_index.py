@@ -0,0 +1,31 @@
+"""add user status id index
+
+Revision ID: b7f3a2c9e614
+Revises: 5e9a1c3d7b20
+Create Date: 2026-10-17 16:41:08.127394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f3a2c9e614'
+down_revision: Union[str, None] = '5e9a1c3d7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_user_status_id',
+            'user',
+            ['status', 'id'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_status_id', table_name='user', postgresql_concurrently=True)
@@ -1,85 +1,175 @@
 import os
+import pathlib
 
 import connexion
-import yaml
+import flask
 from connexion import FlaskApp
+from connexion.frameworks.flask import flaskify_endpoint
+from connexion.jsonifier import Jsonifier
+from connexion.middleware import MiddlewarePosition
 from flask_mail import Mail
+from sqlalchemy.exc import SQLAlchemyError
 
+from adapters.hibp_client import async_hibp_client, hibp_client
 from extensions import db
+from utils.compression import CompressionMiddleware
+from utils.http_cache import conditional_get
+from utils.json_provider import json_provider_class
+from utils.spec_artifact import load_specification
 
-# Initialize Connexion app with Flask
-options = connexion.options.SwaggerUIOptions(
-    swagger_ui_path="/documentation"
-)
+HTTP_METHODS = {"get", "put", "post", "delete", "options", "head", "patch", "trace"}
 
-if not os.environ.get("DATABASE"):
-    raise KeyError("Environment variable DATABASE missing")
-if not os.environ.get("MAIL_USERNAME"):
-    raise KeyError("Environment variable MAIL_USERNAME missing")
-if not os.environ.get("MAIL_PASSWORD"):
-    raise KeyError("Environment variable MAIL_PASSWORD missing")
+ROOT = pathlib.Path(__file__).parent
 
-app = FlaskApp(__name__, specification_dir="./", swagger_ui_options=options)
+REQUIRED_ENVIRONMENT = ("DATABASE", "MAIL_USERNAME", "MAIL_PASSWORD", "SESSION_SECRET_KEY")
 
-# Configuration of the database
-app.app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE")
 
-# Initialize extensions
-db.init_app(app.app)
+def load_secure_endpoints(api):
+    """
+    Compile the secured operations of an API already parsed by connexion
+    :param api: the connexion API holding the resolved specification
+    :return: the required security schemes indexed by Flask endpoint and HTTP method
+    """
+    specification = api.specification
+    blueprint = flaskify_endpoint(specification.base_path) or "/"
+    secure_endpoints = {}
 
-# Add the Swagger to the API
-app.add_api("swagger.yaml", options={"swagger_ui": True})
+    for path in specification["paths"].values():
+        for method, operation in path.items():
+            if method not in HTTP_METHODS:
+                continue
 
+            security = operation.get("security", specification.security)
+            if not security:
+                continue
 
-def load_secure_paths(swagger_file):
-    with open(swagger_file, "r", encoding="utf-8") as file:
-        swagger_data = yaml.safe_load(file)
+            endpoint = f"{blueprint}.{flaskify_endpoint(operation['operationId'])}"
+            secure_endpoints[(endpoint, method.upper())] = tuple(
+                scheme for requirement in security for scheme in requirement
+            )
+    return secure_endpoints
 
-    paths = swagger_data.get("paths")
-    secure_paths = set()
-
-    for route_name, value in paths.items():
-        for method, content in value.items():
-            if content.get("security"):
-                secure_paths.add(f"{method.upper()} {route_name}")
-    return secure_paths
-
-
-SECURE_PATHS = load_secure_paths("swagger.yaml")
-
-# Email configuration
-if not os.environ.get("MAIL_USERNAME"):
-    raise KeyError("No env variable MAIL_USERNAME")
-if not os.environ.get("MAIL_PASSWORD"):
-    raise KeyError("No env variable MAIL_PASSWORD")
-app.app.config["MAIL_PORT"] = 465
-app.app.config["MAIL_SERVER"] = "smtp.gmail.com"
-app.app.config["MAIL_USERNAME"] = os.environ.get("MAIL_USERNAME")
-app.app.config["MAIL_PASSWORD"] = os.environ.get("MAIL_PASSWORD")
-app.app.config["MAIL_USE_TLS"] = False
-app.app.config["MAIL_USE_SSL"] = True
-mail = Mail(app.app)
-
-# Blueprint for visible routes
-from routes import routes
-
-app.app.register_blueprint(routes)
-
-# Initialize sessions
-if not os.environ.get("SESSION_SECRET_KEY"):
-    raise KeyError("No env variable SESSION_SECRET_KEY")
-app.app.secret_key = os.environ.get("SESSION_SECRET_KEY")
 
 # Add routes
 # TODO : change to an explanation of the project
-
-
-@app.route("/")
 def hello_world():
     return "Hello World!"
 
 
-app.app.app_context().push()
+def create_app() -> FlaskApp:
+    """
+    Build the API and its Flask application, configured from the environment.
+    No connection is opened, so the application can be built before the workers are forked
+    :return: the connexion application
+    """
+    for variable in REQUIRED_ENVIRONMENT:
+        if not os.environ.get(variable):
+            raise KeyError(f"Environment variable {variable} missing")
+
+    # The API responses are serialized by the JSON provider of Flask, without indentation
+    connexion_app = FlaskApp(
+        __name__,
+        specification_dir="./",
+        swagger_ui_options=connexion.options.SwaggerUIOptions(
+            swagger_ui_path="/documentation"
+        ),
+        jsonifier=Jsonifier(flask.json)
+    )
+    flask_app = connexion_app.app
+    flask_app.json = json_provider_class()(flask_app)
+
+    # Configuration of the database
+    flask_app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE")
+    db.init_app(flask_app)
+
+    # Add the Swagger to the API, from the artifact built by make build_spec when it is up to date
+    connexion_app.add_api(
+        load_specification(
+            ROOT / "swagger.yaml", ROOT / os.environ.get("SPEC_ARTIFACT_DIR", "build")
+        ),
+        options={"swagger_ui": True}
+    )
+
+    # Compress every response, including the Swagger UI and the error responses
+    connexion_app.add_middleware(
+        CompressionMiddleware, position=MiddlewarePosition.BEFORE_EXCEPTION
+    )
+
+    # Email configuration
+    flask_app.config["MAIL_PORT"] = 465
+    flask_app.config["MAIL_SERVER"] = "smtp.gmail.com"
+    flask_app.config["MAIL_USERNAME"] = os.environ.get("MAIL_USERNAME")
+    flask_app.config["MAIL_PASSWORD"] = os.environ.get("MAIL_PASSWORD")
+    flask_app.config["MAIL_USE_TLS"] = False
+    flask_app.config["MAIL_USE_SSL"] = True
+    Mail(flask_app)
+
+    # Blueprint for visible routes, its controllers import the models bound to db
+    from routes import routes  # pylint: disable=import-outside-toplevel
+
+    flask_app.register_blueprint(routes)
+
+    # Answer the polling clients with 304 when their JSON responses did not change
+    conditional_get.init_app(flask_app)
+
+    # Initialize sessions
+    flask_app.secret_key = os.environ.get("SESSION_SECRET_KEY")
+
+    connexion_app.add_url_rule("/", "hello_world", hello_world)
+    return connexion_app
+
+
+def warm_up(connexion_app: FlaskApp):
+    """
+    Load the state shared by all the requests, in the gunicorn master before the workers
+    are forked, so they share it copy-on-write instead of each building it
+    :param connexion_app: the application built by create_app
+    """
+    # The operations, their validators and the security handlers are otherwise
+    # built by each worker on its first request, like ConnexionMiddleware.__call__ does
+    middleware = connexion_app.middleware
+    if middleware.middleware_stack is None:
+        middleware.app, middleware.middleware_stack = (
+            middleware._build_middleware_stack()  # pylint: disable=protected-access
+        )
+
+    flask_app = connexion_app.app
+    for name in flask_app.jinja_env.list_templates():
+        flask_app.jinja_env.get_template(name)
+
+    # The services import the models bound to db
+    # pylint: disable-next=import-outside-toplevel
+    from core.tempo_core import tempo_core
+
+    with flask_app.app_context():
+        try:
+            tempo_core.question.get_catalog()
+        except SQLAlchemyError:
+            # Each worker loads the catalog on its first request instead
+            pass
+        finally:
+            db.session.remove()
+
+
+def reset_after_fork(connexion_app: FlaskApp):
+    """
+    Drop the connections inherited from the gunicorn master, so a worker never
+    shares a socket with another process. New ones are opened on demand
+    :param connexion_app: the application built by create_app
+    """
+    with connexion_app.app.app_context():
+        for engine in db.engines.values():
+            # The connections of the master are left open for it, not closed
+            engine.dispose(close=False)
+
+    hibp_client.reset()
+    async_hibp_client.reset()
+
+
+app = create_app()
+
+SECURE_ENDPOINTS = load_secure_endpoints(app.middleware.apis[-1])
+conditional_get.secure_endpoints = SECURE_ENDPOINTS
 
 
 # Launch the application on port 5000
@@ -3,17 +3,19 @@ import hashlib
 import json
 import os
 import random
-import smtplib
 from datetime import datetime, timedelta
 
 import jwt
 from flask import g, request
 
-from app import SECURE_PATHS, app
-from core.models import Connection, StatusEnum
+from app import SECURE_ENDPOINTS, app
+from core.models import EmailKindEnum, StatusEnum
 from core.models.connection import ConnectionStatusEnum
 from core.tempo_core import tempo_core
-from utils.utils import handle_email_suspicious_connection
+from utils.cache import TTLCache
+
+# Verified claims of the access tokens, each entry expires with its token
+JWT_CACHE = TTLCache(max_size=int(os.environ.get("JWT_CACHE_SIZE", "1024")))
 
 
 def basic_auth(username, password):
@@ -22,7 +24,7 @@ def basic_auth(username, password):
         return None
 
     with app.app.app_context():
-        user = tempo_core.user.get_instance_by_key(username=username)
+        user = tempo_core.user.get_credentials(username)
         if not user:
             return None
 
@@ -45,69 +47,74 @@ def basic_auth(username, password):
     return None
 
 
-def jwt_auth(token):
+def decode_access_token(token):
+    """
+    Verify an access token and return its claims, verified claims are cached
+    until the token expires so the signature is only checked once per token
+    :param token: the JWT sent by the user
+    :return: the claims of the token
+    :raise jwt.InvalidTokenError: if the token is invalid or expired
+    """
     key = os.environ["SECRET_KEY"]
+    digest = hashlib.sha256(f"{key}:{token}".encode("utf-8")).hexdigest()
+
+    claims = JWT_CACHE.get(digest)
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, key, algorithms=["HS256"])
+    JWT_CACHE.set(digest, claims, expires_at=claims.get("exp"))
+    return claims
 
+
+def jwt_auth(token):
     try:
-        payload = jwt.decode(token, key, algorithms=["HS256"])
+        payload = decode_access_token(token)
 
         return {"sub": payload.get("username")}
     except jwt.ExpiredSignatureError:
+        key = os.environ["SECRET_KEY"]
         payload = jwt.decode(token, key, algorithms=["HS256"], options={"verify_exp": False})
-        user = tempo_core.user.get_instance_by_key(username=payload.get("username"))
-
-        tempo_core.connection.create(
-            user_id=user.id,
-            date=datetime.now(),
-            status=ConnectionStatusEnum.FAILED
-        )
+        with app.app.app_context():
+            user = tempo_core.user.get_snapshot_by_username(payload.get("username"))
+            if not user:
+                return None
+
+            tempo_core.connection.create(
+                user_id=user.id,
+                date=datetime.now(),
+                status=ConnectionStatusEnum.FAILED
+            )
         return None
     except jwt.InvalidTokenError:
         return None
 
 
-def check_is_suspicious(user, device, user_ip):
+def check_is_suspicious(snapshot, device, user_ip):
     """ Check if the connection is suspicious or not """
-    last_conn = tempo_core.connection.get_list_by_key(
-        order_by=Connection.date,
-        limit=1,
-        order="desc",
-        user_id=user.id
-    )
+    user = snapshot["user"]
+    last_conn = snapshot["last_connection"]
 
     # Not suspicious if first connection
     if not last_conn:
         return False
-    last_conn = last_conn[0]
 
     # Check if the suspicious connection has been validated
     if last_conn.status == ConnectionStatusEnum.VALIDATED:
-        user_devices = json.loads(user.devices)
-        user_devices.append(device)
+        user_devices = snapshot["devices"] + [device]
         tempo_core.user.update(user.id, devices=json.dumps(user_devices))
         return False
 
     # Suspicious if last login was more than 30 days ago or from a new device
-    devices = json.loads(user.devices)
     if (
             datetime.now() - last_conn.date > timedelta(days=30)
-            or device not in devices
+            or device not in snapshot["devices"]
     ):
         return True
 
     # Suspicious if user had tried more than 5 times before
-    failed_connections = tempo_core.connection.get_list_by_key(
-        order_by=Connection.date,
-        limit=5,
-        order="desc",
-        user_id=user.id
-    )
-    if len(failed_connections) >= 5:
-        max_failed = all(
-            connection.status == ConnectionStatusEnum.FAILED for connection in failed_connections
-        )
-        if max_failed:
-            return True
+    if snapshot["failed_streak"] >= 5:
+        return True
 
     # Suspicious if IP address changed in less than 1 hour
     if user_ip != last_conn.ip_address and datetime.now() - last_conn.date < timedelta(hours=1):
@@ -116,18 +123,17 @@ def check_is_suspicious(user, device, user_ip):
     return False
 
 
-def check_route(url, method):
-    if not url:
-        return
-
-    route = url.rule.replace("<", "{")
-    route = route.replace(">", "}")
-    route = f"{method} {route}"
-
-    if route not in SECURE_PATHS:
-        return
+def check_route(url_rule, method):
+    """
+    Get the security schemes required by the matched route
+    :param url_rule: the Flask rule matched by the request
+    :param method: the HTTP method of the request
+    :return: the required security schemes, None if the route is not secured
+    """
+    if not url_rule:
+        return None
 
-    return route
+    return SECURE_ENDPOINTS.get((url_rule.endpoint, method))
 
 
 @app.app.before_request
@@ -144,19 +150,18 @@ def before_request():
         username = base64.b64decode(auth_header.split(" ")[1]).decode("utf-8").split(":", 1)[0]
 
     else:
-        username = jwt.decode(
-            auth_header.split(" ")[1],
-            os.environ["SECRET_KEY"],
-            algorithms=["HS256"]
-        ).get("username")
+        # Verified by jwt_auth already, the claims come from the cache
+        username = decode_access_token(auth_header.split(" ")[1]).get("username")
 
-    user = tempo_core.user.get_instance_by_key(username=username)
+    snapshot = tempo_core.user.get_login_snapshot(username)
 
-    if not user:
+    if not snapshot:
         return {
             "message": f"User {username} not found."
         }, 404
 
+    user = snapshot["user"]
+
     if user.status == StatusEnum.BANNED:
         return {
             "message": f"User {username} is banned. "
@@ -173,21 +178,13 @@ def before_request():
 
     device = request.headers.get("Device")
 
-    is_suspicious = check_is_suspicious(user, device, user_ip)
-    last_conn = tempo_core.connection.get_list_by_key(
-        order_by=Connection.date,
-        limit=1,
-        order="desc",
-        user_id=user.id
-    )
+    is_suspicious = check_is_suspicious(snapshot, device, user_ip)
+    last_conn = snapshot["last_connection"]
 
     if not last_conn:
-        user_devices = json.loads(user.devices)
-        user_devices.append(device)
+        user_devices = snapshot["devices"] + [device]
         tempo_core.user.update(user.id, devices=json.dumps(user_devices))
         is_suspicious = False
-    else:
-        last_conn = last_conn[0]
 
     if is_suspicious:
         if (
@@ -210,19 +207,13 @@ def before_request():
             device=device,
             ip_address=user_ip,
             status=ConnectionStatusEnum.SUSPICIOUS,
-            output=json.dumps(msg, ensure_ascii=False)
+            output=json.dumps(msg, ensure_ascii=False),
+            # The alert is queued in the transaction of the connection
+            email_kind=EmailKindEnum.SUSPICIOUS_CONNECTION
         )
 
         msg["validation_id"] = connection.id
 
-        # Send alert
-        try:
-            handle_email_suspicious_connection(user=user, connection=connection)
-        except (smtplib.SMTPException, KeyError):
-            return {
-                "message": "Erreur lors de l'envoi de l'email"
-            }, 500
-
         return msg, 412
 
     tempo_core.connection.create(
@@ -0,0 +1,85 @@
+"""
+Benchmarks of the bulk operations of BaseRepository against the row by row
+create and update, on a dedicated table of the database set in DATABASE.
+
+    DATABASE=sqlite:///bench.sqlite3 MAIL_USERNAME=... MAIL_PASSWORD=... \
+        python -m benchmarks.bench_bulk_operations --rows 10000
+"""
+import argparse
+import time
+
+from app import app, db
+from core.repositories.base import BaseRepository
+
+
+class BenchRow(db.Model):
+    __tablename__ = "bench_row"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String, unique=True, nullable=False)
+    value = db.Column(db.Integer, nullable=False)
+
+
+def timed(label: str, rows: int, function):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {rows} rows in {elapsed:8.3f}s, {rows / elapsed:>12,.0f} rows/s")
+
+
+def reset():
+    db.session.query(BenchRow).delete()
+    db.session.commit()
+
+
+def bench(repository: BaseRepository, rows: int):
+    values = [{"key": f"key-{number}", "value": number} for number in range(rows)]
+
+    def create_one_by_one():
+        for row in values:
+            repository.create(**row)
+
+    timed("create (one commit per row)", rows, create_one_by_one)
+    ids = [row.id for row in db.session.query(BenchRow.id)]
+
+    def update_one_by_one():
+        for object_id in ids:
+            repository.update(object_id, value=0)
+
+    timed("update (one commit per row)", rows, update_one_by_one)
+
+    reset()
+    timed("bulk_create", rows, lambda: repository.bulk_create(values))
+    ids = [row.id for row in db.session.query(BenchRow.id)]
+
+    timed(
+        "bulk_update_by_ids", rows,
+        lambda: repository.bulk_update_by_ids([{"id": object_id, "value": 1} for object_id in ids])
+    )
+    timed("update_where", rows, lambda: repository.update_where({"value": 2}))
+
+    # Half of the rows already exist
+    upserted = [
+        {"key": f"key-{number}", "value": 3} for number in range(rows // 2, rows + rows // 2)
+    ]
+    timed("upsert", rows, lambda: repository.upsert(upserted, index_elements=["key"]))
+    reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    arguments = parser.parse_args()
+
+    with app.app.app_context():
+        BenchRow.__table__.create(db.engine, checkfirst=True)
+        try:
+            reset()
+            bench(BaseRepository(BenchRow), arguments.rows)
+        finally:
+            db.session.remove()
+            BenchRow.__table__.drop(db.engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark of the CPU time against the bytes saved by the gzip levels and the brotli
+qualities, on a typical page of GET /users.
+
+    python -m benchmarks.bench_compression --users 50 --repeat 200
+"""
+import argparse
+import json
+import time
+
+from utils.compression import Compressor
+from utils.pagination import encode_cursor
+
+
+def users_page(users: int) -> bytes:
+    """ Body of a page of GET /users, like the controller builds it """
+    output = [{"id": number, "username": f"user_{number:06d}"} for number in range(1, users + 1)]
+    return json.dumps({"users": output, "next_cursor": encode_cursor({"id": users})}).encode()
+
+
+def bench(label: str, encoding: str, level: int, body: bytes, repeat: int):
+    start = time.process_time()
+    for _ in range(repeat):
+        compressed = Compressor(encoding, level, level).compress(body, final=True)
+    elapsed = (time.process_time() - start) / repeat
+    saved = len(body) - len(compressed)
+    print(
+        f"{label:<12} {len(compressed):>8} bytes, {saved / len(body):6.1%} saved, "
+        f"{elapsed * 1_000_000:8.1f} µs CPU, {saved / elapsed / 1e6:8.1f} MB saved/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    arguments = parser.parse_args()
+
+    body = users_page(arguments.users)
+    print(f"GET /users page of {arguments.users} users: {len(body)} bytes")
+    for level in (1, 6, 9):
+        bench(f"gzip {level}", "gzip", level, body, arguments.repeat)
+    for quality in (0, 4, 6, 11):
+        bench(f"brotli {quality}", "br", quality, body, arguments.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark of the JSON providers of the application, the standard library against
+orjson, on a large list of users like the one of GET /users.
+
+    DATABASE=sqlite:///:memory: MAIL_USERNAME=... MAIL_PASSWORD=... \
+        python -m benchmarks.bench_json_provider --users 10000 --repeat 20
+"""
+import argparse
+import datetime
+import time
+
+from app import app
+from core.models.connection import ConnectionStatusEnum
+from core.models.user import StatusEnum
+from utils.json_provider import JSONProvider, OrjsonProvider
+
+
+def users_list(users: int) -> dict:
+    """ Body of a large list of users, with enums and datetimes """
+    now = datetime.datetime(2024, 9, 25, 23, 14, 42)
+    return {
+        "users": [
+            {
+                "id": number,
+                "username": f"user_{number:06d}",
+                "email": f"user_{number:06d}@email.com",
+                "phone": "0102030405",
+                "status": StatusEnum.READY,
+                "last_connection": {
+                    "status": ConnectionStatusEnum.SUCCESS,
+                    "date": now - datetime.timedelta(minutes=number),
+                },
+            }
+            for number in range(1, users + 1)
+        ],
+        "next_cursor": None,
+    }
+
+
+def bench(provider, payload: dict, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        output = provider.dumps(payload)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(
+        f"{type(provider).__name__:<14} {len(output):>10} characters, "
+        f"{elapsed * 1000:8.2f} ms per dump"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    arguments = parser.parse_args()
+
+    payload = users_list(arguments.users)
+    print(f"List of {arguments.users} users")
+    stdlib = bench(JSONProvider(app.app), payload, arguments.repeat)
+    fast = bench(OrjsonProvider(app.app), payload, arguments.repeat)
+    print(f"orjson is {stdlib / fast:.1f} times faster")
+
+
+if __name__ == "__main__":
+    main()
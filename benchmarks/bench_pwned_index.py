@@ -0,0 +1,80 @@
+"""
+Benchmarks of the offline Pwned Passwords index: time to import a dump
+and latency of the lookups.
+
+    python -m benchmarks.bench_pwned_index --hashes 1000000 --lookups 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from adapters.pwned_index import PwnedIndex, build_index
+
+
+def write_dump(path: str, hashes: int) -> list[str]:
+    """
+    Write a random dump in the format of the Pwned Passwords downloader
+    :param path: path of the dump
+    :param hashes: number of hashes
+    :return: the hashes of the dump
+    """
+    digests = [random.randbytes(20).hex().upper() for _ in range(hashes)]
+    with open(path, "w", encoding="ascii") as dump:
+        for digest in sorted(digests):
+            dump.write(f"{digest}:{random.randint(1, 1000)}\r\n")
+    return digests
+
+
+def bench_import(source: str, destination: str):
+    start = time.perf_counter()
+    total = build_index(source, destination)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(source) / 1024 / 1024
+    print(
+        f"import: {total} hashes ({size:.1f} MiB) in {elapsed:.2f}s, "
+        f"{total / elapsed:,.0f} hashes/s"
+    )
+
+
+def bench_lookup(path: str, digests: list[str], lookups: int):
+    index = PwnedIndex(path)
+    queries = [
+        random.choice(digests) if random.random() < 0.5 else random.randbytes(20).hex().upper()
+        for _ in range(lookups)
+    ]
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter_ns()
+        _ = query[5:] in index.range(query[:5])
+        latencies.append(time.perf_counter_ns() - start)
+    index.close()
+
+    latencies.sort()
+    print(
+        f"lookup: {lookups} queries, "
+        f"mean {statistics.mean(latencies) / 1000:.1f}us, "
+        f"p50 {latencies[len(latencies) // 2] / 1000:.1f}us, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] / 1000:.1f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hashes", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "pwned.txt")
+        destination = os.path.join(directory, "pwned.idx")
+        digests = write_dump(source, arguments.hashes)
+        bench_import(source, destination)
+        bench_lookup(destination, digests, arguments.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark of the startup of a worker, with and without the artifact of the
+specification built by make build_spec.
+
+    DATABASE=sqlite:///:memory: MAIL_USERNAME=... MAIL_PASSWORD=... SESSION_SECRET_KEY=... \
+        python -m benchmarks.bench_spec_startup --repeat 10
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from connexion import FlaskApp
+
+# The controllers resolved by add_api import the application
+import app  # noqa: F401  pylint: disable=unused-import
+from utils.spec_artifact import build_artifact, load_specification
+
+SPEC_PATH = pathlib.Path(__file__).parent.parent / "swagger.yaml"
+
+IMPORT_APP = (
+    "import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)"
+)
+
+
+def add_api(artifact_dir: pathlib.Path) -> float:
+    """ Time to register the API and build the middleware stack, with its validators """
+    start = time.perf_counter()
+    application = FlaskApp(__name__)
+    application.add_api(load_specification(SPEC_PATH, artifact_dir))
+    application.middleware._build_middleware_stack()  # pylint: disable=protected-access
+    return time.perf_counter() - start
+
+
+def import_app(artifact_dir: pathlib.Path) -> float:
+    """ Time to import the application in a new interpreter, like a worker does """
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_APP],
+        env={**os.environ, "SPEC_ARTIFACT_DIR": str(artifact_dir)},
+        cwd=SPEC_PATH.parent,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return float(output.stdout.split()[-1])
+
+
+def report(label: str, timings: list[float]):
+    print(
+        f"{label:<34} median {statistics.median(timings) * 1000:8.1f} ms, "
+        f"min {min(timings) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        without_artifact = pathlib.Path(directory) / "empty"
+        with_artifact = pathlib.Path(directory) / "build"
+        build_artifact(SPEC_PATH, with_artifact)
+
+        for label, artifact_dir in (("without artifact", without_artifact),
+                                    ("with artifact", with_artifact)):
+            report(f"add_api, {label}", [add_api(artifact_dir) for _ in range(arguments.repeat)])
+            report(
+                f"import app, {label}",
+                [import_app(artifact_dir) for _ in range(arguments.repeat)]
+            )
+
+
+if __name__ == "__main__":
+    main()
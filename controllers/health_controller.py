@@ -1,26 +1,73 @@
 from sqlalchemy.exc import SQLAlchemyError
 
-from adapters.hibp_client import HibpClient
+from adapters.hibp_client import hibp_client
+from app import app
 from core.tempo_core import tempo_core
+from utils.health_monitor import HealthMonitor
+
+DEGRADED_MESSAGES = {
+    "database": "API is DEGRADED, database not accessible",
+    "hibp": "API is DEGRADED, subj-ascent HIBP not accessible",
+}
+
+
+def probe_database() -> bool:
+    try:
+        tempo_core.health.select_1()
+    except SQLAlchemyError:
+        return False
+    return True
+
+
+def probe_hibp() -> bool:
+    # The cache is bypassed to really reach the API
+    return hibp_client.offline or hibp_client.fetch_range("00000") is not None
+
+
+def build_health_monitor() -> HealthMonitor:
+    return HealthMonitor(
+        {"database": probe_database, "hibp": probe_hibp},
+        context=app.app.app_context
+    )
+
+
+health_monitor = build_health_monitor()
+
+
+def cache_stats() -> dict:
+    """
+    Hits and misses of the caches of the process
+    :return: the statistics of each cache, by name
+    """
+    # authentication imports the application, which imports the controllers
+    # pylint: disable-next=import-outside-toplevel
+    from authentication import JWT_CACHE
+
+    return {"jwt": JWT_CACHE.stats(), "user_snapshots": tempo_core.user.cache.stats()}
 
 
 def health_check():
     """
     GET /health
-    :return: A message if the API and subj-ascents are working
+    :return: A message if the API and subj-ascents are working, with the last probe of each one
+        and the statistics of the caches of the process
     """
+    health_monitor.ensure_started()
+    dependencies = health_monitor.snapshot()
+    caches = cache_stats()
 
-    # PSQL database
-    try:
-        tempo_core.health.select_1()
-    except SQLAlchemyError:
-        return {"error": "API is DEGRADED, database not accessible"}, 500
+    for name, status in dependencies.items():
+        if not status["healthy"]:
+            return {
+                "error": DEGRADED_MESSAGES[name], "dependencies": dependencies, "caches": caches
+            }, 500
 
-    # HIBP
-    hibp_client = HibpClient()
-    try:
-        hibp_client.check_breach("00000")
-    except RuntimeError:
-        return {"error": "API is DEGRADED, subj-ascent HIBP not accessible"}, 500
+    return {"message": "API is UP", "dependencies": dependencies, "caches": caches}, 200
 
-    return {"message": "API is UP"}, 200
+
+def liveness_check():
+    """
+    GET /health/live
+    :return: A message as long as the process answers, the subj-ascents are not checked
+    """
+    return {"message": "API is ALIVE"}, 200
@@ -8,24 +8,41 @@ from datetime import datetime, timedelta
 import jwt
 from flask import g
 
-from core.models import StatusEnum
+from core.models import StatusEnum, UserLoginState
 from core.models.connection import Connection, ConnectionStatusEnum
 from core.tempo_core import tempo_core
+from utils.http_cache import cache_headers, conditional_get, make_etag
 from utils.utils import handle_email_forgotten_password
 
+# Seconds during which the clients and the CDN use the questions without revalidating them
+QUESTION_MAX_AGE = int(os.environ.get("QUESTION_MAX_AGE", "300"))
 
+
+def catalog_etag(**kwargs):
+    return tempo_core.question.get_catalog().etag
+
+
+def question_etag(**kwargs):
+    question_id = kwargs.get("questionId")
+    question = tempo_core.question.get_catalog().by_id.get(question_id)
+    if question is None:
+        return None
+    return make_etag({"id": question_id, "question": question})
+
+
+@conditional_get.etag(catalog_etag)
 def get_questions(**kwargs):
     """
     GET /security/questions
     :return: The list of all security questions
     """
+    catalog = tempo_core.question.get_catalog()
+    headers = cache_headers(catalog.etag, QUESTION_MAX_AGE)
 
-    questions = tempo_core.question.get_all()
-    output = [question.to_dict() for question in questions]
-
-    return {"questions": output}, 200
+    return {"questions": catalog.to_list()}, 200, headers
 
 
+@conditional_get.etag(question_etag)
 def get_question_by_id(**kwargs):
     """
     GET /security/question/{questionId}
@@ -35,12 +52,19 @@ def get_question_by_id(**kwargs):
     :return: The question
     """
     question_id = kwargs.get("questionId")
-    question = tempo_core.question.get_by_id(question_id)
+    question = tempo_core.question.get_catalog().by_id.get(question_id)
 
-    if not question:
-        return {"message": f"Question with id {question_id} not found"}, 404
+    if question is None:
+        # The catalog may miss a question added by another process
+        instance = tempo_core.question.get_by_id(question_id)
+        if not instance:
+            return {"message": f"Question with id {question_id} not found"}, 404
+        question = instance.question
 
-    return {"question": question.to_dict()}, 200
+    output = {"id": question_id, "question": question}
+    headers = cache_headers(make_etag(output), QUESTION_MAX_AGE)
+
+    return {"question": output}, 200, headers
 
 
 def get_random_list(**kwargs):
@@ -53,12 +77,9 @@ def get_random_list(**kwargs):
     """
     number = kwargs.get("number")
 
-    total = len(tempo_core.question.get_all())
-
-    if number > total:
-        return {"message": "Length ask is above database length"}, 400
-
     output = tempo_core.question.get_random_questions(number)
+    if output is None:
+        return {"message": "Length ask is above database length"}, 400
 
     return {"questions": output}, 200
 
@@ -70,7 +91,7 @@ def check_user(**kwargs):
     if g.auth_type == "Basic":
         # Authentication using user / password
         username = kwargs.get("user")
-        user = tempo_core.user.get_instance_by_key(username=username)
+        user = tempo_core.user.get_snapshot_by_username(username)
         key = os.environ["SECRET_KEY"]
         payload = {
             'username': username,
@@ -179,18 +200,9 @@ def validate_connection(**kwargs):
         )
 
         # Check try number
-        failed_connections = tempo_core.connection.get_list_by_key(
-            order_by=Connection.date,
-            limit=3,
-            order="desc",
-            user_id=user.id
-        )
+        login_state = tempo_core.user_login_state.get_by_id(user.id)
 
-        if (
-                len(failed_connections) >= 3
-                and all(connection.status == ConnectionStatusEnum.VALIDATION_FAILED
-                        for connection in failed_connections)
-        ):
+        if login_state and login_state.validation_failed_count >= 3:
             tempo_core.user.update(user.id, status=StatusEnum.BANNED)
             response_body = {
                 "message": f"Reached max number of tries, user {username} is now banned. "
@@ -256,18 +268,12 @@ def forgotten_password(**kwargs):
     if not user:
         return {"message": f"User {username} not found"}, 404
 
-    last_conn_list = tempo_core.connection.get_list_by_key(
-        order_by=Connection.date,
-        limit=5,
-        order="desc",
-        user_id=user.id
-    )
-    last_conn = get_last_valid_allow_conn(last_conn_list)
+    login_state = tempo_core.user_login_state.get_by_id(user.id)
 
     # Check if a connection has been validated or not
     if (
-        not last_conn
-        or datetime.now() - last_conn_list[0].date >= timedelta(minutes=5)
+        not is_forgotten_password_allowed(login_state)
+        or datetime.now() - login_state.last_date >= timedelta(minutes=5)
     ):
         # Create the connection and return the question
         user_question = random.choice(user.questions)
@@ -290,11 +296,15 @@ def forgotten_password(**kwargs):
     return {"message": "Demand validated, an email has been sent to the user"}, 200
 
 
-def get_last_valid_allow_conn(conns: list[Connection]) -> Connection | None:
-    for conn in conns:
-        if conn.status == ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD:
-            return conn
-        if conn.status == ConnectionStatusEnum.VALIDATION_FAILED:
-            continue
-        return None
-    return None
+def is_forgotten_password_allowed(login_state: UserLoginState | None) -> bool:
+    """
+    Check if the last forgotten password demand of a user has been validated,
+    wrong answers given afterwards are ignored up to 4 tries
+    :param login_state: the login state of the user
+    :return: True if the user can reset the password
+    """
+    return (
+        login_state is not None
+        and login_state.last_attempt_status == ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD
+        and login_state.validation_failed_count < 5
+    )
@@ -3,13 +3,31 @@ import json
 import os
 import random
 import re
-import smtplib
 
-from adapters.hibp_client import HibpClient
+from flask import Response, current_app, stream_with_context
+from sqlalchemy.exc import IntegrityError
+
+from adapters.hibp_client import hibp_client
+from core.models.email_outbox import EmailKindEnum
 from core.models.role import RoleEnum
-from core.models.user import StatusEnum
+from core.models.user import StatusEnum, User
 from core.tempo_core import tempo_core
-from utils.utils import handle_email_create_user, handle_email_password_changed
+from utils.pagination import decode_cursor, encode_cursor
+
+DEFAULT_PAGE_SIZE = 50
+
+# The sensitive columns, like the password, are never exported
+EXPORT_COLUMNS = ["id", "username", "email", "phone", "status"]
+EXPORT_BATCH_SIZE = 1000
+
+
+def public_fields(user) -> dict:
+    """
+    Serialize a user like User.to_dict, from the user or from a row of its public columns
+    :param user: the user, or its row read with the columns User.PUBLIC_COLUMNS
+    :return: the public fields of the user
+    """
+    return {column: getattr(user, column) for column in User.PUBLIC_COLUMNS}
 
 
 def get_users(**kwargs):
@@ -18,17 +36,59 @@ def get_users(**kwargs):
 
     Params :
         - status in kwargs, to filter users on status
-    :return: The list of all users
+        - limit in kwargs, the maximum number of users in the page
+        - cursor in kwargs, the next_cursor of the previous page
+    :return: A page of users, in the order of their id, and the cursor of the next page
     """
     status = kwargs.get("status")
+    limit = kwargs.get("limit", DEFAULT_PAGE_SIZE)
+    cursor = kwargs.get("cursor")
+
+    after_id = None
+    if cursor:
+        try:
+            after_id = decode_cursor(cursor)["id"]
+        except ValueError:
+            return {"message": "Invalid cursor"}, 400
+
+    filters = {"status": status} if status else {}
+    # One more user is read to know if there is a next page, without counting them
+    users = tempo_core.user.get_page(limit + 1, after_id, User.PUBLIC_COLUMNS, **filters)
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor({"id": users[-1].id})
+    output = [public_fields(user) for user in users]
+
+    return {"users": output, "next_cursor": next_cursor}, 200
+
+
+def export_users(**kwargs):
+    """
+    GET /users/export
+
+    Params :
+        - user in kwargs, the authenticated user, who must be an admin
+    :return: Every user, one JSON object per line, streamed batch by batch
+    """
+    username = kwargs.get("user")
+    user = tempo_core.user.get_snapshot_by_username(username)
+
+    if RoleEnum.ADMIN not in user.roles:
+        return {"message": "Only an admin can export the users"}, 401
 
-    if status:
-        users = tempo_core.user.get_list_by_key(status=status)
-    else:
-        users = tempo_core.user.get_all()
-    output = [user.to_dict() for user in users]
+    def generate():
+        # The JSON provider of the application writes the values of the enums
+        dumps = current_app.json.dumps
+        for rows in tempo_core.user.stream_rows(EXPORT_COLUMNS, EXPORT_BATCH_SIZE):
+            yield "".join(
+                dumps(dict(zip(EXPORT_COLUMNS, row)), sort_keys=False) + "\n"
+                for row in rows
+            )
 
-    return {"users": output}, 200
+    # The request context is kept until the last batch is sent, for the database session
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 
 def get_user_by_username(**kwargs):
@@ -42,11 +102,11 @@ def get_user_by_username(**kwargs):
 
     username = kwargs.get("username")
 
-    user = tempo_core.user.get_instance_by_key(username=username)
+    user = tempo_core.user.get_instance_by_key(columns=User.PUBLIC_COLUMNS, username=username)
     if not user:
         return {"message": f"Username '{username}' not found"}, 404
 
-    return {"user": user.to_dict()}, 200
+    return {"user": public_fields(user)}, 200
 
 
 def get_user_details(**kwargs):
@@ -59,9 +119,9 @@ def get_user_details(**kwargs):
     """
     user_id = kwargs.get("userId")
     username = kwargs.get("user")
-    user = tempo_core.user.get_instance_by_key(username=username)
+    user = tempo_core.user.get_snapshot_by_username(username)
 
-    user_roles = [role.name for role in user.roles]
+    user_roles = user.roles
 
     output = tempo_core.user.get_details(user_id)
     if not output:
@@ -106,21 +166,24 @@ def post_users(**kwargs):
     questions = payload.get("questions")
 
     # Check if questions exists
-    for question in questions:
-        question_id = question.get("questionId")
-        response = question.get("response")
-        if not question_id or not response:
-            return {
-                "message":
-                    "Input error, for each question you have to provide "
-                    "the questionId and the answer"
-            }, 400
+    if any(
+        not question.get("questionId") or not question.get("response")
+        for question in questions
+    ):
+        return {
+            "message":
+                "Input error, for each question you have to provide "
+                "the questionId and the answer"
+        }, 400
 
-        if not tempo_core.question.get_by_id(question_id):
+    question_ids = [question.get("questionId") for question in questions]
+    existing_ids = {question.id for question in tempo_core.question.get_by_ids(question_ids)}
+    for question_id in question_ids:
+        if question_id not in existing_ids:
             return {"message": f"Question {question_id} not found"}, 404
 
     # Check username
-    if tempo_core.user.get_instance_by_key(username=username):
+    if tempo_core.user.get_instance_by_key(columns=["id"], username=username):
         return {"message": "Username is already used"}, 400
 
     check = check_password(password=password, username=username, email=email)
@@ -134,39 +197,34 @@ def post_users(**kwargs):
     password = pepper + password + salt
     password = hashlib.sha256(password.encode("utf-8")).hexdigest().upper()
 
-    # Create the user
-    user = tempo_core.user.create(
-        username=username,
-        email=email,
-        password=password,
-        salt=salt,
-        devices=json.dumps([payload.get("device")]),
-        status=StatusEnum.CHECKING_EMAIL,
-        phone=payload.get("phone")
-    )
-
-    # Assign to the created user default role : USER
-    default_role = tempo_core.role.get_instance_by_key(name=RoleEnum.USER)
-    tempo_core.user_role.create(user_id=user.id, role_id=default_role.id)
-
-    # Associate questions to the user
-    for question in questions:
-        question_id = question.get("questionId")
-        response = question.get("response")
-
-        response = pepper + response + salt
-        response = hashlib.sha256(response.encode("utf-8")).hexdigest().upper()
-        tempo_core.user_questions.create(
-            user_id=user.id,
-            question_id=question_id,
-            response=response
+    # Hash the answers to the questions
+    answers = [
+        (
+            question.get("questionId"),
+            hashlib.sha256(
+                (pepper + question.get("response") + salt).encode("utf-8")
+            ).hexdigest().upper()
         )
+        for question in questions
+    ]
 
-    # Send the verification email
+    # Create the user with the default role : USER, its answers and its verification email
+    default_role = tempo_core.role.get_instance_by_key(name=RoleEnum.USER)
     try:
-        handle_email_create_user(user_email=email, username=username, user_id=user.id)
-    except (smtplib.SMTPException, KeyError) as e:
-        return {"message": f"Erreur lors de l'envoi de l'email : {e.__class__.__name__}"}, 500
+        user = tempo_core.user.register(
+            role=default_role,
+            answers=answers,
+            username=username,
+            email=email,
+            password=password,
+            salt=salt,
+            devices=json.dumps([payload.get("device")]),
+            status=StatusEnum.CHECKING_EMAIL,
+            phone=payload.get("phone")
+        )
+    except IntegrityError:
+        # The username has been taken since it was checked
+        return {"message": "Username is already used"}, 400
 
     return {"user": user.to_dict()}, 202
 
@@ -209,11 +267,10 @@ def check_password(password: str, username: str, email: str):
     # HIBP check
     hashed = hashlib.sha1(password.encode("utf-8")).hexdigest().upper()
     prefix, suffix = hashed[:5], hashed[5:]
-    hibp_client = HibpClient()
-    response = hibp_client.check_breach(prefix)
-    if not response:
+    breached_suffixes = hibp_client.check_breach(prefix)
+    if breached_suffixes is None:
         return {"message": "Password checking feature is unavailable."}, 500
-    if any(line.split(":")[0] == suffix for line in response):
+    if suffix in breached_suffixes:
         return {"message": "Password is too weak."}, 400
 
 
@@ -272,14 +329,14 @@ def reset_password(**kwargs):
     user_id = kwargs.get("userId")
     new_password = kwargs.get("body").get("newPassword")
 
-    user = tempo_core.user.get_instance_by_key(username=username)
+    user = tempo_core.user.get_snapshot_by_username(username)
 
     if not user:
         return {
             "message": f"User with id {user_id} not found"
         }, 404
 
-    user_roles = [role.name for role in user.roles]
+    user_roles = user.roles
 
     # Check the validity of the new password
     check = check_password(password=new_password, username=user.username, email=user.email)
@@ -307,8 +364,9 @@ def reset_password(**kwargs):
         }, 401
 
     # Update password and send mail
-    tempo_core.user.update(user.id, password=new_password)
-    handle_email_password_changed(user)
+    tempo_core.user.update(
+        user.id, password=new_password, email_kind=EmailKindEnum.PASSWORD_CHANGED
+    )
     return {
         "message": "The password has been successfully reset"
         if RoleEnum.USER in user_roles else
@@ -1,9 +1,12 @@
 from app import db  # noqa: F401
 
 from .connection import Connection, ConnectionStatusEnum  # noqa: F401
+from .email_outbox import (EmailKindEnum, EmailOutbox,  # noqa: F401
+                           EmailStatusEnum)
 from .question import Question  # noqa: F401
 from .role import Role  # noqa: F401
 from .token import Token  # noqa: F401
 from .user import StatusEnum, User  # noqa: F401
+from .user_login_state import UserLoginState  # noqa: F401
 from .user_question import UserQuestion  # noqa: F401
 from .user_role import UserRole  # noqa: F401
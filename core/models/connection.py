@@ -30,3 +30,8 @@ class Connection(db.Model):
     )
 
     user = db.relationship('User', backref='user')
+
+    __table_args__ = (
+        # Connection history of a user, most recent first
+        db.Index("ix_connection_user_id_date", "user_id", db.text("date DESC")),
+    )
@@ -0,0 +1,45 @@
+import enum
+
+from app import db
+
+
+class EmailKindEnum(enum.Enum):
+    CREATE_USER = "CREATE_USER"
+    SUSPICIOUS_CONNECTION = "SUSPICIOUS_CONNECTION"
+    PASSWORD_CHANGED = "PASSWORD_CHANGED"
+    FORGOTTEN_PASSWORD = "FORGOTTEN_PASSWORD"
+
+
+class EmailStatusEnum(enum.Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    DEAD = "DEAD"
+
+
+class EmailOutbox(db.Model):
+    """
+    Email waiting to be sent by the email worker, the message is rendered
+    when it is sent from the current state of the user and the connection
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.Enum(EmailKindEnum, name="email_kind_enum"), nullable=False)
+    user_id = db.Column(
+        'user_id',
+        db.Integer,
+        db.ForeignKey('user.id'),
+        nullable=False
+    )
+    connection_id = db.Column(db.Integer, db.ForeignKey('connection.id'), nullable=True)
+    status = db.Column(
+        db.Enum(EmailStatusEnum, name="email_status_enum"),
+        nullable=False,
+        default=EmailStatusEnum.PENDING
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False)
+    last_error = db.Column(db.String, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship('User')
+    connection = db.relationship('Connection')
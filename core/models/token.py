@@ -13,3 +13,14 @@ class Token(db.Model):
     is_active = db.Column(db.Boolean, nullable=False)
 
     user = db.relationship('User')
+
+    __table_args__ = (
+        db.Index("ix_token_value", "value", unique=True),
+        # Only the active token of a user is looked up, to be deactivated
+        db.Index(
+            "ix_token_user_id_active",
+            "user_id",
+            postgresql_where=db.text("is_active"),
+            sqlite_where=db.text("is_active = 1")
+        ),
+    )
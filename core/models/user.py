@@ -29,6 +29,14 @@ class User(db.Model):
     questions = db.relationship('UserQuestion', backref='user')
     roles = db.relationship('Role', secondary='user_role', backref='users')
 
+    __table_args__ = (
+        # Pages of users filtered on their status are read in the order of their id
+        db.Index("ix_user_status_id", "status", "id"),
+    )
+
+    # Columns of to_dict, endpoints listing users only read these ones
+    PUBLIC_COLUMNS = ["id", "username"]
+
     def to_dict(self) -> dict:
         return {
             "id": self.id,
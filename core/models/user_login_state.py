@@ -0,0 +1,31 @@
+from app import db
+from core.models.connection import ConnectionStatusEnum
+
+
+class UserLoginState(db.Model):
+    """
+    Summary of the recent connections of a user, kept up to date on each new
+    connection so authentication decisions don't have to scan the history
+    """
+    user_id = db.Column(
+        'user_id',
+        db.Integer,
+        db.ForeignKey('user.id'),
+        primary_key=True
+    )
+    last_connection_id = db.Column(db.Integer, db.ForeignKey('connection.id'), nullable=True)
+    last_status = db.Column(
+        db.Enum(ConnectionStatusEnum, name="connection_status_enum"),
+        nullable=True
+    )
+    last_date = db.Column(db.DateTime, nullable=True)
+    last_ip_address = db.Column(db.String, nullable=True)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    validation_failed_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Last connection which is not a wrong answer to a security question
+    last_attempt_id = db.Column(db.Integer, db.ForeignKey('connection.id'), nullable=True)
+    last_attempt_status = db.Column(
+        db.Enum(ConnectionStatusEnum, name="connection_status_enum"),
+        nullable=True
+    )
@@ -16,3 +16,7 @@ class UserQuestion(db.Model):
     response = db.Column(db.String, nullable=False)
 
     question = db.relationship('Question', backref='user_questions')
+
+    __table_args__ = (
+        db.Index("ix_user_question_user_id", "user_id"),
+    )
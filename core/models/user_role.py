@@ -13,3 +13,7 @@ class UserRole(db.Model):
         db.Integer,
         db.ForeignKey('role.id')
     )
+
+    __table_args__ = (
+        db.Index("ix_user_role_user_id", "user_id"),
+    )
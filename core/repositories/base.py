@@ -1,6 +1,8 @@
-from typing import Generic, Type, TypeVar
+from typing import Callable, Generic, Iterator, Type, TypeVar
 
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 
 from app import db
 
@@ -26,23 +28,202 @@ class BaseRepository(Generic[T]):
         db.session.commit()
         return instance
 
+    @staticmethod
+    def _execute(
+            statement,
+            rows: list[dict] = None,
+            before_commit: Callable[[], None] = None
+    ):
+        """
+        Execute a statement and commit it, nothing is saved if it fails
+        :param statement: the statement to execute
+        :param rows: parameters of each row, for a statement executed on many rows
+        :param before_commit: function writing the changes which follow from the statement,
+            committed with it
+        :return: the result of the statement
+        """
+        try:
+            result = db.session.execute(statement, rows)
+            if before_commit is not None:
+                before_commit()
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            raise
+        return result
+
+    @staticmethod
+    def _insert_on_conflict(model):
+        """
+        INSERT statement of the database, supporting the ON CONFLICT clause
+        :param model: the model to insert
+        :return: the statement, without its ON CONFLICT clause
+        """
+        dialect = db.session.get_bind().dialect.name
+        dialects = {"postgresql": postgresql, "sqlite": sqlite}
+        if dialect not in dialects:
+            raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+        return dialects[dialect].insert(model)
+
+    def bulk_create(self, rows: list[dict]) -> int:
+        """
+        Insert many rows in a single statement and a single commit,
+        without building the instances
+        :param rows: values of each row, by column
+        :return: the number of inserted rows
+        """
+        if not rows:
+            return 0
+        self._execute(insert(self.model), rows)
+        return len(rows)
+
+    def bulk_update_by_ids(self, rows: list[dict]) -> int:
+        """
+        Update many rows by primary key in a single commit, without loading them
+        :param rows: values of each row, by column, each containing its "id"
+        :return: the number of updated rows
+        """
+        if not rows:
+            return 0
+        self._execute(update(self.model), rows)
+        return len(rows)
+
+    def update_where(self, values: dict, **filters) -> int:
+        """
+        Update every row matching the filters with one UPDATE statement
+        :param values: new values, by column
+        :return: the number of updated rows
+        """
+        # The commit expires the instances, so the session does not need to be synchronized
+        result = self._execute(
+            update(self.model)
+            .filter_by(**filters)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def upsert(
+            self,
+            rows: list[dict],
+            index_elements: list[str],
+            update_columns: list[str] = None
+    ) -> int:
+        """
+        Insert many rows, updating the existing ones, with the ON CONFLICT clause of the database
+        :param rows: values of each row, by column
+        :param index_elements: columns of the unique constraint identifying a row
+        :param update_columns: columns overwritten on conflict, the other ones by default.
+            Existing rows are left untouched when empty
+        :return: the number of rows sent
+        """
+        if not rows:
+            return 0
+
+        statement = self._upsert_statement(self.model, rows, index_elements, update_columns)
+        self._execute(statement, rows)
+        return len(rows)
+
+    @classmethod
+    def _upsert_statement(
+            cls,
+            model,
+            rows: list[dict],
+            index_elements: list[str],
+            update_columns: list[str] = None
+    ):
+        """
+        INSERT statement of many rows, updating the existing ones
+        :param model: the model to insert
+        :param rows: values of each row, by column
+        :param index_elements: columns of the unique constraint identifying a row
+        :param update_columns: columns overwritten on conflict, the other ones by default
+        :return: the statement
+        """
+        statement = cls._insert_on_conflict(model)
+        if update_columns is None:
+            update_columns = [column for column in rows[0] if column not in index_elements]
+        if not update_columns:
+            return statement.on_conflict_do_nothing(index_elements=index_elements)
+        return statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: statement.excluded[column] for column in update_columns}
+        )
+
+    def _query(self, columns: list[str] = None):
+        """
+        Query the instances, or only some of their columns as lightweight rows
+        which are neither hydrated nor tracked by the session
+        :param columns: names of the columns to read, None for the instances
+        :return: the query
+        """
+        if columns is None:
+            return self.model.query
+        return db.session.query(*(getattr(self.model, column) for column in columns))
+
     def get_by_id(self, object_id: int) -> T | None:
         return self.model.query.get(object_id)
 
+    def get_by_ids(self, object_ids: list[int]) -> list[T]:
+        if not object_ids:
+            return []
+        return self.model.query.filter(self.model.id.in_(object_ids)).all()
+
     def get_all(self) -> list[T]:
         return self.model.query.all()
 
-    def get_instance_by_key(self, **filters) -> T | None:
-        return self.model.query.filter_by(**filters).first()
+    def get_instance_by_key(self, columns: list[str] = None, **filters) -> T | None:
+        return self._query(columns).filter_by(**filters).first()
+
+    def get_page(
+            self,
+            limit: int,
+            after_id: int = None,
+            columns: list[str] = None,
+            **filters
+    ) -> list[T]:
+        """
+        Get a page of instances in the order of their id, starting after the last one
+        of the previous page, so a deep page costs as much as the first one
+        :param limit: maximum number of instances
+        :param after_id: id of the last instance of the previous page, None for the first page
+        :param columns: names of the columns to read, None for the instances
+        :return: the instances of the page, or their rows if columns are given
+        """
+        query = self._query(columns).filter_by(**filters)
+        if after_id is not None:
+            query = query.filter(self.model.id > after_id)
+        return query.order_by(self.model.id).limit(limit).all()
+
+    def stream_rows(self, columns: list[str], batch_size: int, **filters) -> Iterator[list]:
+        """
+        Read the given columns of every row in the order of their id, as plain tuples
+        and through a server-side cursor, so only one batch is held in memory
+        :param columns: names of the columns to read
+        :param batch_size: number of rows fetched from the database at once
+        :return: the batches of rows
+        """
+        statement = (
+            select(*(getattr(self.model, column) for column in columns))
+            .filter_by(**filters)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = db.session.execute(statement)
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
 
     def get_list_by_key(
             self,
             order_by: str = None,
             limit: int = None,
             order: str = "asc",
+            columns: list[str] = None,
             **filters
     ) -> list[T] | None:
-        query = self.model.query.filter_by(**filters)
+        query = self._query(columns).filter_by(**filters)
 
         if order_by:
             query = query.order_by(asc(order_by) if order.lower() == "asc" else desc(order_by))
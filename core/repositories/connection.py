@@ -1,7 +1,189 @@
-from core.models.connection import Connection
+from sqlalchemy import delete, insert, update
+
+from app import db
+from core.models.connection import Connection, ConnectionStatusEnum
+from core.models.email_outbox import EmailKindEnum
+from core.models.user_login_state import UserLoginState
 from core.repositories.base import BaseRepository
+from core.repositories.email_outbox import pending_email
 
 
 class ConnectionRepository(BaseRepository):
     def __init__(self):
         super().__init__(Connection)
+
+    def create(self, email_kind: EmailKindEnum | None = None, **kwargs) -> Connection:
+        """
+        Create a connection and update the login state of its user in the same transaction
+        :param email_kind: the kind of email about the connection to queue, None to queue none
+        :return: the created connection
+        """
+        connection = Connection(**kwargs)
+        db.session.add(connection)
+        db.session.flush()
+
+        if connection.user_id is not None:
+            # The first connections of a user would both miss the row and insert it,
+            # it is created unless it exists, then they wait for each other on its lock
+            db.session.execute(
+                self._insert_on_conflict(UserLoginState)
+                .values(user_id=connection.user_id, failed_count=0, validation_failed_count=0)
+                .on_conflict_do_nothing(index_elements=["user_id"])
+            )
+            self._apply_connection(self._get_login_state(connection.user_id), connection)
+
+        if email_kind is not None:
+            db.session.add(
+                pending_email(email_kind, user_id=connection.user_id, connection=connection)
+            )
+
+        db.session.commit()
+        return connection
+
+    def update(self, object_id: int, **kwargs) -> Connection | None:
+        """
+        Update a connection, keeping the login state of its user in sync when the status changes
+        """
+        connection = self.get_by_id(object_id)
+        if connection is None:
+            return None
+        for key, value in kwargs.items():
+            setattr(connection, key, value)
+
+        if "status" in kwargs and connection.user_id is not None:
+            state = self._get_login_state(connection.user_id)
+            if state is not None and state.last_connection_id == connection.id:
+                state.last_status = connection.status
+            if state is not None and state.last_attempt_id == connection.id:
+                state.last_attempt_status = connection.status
+
+        db.session.commit()
+        return connection
+
+    # The bulk operations rebuild the login states of the users of the rows they change
+    def bulk_create(self, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        user_ids = self._user_ids(rows)
+        self._execute(
+            insert(Connection), rows, before_commit=lambda: self._rebuild_login_states(user_ids)
+        )
+        return len(rows)
+
+    def bulk_update_by_ids(self, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        user_ids = self._user_ids(rows)
+        self._execute(
+            update(Connection), rows, before_commit=lambda: self._rebuild_login_states(user_ids)
+        )
+        return len(rows)
+
+    def update_where(self, values: dict, **filters) -> int:
+        user_ids = {user_id for user_id, in self._query(["user_id"]).filter_by(**filters)}
+        user_ids.add(values.get("user_id"))
+        result = self._execute(
+            update(Connection)
+            .filter_by(**filters)
+            .values(**values)
+            .execution_options(synchronize_session=False),
+            before_commit=lambda: self._rebuild_login_states(user_ids)
+        )
+        return result.rowcount
+
+    def upsert(
+            self,
+            rows: list[dict],
+            index_elements: list[str],
+            update_columns: list[str] = None
+    ) -> int:
+        if not rows:
+            return 0
+        user_ids = self._user_ids(rows)
+        self._execute(
+            self._upsert_statement(Connection, rows, index_elements, update_columns),
+            rows,
+            before_commit=lambda: self._rebuild_login_states(user_ids)
+        )
+        return len(rows)
+
+    def _user_ids(self, rows: list[dict]) -> set[int | None]:
+        """
+        Users of the rows, with the current users of the rows already saved
+        """
+        user_ids = {row.get("user_id") for row in rows}
+        ids = [row["id"] for row in rows if row.get("id") is not None]
+        if ids:
+            user_ids.update(
+                user_id for user_id, in self._query(["user_id"]).filter(Connection.id.in_(ids))
+            )
+        return user_ids
+
+    def _rebuild_login_states(self, user_ids: set[int | None]):
+        """
+        Rebuild the login states of users from their connections, in the order of their dates,
+        like the migration of the user_login_state table did
+        """
+        user_ids = user_ids - {None}
+        if not user_ids:
+            return
+
+        connections = (
+            self._query(["id", "user_id", "status", "date", "ip_address"])
+            .filter(Connection.user_id.in_(user_ids))
+            .order_by(Connection.user_id, Connection.date, Connection.id)
+        )
+        states = {}
+        for connection in connections:
+            if connection.user_id not in states:
+                states[connection.user_id] = UserLoginState(
+                    user_id=connection.user_id,
+                    failed_count=0,
+                    validation_failed_count=0
+                )
+            self._apply_connection(states[connection.user_id], connection)
+
+        # The users left without connection have no state, like before their first one
+        db.session.execute(
+            delete(UserLoginState)
+            .where(UserLoginState.user_id.in_(user_ids - states.keys()))
+            .execution_options(synchronize_session=False)
+        )
+        if states:
+            columns = [column.name for column in UserLoginState.__table__.columns]
+            rows = [
+                {column: getattr(state, column) for column in columns}
+                for state in states.values()
+            ]
+            db.session.execute(self._upsert_statement(UserLoginState, rows, ["user_id"]), rows)
+
+    @staticmethod
+    def _apply_connection(state: UserLoginState, connection):
+        """
+        Update the login state of a user with its new connection
+        """
+        state.last_connection_id = connection.id
+        state.last_status = connection.status
+        state.last_date = connection.date
+        state.last_ip_address = connection.ip_address
+
+        if connection.status == ConnectionStatusEnum.FAILED:
+            state.failed_count += 1
+        else:
+            state.failed_count = 0
+
+        if connection.status == ConnectionStatusEnum.VALIDATION_FAILED:
+            state.validation_failed_count += 1
+        else:
+            state.validation_failed_count = 0
+            state.last_attempt_id = connection.id
+            state.last_attempt_status = connection.status
+
+    @staticmethod
+    def _get_login_state(user_id: int) -> UserLoginState | None:
+        return (
+            db.session.query(UserLoginState)
+            .filter_by(user_id=user_id)
+            .with_for_update()
+            .first()
+        )
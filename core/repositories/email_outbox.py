@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from app import db
+from core.models.email_outbox import (EmailKindEnum, EmailOutbox,
+                                      EmailStatusEnum)
+from core.repositories.base import BaseRepository
+
+
+def pending_email(kind: EmailKindEnum, **kwargs) -> EmailOutbox:
+    """
+    Build an email to queue, it is saved by the commit of the transaction it is added to
+    :param kind: the kind of email to send
+    :return: the email, due now
+    """
+    now = datetime.now()
+    return EmailOutbox(
+        kind=kind,
+        status=EmailStatusEnum.PENDING,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+        **kwargs
+    )
+
+
+class EmailOutboxRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(EmailOutbox)
+
+    def claim_due(self, limit: int, now: datetime, lease_until: datetime) -> list[EmailOutbox]:
+        """
+        Lock the pending emails due at now and push back their next attempt,
+        so concurrent workers skip them while they are being sent
+        """
+        emails = (
+            EmailOutbox.query
+            .filter(
+                EmailOutbox.status == EmailStatusEnum.PENDING,
+                EmailOutbox.next_attempt_at <= now
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        for email in emails:
+            email.next_attempt_at = lease_until
+        db.session.commit()
+        return emails
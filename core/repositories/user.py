@@ -1,14 +1,62 @@
+from sqlalchemy.exc import SQLAlchemyError
+
 from app import db
+from core.models.connection import Connection
+from core.models.email_outbox import EmailKindEnum
 from core.models.question import Question
+from core.models.role import Role
 from core.models.user import User
+from core.models.user_login_state import UserLoginState
 from core.models.user_question import UserQuestion
 from core.repositories.base import BaseRepository
+from core.repositories.email_outbox import pending_email
 
 
 class UserRepository(BaseRepository):
     def __init__(self):
         super().__init__(User)
 
+    def register(self, role: Role, answers: list[tuple[int, str]], **kwargs) -> User:
+        """
+        Create a user with its role, the answers to its questions and its verification email
+        in a single transaction, nothing is saved if one of the inserts fails
+        :param role: the role given to the user
+        :param answers: the question ids with their hashed answer
+        :return: the created user
+        """
+        user = User(**kwargs)
+        user.roles.append(role)
+        user.questions = [
+            UserQuestion(question_id=question_id, response=response)
+            for question_id, response in answers
+        ]
+        email = pending_email(EmailKindEnum.CREATE_USER, user=user)
+
+        db.session.add_all([user, email])
+        try:
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            raise
+        return user
+
+    def update(
+            self,
+            object_id: int,
+            email_kind: EmailKindEnum | None = None,
+            **kwargs
+    ) -> User | None:
+        """
+        Update a user, with the email about the change queued in the same transaction
+        :param object_id: id of the user
+        :param email_kind: the kind of email to queue, None to queue none
+        :return: the updated user, None if it does not exist
+        """
+        user = self.get_by_id(object_id)
+        if user is not None and email_kind is not None:
+            db.session.add(pending_email(email_kind, user=user))
+        return super().update(object_id, **kwargs)
+
     def get_details(self, user_id: int):
         query = (
             db.session.query(
@@ -27,3 +75,18 @@ class UserRepository(BaseRepository):
         )
 
         return query.all()
+
+    def get_login_snapshot(self, username: str):
+        """
+        Fetch a user with its login state and last connection in a single round trip
+        :param username: username of the user
+        :return: (User, UserLoginState, Connection) row, None if the user does not exist
+        """
+        query = (
+            db.session.query(User, UserLoginState, Connection)
+            .outerjoin(UserLoginState, UserLoginState.user_id == User.id)
+            .outerjoin(Connection, Connection.id == UserLoginState.last_connection_id)
+            .filter(User.username == username)
+        )
+
+        return query.first()
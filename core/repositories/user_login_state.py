@@ -0,0 +1,7 @@
+from core.models.user_login_state import UserLoginState
+from core.repositories.base import BaseRepository
+
+
+class UserLoginStateRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(UserLoginState)
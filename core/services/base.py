@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar
+from typing import Generic, Iterator, TypeVar
 
 from core.repositories.base import BaseRepository
 
@@ -15,20 +15,53 @@ class BaseService(Generic[T]):
     def update(self, object_id: int, **kwargs) -> T | None:
         return self.repository.update(object_id, **kwargs)
 
+    def bulk_create(self, rows: list[dict]) -> int:
+        return self.repository.bulk_create(rows)
+
+    def bulk_update_by_ids(self, rows: list[dict]) -> int:
+        return self.repository.bulk_update_by_ids(rows)
+
+    def update_where(self, values: dict, **filters) -> int:
+        return self.repository.update_where(values, **filters)
+
+    def upsert(
+            self,
+            rows: list[dict],
+            index_elements: list[str],
+            update_columns: list[str] = None
+    ) -> int:
+        return self.repository.upsert(rows, index_elements, update_columns)
+
     def get_by_id(self, object_id: int) -> T | None:
         return self.repository.get_by_id(object_id)
 
+    def get_by_ids(self, object_ids: list[int]) -> list[T]:
+        return self.repository.get_by_ids(object_ids)
+
     def get_all(self) -> list[T]:
         return self.repository.get_all()
 
-    def get_instance_by_key(self, **filters) -> T | None:
-        return self.repository.get_instance_by_key(**filters)
+    def get_instance_by_key(self, columns: list[str] = None, **filters) -> T | None:
+        return self.repository.get_instance_by_key(columns, **filters)
+
+    def get_page(
+            self,
+            limit: int,
+            after_id: int = None,
+            columns: list[str] = None,
+            **filters
+    ) -> list[T]:
+        return self.repository.get_page(limit, after_id, columns, **filters)
+
+    def stream_rows(self, columns: list[str], batch_size: int, **filters) -> Iterator[list]:
+        return self.repository.stream_rows(columns, batch_size, **filters)
 
     def get_list_by_key(
             self,
             order_by: str = None,
             limit: int = None,
             order: str = "asc",
+            columns: list[str] = None,
             **filters
     ) -> list[T] | None:
-        return self.repository.get_list_by_key(order_by, limit, order, **filters)
+        return self.repository.get_list_by_key(order_by, limit, order, columns, **filters)
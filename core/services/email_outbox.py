@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from core.models.email_outbox import (EmailKindEnum, EmailOutbox,
+                                      EmailStatusEnum)
+from core.repositories.email_outbox import EmailOutboxRepository
+from core.services.base import BaseService
+
+
+class EmailOutboxService(BaseService[EmailOutbox]):
+    def __init__(self):
+        super().__init__(EmailOutboxRepository())
+
+    def enqueue(
+            self,
+            kind: EmailKindEnum,
+            user_id: int,
+            connection_id: int | None = None
+    ) -> EmailOutbox:
+        """
+        Queue an email, it will be rendered and sent by the email worker
+        :param kind: the kind of email to send
+        :param user_id: id of the recipient
+        :param connection_id: id of the connection the email is about, if any
+        :return: the queued email
+        """
+        now = datetime.now()
+        return self.repository.create(
+            kind=kind,
+            user_id=user_id,
+            connection_id=connection_id,
+            status=EmailStatusEnum.PENDING,
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now
+        )
+
+    def claim_due(self, limit: int, lease: timedelta) -> list[EmailOutbox]:
+        """
+        Claim a batch of emails ready to be sent
+        :param limit: maximum number of emails to claim
+        :param lease: time given to the worker to send them before they can be claimed again
+        :return: the claimed emails
+        """
+        now = datetime.now()
+        return self.repository.claim_due(limit, now, now + lease)
+
+    def mark_sent(self, email: EmailOutbox) -> EmailOutbox:
+        return self.repository.update(
+            email.id,
+            status=EmailStatusEnum.SENT,
+            attempts=email.attempts + 1,
+            sent_at=datetime.now(),
+            last_error=None
+        )
+
+    def mark_failed(
+            self,
+            email: EmailOutbox,
+            error: str,
+            retry_at: datetime | None
+    ) -> EmailOutbox:
+        """
+        Record a failed attempt to send an email
+        :param email: the email
+        :param error: description of the error
+        :param retry_at: date of the next attempt, None to give up on the email
+        :return: the updated email
+        """
+        if retry_at is None:
+            return self.repository.update(
+                email.id,
+                status=EmailStatusEnum.DEAD,
+                attempts=email.attempts + 1,
+                last_error=error
+            )
+
+        return self.repository.update(
+            email.id,
+            attempts=email.attempts + 1,
+            next_attempt_at=retry_at,
+            last_error=error
+        )
@@ -1,12 +1,130 @@
+import os
+import random
+import threading
+from types import MappingProxyType
+from typing import NamedTuple
+
 from core.models import Question
 from core.repositories.question import QuestionRepository
 from core.services.base import BaseService
+from utils.cache import TTLCache
+from utils.http_cache import make_etag
+
+CATALOG_KEY = "catalog"
+
+
+class QuestionCatalog(NamedTuple):
+    """Immutable snapshot of all the questions, with the ETag of their content"""
+    version: int
+    questions: tuple[tuple[int, str], ...]
+    by_id: MappingProxyType
+    etag: str
+
+    @classmethod
+    def from_rows(cls, version: int, rows) -> "QuestionCatalog":
+        questions = tuple((row.id, row.question) for row in rows)
+        return cls(
+            version=version,
+            questions=questions,
+            by_id=MappingProxyType(dict(questions)),
+            etag=make_etag(questions),
+        )
+
+    def to_list(self) -> list[dict]:
+        return [
+            {"id": question_id, "question": question}
+            for question_id, question in self.questions
+        ]
 
 
 class QuestionService(BaseService[Question]):
     def __init__(self):
         super().__init__(QuestionRepository())
+        self.cache = TTLCache(
+            max_size=1,
+            ttl=float(os.environ.get("QUESTION_CACHE_TTL", "300")),
+        )
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def get_catalog(self) -> QuestionCatalog:
+        """
+        Get all the questions from the process cache, or from the database on a miss.
+        The version of the catalog is bumped whenever a question is changed through
+        this service, other processes see the change once the catalog expires
+        :return: the catalog of the questions, in the order of their id
+        """
+        catalog = self.cache.get(CATALOG_KEY)
+        if catalog is not None:
+            return catalog
+
+        version = self.version
+        rows = self.repository.get_list_by_key(order_by="id", columns=["id", "question"])
+        catalog = QuestionCatalog.from_rows(version, rows)
+        with self._lock:
+            # A write during the read would leave an outdated catalog in the cache
+            if version == self.version:
+                self.cache.set(CATALOG_KEY, catalog)
+        return catalog
+
+    def _changed(self):
+        with self._lock:
+            self.version += 1
+            self.cache.invalidate(CATALOG_KEY)
+
+    def count(self) -> int:
+        return len(self.get_catalog().questions)
+
+    def get_random_questions(self, number: int) -> list[dict] | None:
+        """
+        Pick random questions from the catalog, without sorting the table
+        :param number: the number of questions
+        :return: the questions in a random order, None if there are not enough questions
+        """
+        catalog = self.get_catalog()
+        if number > len(catalog.questions):
+            # The catalog may miss questions added by another process, it is reloaded once
+            self.cache.invalidate(CATALOG_KEY)
+            catalog = self.get_catalog()
+            if number > len(catalog.questions):
+                return None
+
+        return [
+            {"id": question_id, "question": question}
+            for question_id, question in random.sample(catalog.questions, number)
+        ]
+
+    def create(self, **kwargs) -> Question:
+        question = super().create(**kwargs)
+        self._changed()
+        return question
+
+    def update(self, object_id: int, **kwargs) -> Question | None:
+        question = super().update(object_id, **kwargs)
+        self._changed()
+        return question
+
+    def bulk_create(self, rows: list[dict]) -> int:
+        count = super().bulk_create(rows)
+        self._changed()
+        return count
+
+    def bulk_update_by_ids(self, rows: list[dict]) -> int:
+        count = super().bulk_update_by_ids(rows)
+        self._changed()
+        return count
+
+    def update_where(self, values: dict, **filters) -> int:
+        count = super().update_where(values, **filters)
+        self._changed()
+        return count
 
-    def get_random_questions(self, number: int) -> list[dict]:
-        questions = self.repository.get_random_questions(number)
-        return [q.to_dict() for q in questions]
+    def upsert(
+            self,
+            rows: list[dict],
+            index_elements: list[str],
+            update_columns: list[str] = None
+    ) -> int:
+        count = super().upsert(rows, index_elements, update_columns)
+        self._changed()
+        return count
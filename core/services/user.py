@@ -1,13 +1,122 @@
 import json
+import os
+from typing import NamedTuple
 
-from core.models.user import User
+from core.models.role import Role, RoleEnum
+from core.models.user import StatusEnum, User
 from core.repositories.user import UserRepository
 from core.services.base import BaseService
+from utils.cache import TTLCache
+
+
+class UserSnapshot(NamedTuple):
+    """Immutable copy of the user fields needed to authenticate and authorize a request"""
+    id: int
+    username: str
+    email: str
+    status: StatusEnum
+    salt: str
+    password: str
+    devices: tuple[str, ...]
+    roles: tuple[RoleEnum, ...]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            status=user.status,
+            salt=user.salt,
+            password=user.password,
+            devices=tuple(json.loads(user.devices) if user.devices else []),
+            roles=tuple(role.name for role in user.roles),
+        )
 
 
 class UserService(BaseService[User]):
     def __init__(self):
         super().__init__(UserRepository())
+        self.cache = TTLCache(
+            max_size=int(os.environ.get("USER_CACHE_SIZE", "1024")),
+            ttl=float(os.environ.get("USER_CACHE_TTL", "30")),
+        )
+
+    def create(self, **kwargs) -> User:
+        user = super().create(**kwargs)
+        self.cache.invalidate(user.username)
+        return user
+
+    def register(self, role: Role, answers: list[tuple[int, str]], **kwargs) -> User:
+        user = self.repository.register(role, answers, **kwargs)
+        self.cache.invalidate(user.username)
+        return user
+
+    def update(self, object_id: int, **kwargs) -> User | None:
+        user = super().update(object_id, **kwargs)
+        if user is not None:
+            self.cache.invalidate(user.username)
+        return user
+
+    # The bulk operations do not know the usernames of the rows they change
+    def bulk_create(self, rows: list[dict]) -> int:
+        count = super().bulk_create(rows)
+        self.cache.clear()
+        return count
+
+    def bulk_update_by_ids(self, rows: list[dict]) -> int:
+        count = super().bulk_update_by_ids(rows)
+        self.cache.clear()
+        return count
+
+    def update_where(self, values: dict, **filters) -> int:
+        count = super().update_where(values, **filters)
+        self.cache.clear()
+        return count
+
+    def upsert(
+            self,
+            rows: list[dict],
+            index_elements: list[str],
+            update_columns: list[str] = None
+    ) -> int:
+        count = super().upsert(rows, index_elements, update_columns)
+        self.cache.clear()
+        return count
+
+    def get_snapshot_by_username(self, username: str) -> UserSnapshot | None:
+        """
+        Get a snapshot of a user from the process cache, or from the database on a miss.
+        Snapshots are dropped whenever the user is created or updated through this
+        service, and refreshed by get_login_snapshot, which the authentication calls on
+        each secured request, so their role checks see the changes of other processes.
+        Elsewhere a snapshot may be up to USER_CACHE_TTL seconds old, the passwords are
+        checked with get_credentials instead
+        :param username: username of the user
+        :return: the snapshot of the user, None if the user does not exist
+        """
+        snapshot = self.cache.get(username)
+        if snapshot is not None:
+            return snapshot
+
+        user = self.repository.get_instance_by_key(username=username)
+        if user is None:
+            return None
+
+        snapshot = UserSnapshot.from_user(user)
+        self.cache.set(username, snapshot)
+        return snapshot
+
+    def get_credentials(self, username: str):
+        """
+        Read the password of a user from the database, never from a snapshot
+        which another process may have changed since it was cached
+        :param username: username of the user
+        :return: row with the id, the salt and the password hash, None if the user does not exist
+        """
+        return self.repository.get_instance_by_key(
+            columns=["id", "salt", "password"], username=username
+        )
 
     def get_details(self, user_id: int) -> dict | None:
         user_data = self.repository.get_details(user_id)
@@ -30,3 +139,26 @@ class UserService(BaseService[User]):
             "status": user.status.value,
             "phone": user.phone,
         }
+
+    def get_login_snapshot(self, username: str) -> dict | None:
+        """
+        Gather everything the authentication needs to assess a login
+        :param username: username of the user
+        :return: the user, its last connection, the current streak of failed
+        connections and its known devices, None if the user does not exist
+        """
+        row = self.repository.get_login_snapshot(username)
+
+        if not row:
+            return None
+
+        user, login_state, last_connection = row
+        # The request is then authorized from the current roles and status of the user
+        self.cache.set(user.username, UserSnapshot.from_user(user))
+
+        return {
+            "user": user,
+            "last_connection": last_connection,
+            "failed_streak": login_state.failed_count if login_state else 0,
+            "devices": json.loads(user.devices) if user.devices else [],
+        }
@@ -0,0 +1,8 @@
+from core.models import UserLoginState
+from core.repositories.user_login_state import UserLoginStateRepository
+from core.services.base import BaseService
+
+
+class UserLoginStateService(BaseService[UserLoginState]):
+    def __init__(self):
+        super().__init__(UserLoginStateRepository())
@@ -1,9 +1,11 @@
 from core.services.connection import ConnectionService
+from core.services.email_outbox import EmailOutboxService
 from core.services.health import HealthService
 from core.services.question import QuestionService
 from core.services.role import RoleService
 from core.services.token import TokenService
 from core.services.user import UserService
+from core.services.user_login_state import UserLoginStateService
 from core.services.user_question import UserQuestionService
 from core.services.user_role import UserRoleService
 
@@ -18,6 +20,8 @@ class TempoCore:
         self.token = TokenService()
         self.user_role = UserRoleService()
         self.connection = ConnectionService()
+        self.user_login_state = UserLoginStateService()
+        self.email_outbox = EmailOutboxService()
 
 
 tempo_core = TempoCore()
@@ -0,0 +1,30 @@
+"""
+Configuration of gunicorn, used by make run.
+
+The application is imported once by the master (preload_app), which also warms
+it up, so the workers share the parsed specification, the secured endpoints,
+the compiled templates and the question catalog copy-on-write. Each worker then
+drops the connections it inherited from the master.
+"""
+# pylint: disable=invalid-name
+import gc
+import multiprocessing
+import os
+
+from app import reset_after_fork, warm_up
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def when_ready(server):
+    warm_up(server.app.wsgi())
+    # The objects loaded so far are never collected, so the garbage collector of the
+    # workers does not write to their pages and they stay shared with the master
+    gc.freeze()
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    reset_after_fork(server.app.wsgi())
@@ -1,7 +1,6 @@
 import hashlib
 import json
 import os
-import smtplib
 import uuid
 
 from flask import Blueprint, render_template, request, session
@@ -145,10 +144,7 @@ def resend_email(username):
 
     session.pop('email_token', None)
 
-    try:
-        handle_email_create_user(user_email=user.email, username=username, user_id=user.id)
-    except (smtplib.SMTPException, KeyError):
-        return render_template(ERROR_TEMPLATE), 500
+    handle_email_create_user(user)
 
     return render_template(EMAIL_RESEND_TEMPLATE), 202
 
@@ -341,10 +337,7 @@ def resend_email_forgotten(username):
 
     session.pop('email_token', None)
 
-    try:
-        handle_email_forgotten_password(user=user)
-    except (smtplib.SMTPException, KeyError):
-        return render_template(ERROR_TEMPLATE), 500
+    handle_email_forgotten_password(user=user)
 
     return render_template(EMAIL_RESEND_TEMPLATE), 202
 
@@ -0,0 +1,261 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from adapters.async_http_client import AsyncHttpClient
+from tests.unit.testing_utils import get_free_port
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestGet:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, http_stub):
+        self.http_stub = http_stub
+        self.http_client = AsyncHttpClient(base_url=f"{http_stub.url}/")
+
+        self.patch_sleep = patch("adapters.async_http_client.asyncio.sleep")
+        self.mock_sleep = self.patch_sleep.start()
+        request.addfinalizer(self.patch_sleep.stop)
+
+    async def get_many(self, count, **kwargs):
+        responses = [await self.http_client.get("endpoint", **kwargs) for _ in range(count)]
+        await self.http_client.aclose()
+        return responses
+
+    def test_get_success(self):
+        # When
+        responses = run(self.get_many(3))
+
+        # Then
+        assert responses == [{"message": "success"}] * 3
+        assert self.http_stub.paths == ["/endpoint"] * 3
+        assert len(self.http_stub.clients) == 1
+
+    def test_get_raw_text(self):
+        # Given
+        self.http_stub.queue(body=b"12345:5")
+
+        # When
+        responses = run(self.get_many(1, raw_text=True))
+
+        # Then
+        assert responses == ["12345:5"]
+
+    def test_get_params(self):
+        # When
+        run(self.get_many(1, params={"page": 2}))
+
+        # Then
+        assert self.http_stub.paths == ["/endpoint?page=2"]
+
+    def test_get_invalid_json(self):
+        # Given
+        self.http_stub.queue(body=b"not json")
+
+        # When
+        responses = run(self.get_many(1))
+
+        # Then
+        assert responses == [None]
+
+    def test_get_retried_until_success(self):
+        # Given
+        self.http_stub.queue(status=503)
+        self.http_stub.queue(status=429)
+
+        # When
+        responses = run(self.get_many(1))
+
+        # Then
+        assert responses == [{"message": "success"}]
+        assert len(self.http_stub.paths) == 3
+        assert self.mock_sleep.call_count == 2
+        assert self.http_client.stats.as_dict()["retries"] == 2
+
+    def test_get_failed(self):
+        # Given
+        for _ in range(3):
+            self.http_stub.queue(status=500)
+
+        # When
+        responses = run(self.get_many(1))
+
+        # Then
+        assert responses == [None]
+        assert len(self.http_stub.paths) == 3
+        assert self.http_client.stats.as_dict()["failures"] == 1
+
+    def test_get_client_error_not_retried(self):
+        # Given
+        self.http_stub.queue(status=404)
+
+        # When
+        responses = run(self.get_many(1))
+
+        # Then
+        assert responses == [None]
+        self.mock_sleep.assert_not_called()
+
+    def test_get_timeout(self):
+        # Given
+        self.http_client.timeout = 0.05
+        self.http_client.max_attempts = 1
+        self.http_stub.queue(delay=0.5)
+
+        # When
+        responses = run(self.get_many(1))
+
+        # Then
+        assert responses == [None]
+
+    def test_get_server_unavailable(self):
+        # Given
+        http_client = AsyncHttpClient(f"http://127.0.0.1:{get_free_port()}")
+
+        # When
+        response = run(http_client.get("endpoint"))
+
+        # Then
+        assert response is None
+        assert self.mock_sleep.call_count == 2
+
+    def test_get_decoding_error(self):
+        # When
+        with patch.object(httpx.AsyncClient, "request", side_effect=httpx.DecodingError("gzip")):
+            response = run(self.http_client.get("endpoint"))
+
+        # Then
+        assert response is None
+        self.mock_sleep.assert_not_called()
+
+    def test_get_invalid_url(self):
+        # Given
+        http_client = AsyncHttpClient("unknown://host")
+
+        # When
+        response = run(http_client.get("endpoint"))
+
+        # Then
+        assert response is None
+        self.mock_sleep.assert_not_called()
+
+
+class TestPost:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, http_stub):
+        self.http_stub = http_stub
+        self.http_client = AsyncHttpClient(base_url=http_stub.url)
+
+        self.patch_sleep = patch("adapters.async_http_client.asyncio.sleep")
+        self.mock_sleep = self.patch_sleep.start()
+        request.addfinalizer(self.patch_sleep.stop)
+
+    def test_post_success(self):
+        # When
+        response = run(self.http_client.post("endpoint", data={"key": "value"}))
+
+        # Then
+        assert response == {"message": "success"}
+        assert self.http_stub.paths == ["/endpoint"]
+
+    def test_post_invalid_json(self):
+        # Given
+        self.http_stub.queue(body=b"not json")
+
+        # When
+        response = run(self.http_client.post("endpoint"))
+
+        # Then
+        assert response is None
+
+    def test_post_not_retried_once_sent(self):
+        # Given
+        self.http_stub.queue(status=503)
+
+        # When
+        response = run(self.http_client.post("endpoint"))
+
+        # Then
+        assert response is None
+        assert len(self.http_stub.paths) == 1
+
+    def test_post_read_timeout_not_retried(self):
+        # Given
+        self.http_client.timeout = 0.05
+        self.http_stub.queue(delay=0.5)
+
+        # When
+        response = run(self.http_client.post("endpoint"))
+
+        # Then
+        assert response is None
+        self.mock_sleep.assert_not_called()
+
+
+class TestClient:
+
+    def test_one_pool_per_event_loop(self):
+        # Given
+        http_client = AsyncHttpClient("http://127.0.0.1")
+
+        async def get_clients():
+            return http_client.client, http_client.client
+
+        # When
+        first, same = run(get_clients())
+        second, _ = run(get_clients())
+
+        # Then
+        assert first is same
+        assert first is not second
+        assert isinstance(first, httpx.AsyncClient)
+
+    def test_closed_pool_replaced(self):
+        # Given
+        http_client = AsyncHttpClient("http://127.0.0.1")
+
+        async def reopen():
+            client = http_client.client
+            await client.aclose()
+            return client, http_client.client
+
+        # When
+        closed, client = run(reopen())
+
+        # Then
+        assert closed is not client
+
+    def test_aclose_without_pool(self):
+        # Given
+        http_client = AsyncHttpClient("http://127.0.0.1")
+
+        # When
+        run(http_client.aclose())
+
+        # Then
+        assert not http_client._clients  # pylint: disable=protected-access
+
+    def test_reset(self):
+        # Given
+        http_client = AsyncHttpClient("http://127.0.0.1")
+
+        async def reset():
+            client = http_client.client
+            http_client.reset()
+            new_client = http_client.client
+            await client.aclose()
+            await new_client.aclose()
+            return client, new_client
+
+        # When
+        client, new_client = run(reset())
+
+        # Then
+        assert client is not new_client
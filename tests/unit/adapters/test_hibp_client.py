@@ -1,15 +1,23 @@
-from unittest.mock import patch
+import asyncio
+import hashlib
+import os
+import time
+from unittest.mock import MagicMock, patch
 
 import pytest
 
-from adapters.hibp_client import HibpClient
+from adapters.hibp_client import (RANGE_CACHE, AsyncHibpClient, HibpClient,
+                                  RangeCache, RangeStore, async_hibp_client)
+from adapters.pwned_index import PwnedIndex, build_index
 
 
 class TestCheckBreach:
 
     @pytest.fixture(autouse=True)
-    def setup_method(self, request):
-        self.hibp_client = HibpClient()
+    def setup_method(self, request, tmp_path):
+        self.store = RangeStore(str(tmp_path / "hibp.sqlite3"))
+        self.cache = RangeCache(self.store, max_size=10, ttl=60, max_stale=3600)
+        self.hibp_client = HibpClient(cache=self.cache)
 
         self.patch_get = patch.object(self.hibp_client, "get")
         self.mock_get = self.patch_get.start()
@@ -26,4 +34,325 @@ class TestCheckBreach:
 
         # Then
         self.mock_get.assert_called_once_with(hashed_prefix, raw_text=True)
-        assert result == ["12345:5", "67890:10"]
+        assert result == frozenset({"12345", "67890"})
+
+    def test_check_breach_unavailable(self):
+        # Given
+        self.mock_get.return_value = None
+
+        # When
+        result = self.hibp_client.check_breach("ABCDE")
+
+        # Then
+        assert result is None
+
+    def test_check_breach_cached_in_memory(self):
+        # Given
+        self.mock_get.return_value = "12345:5"
+        self.hibp_client.check_breach("abcde")
+
+        # When
+        result = self.hibp_client.check_breach("ABCDE")
+
+        # Then
+        self.mock_get.assert_called_once_with("ABCDE", raw_text=True)
+        assert result == frozenset({"12345"})
+
+    def test_check_breach_cached_on_disk(self):
+        # Given
+        self.store.set("ABCDE", frozenset({"12345"}), time.time())
+
+        # When
+        result = self.hibp_client.check_breach("ABCDE")
+
+        # Then
+        self.mock_get.assert_not_called()
+        assert result == frozenset({"12345"})
+        assert self.cache.memory.get("ABCDE")[0] == frozenset({"12345"})
+
+    def test_check_breach_stale_refreshed_in_background(self):
+        # Given
+        self.cache.memory.set("ABCDE", (frozenset({"12345"}), time.time() - 120))
+        self.mock_get.return_value = "67890:1"
+        threads = []
+        refresh_in_background = self.cache.refresh_in_background
+
+        def refresh(*args):
+            threads.append(refresh_in_background(*args))
+
+        with patch.object(self.cache, "refresh_in_background", side_effect=refresh):
+            # When
+            result = self.hibp_client.check_breach("ABCDE")
+            threads[0].join()
+
+        # Then
+        assert result == frozenset({"12345"})
+        assert self.cache.get("ABCDE")[0] == frozenset({"67890"})
+        assert self.store.get("ABCDE")[0] == frozenset({"67890"})
+
+    def test_check_breach_expired(self):
+        # Given
+        self.cache.memory.set("ABCDE", (frozenset({"12345"}), time.time() - 7200))
+        self.mock_get.return_value = "67890:1"
+
+        # When
+        result = self.hibp_client.check_breach("ABCDE")
+
+        # Then
+        assert result == frozenset({"67890"})
+
+    def test_check_breach_expired_unavailable(self):
+        # Given
+        self.cache.memory.set("ABCDE", (frozenset({"12345"}), time.time() - 7200))
+        self.mock_get.return_value = None
+
+        # When
+        result = self.hibp_client.check_breach("ABCDE")
+
+        # Then
+        assert result == frozenset({"12345"})
+
+    def test_default_cache(self):
+        # When
+        hibp_client = HibpClient()
+
+        # Then
+        assert hibp_client.cache is RANGE_CACHE
+        assert not hibp_client.offline
+
+    def test_check_breach_offline(self, tmp_path):
+        # Given
+        hashed = hashlib.sha1(b"password").hexdigest().upper()
+        dump = tmp_path / "pwned.txt"
+        dump.write_text(f"{hashed}:42\n")
+        build_index(str(dump), str(tmp_path / "pwned.idx"))
+        index = PwnedIndex(str(tmp_path / "pwned.idx"))
+        hibp_client = HibpClient(cache=self.cache, index=index)
+
+        # When
+        with patch.object(hibp_client, "get") as mock_get:
+            result = hibp_client.check_breach(hashed[:5])
+
+        # Then
+        mock_get.assert_not_called()
+        assert hibp_client.offline
+        assert hashed[5:] in result
+        assert "0" * 35 not in result
+        index.close()
+
+
+class TestAsyncCheckBreach:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, tmp_path, http_stub):
+        self.http_stub = http_stub
+        self.cache = RangeCache(
+            RangeStore(str(tmp_path / "hibp.sqlite3")), max_size=10, ttl=60, max_stale=3600
+        )
+        with patch.dict(os.environ, {"HIBP_API_URL": f"{http_stub.url}/range/"}):
+            self.hibp_client = AsyncHibpClient(cache=self.cache)
+
+        self.patch_sleep = patch("adapters.async_http_client.asyncio.sleep")
+        self.patch_sleep.start()
+        request.addfinalizer(self.patch_sleep.stop)
+
+    def test_check_breach_success(self):
+        # Given
+        self.http_stub.queue(body=b"12345:5\r\n67890:10")
+
+        # When
+        result = asyncio.run(self.hibp_client.check_breach("abcde"))
+
+        # Then
+        assert self.http_stub.paths == ["/range/ABCDE"]
+        assert result == frozenset({"12345", "67890"})
+        assert self.cache.get("ABCDE")[0] == frozenset({"12345", "67890"})
+
+    def test_check_breach_unavailable(self):
+        # Given
+        for _ in range(3):
+            self.http_stub.queue(status=503)
+
+        # When
+        result = asyncio.run(self.hibp_client.check_breach("ABCDE"))
+
+        # Then
+        assert result is None
+
+    def test_check_breach_cached(self):
+        # Given
+        self.cache.set("ABCDE", frozenset({"12345"}))
+
+        # When
+        result = asyncio.run(self.hibp_client.check_breach("ABCDE"))
+
+        # Then
+        assert result == frozenset({"12345"})
+        assert not self.http_stub.paths
+
+    def test_check_breach_stale_refreshed_in_background(self):
+        # Given
+        self.cache.memory.set("ABCDE", (frozenset({"12345"}), time.time() - 120))
+        self.http_stub.queue(body=b"67890:1")
+
+        async def check_breach():
+            result = await self.hibp_client.check_breach("ABCDE")
+            duplicate = self.hibp_client.refresh_in_background("ABCDE")
+            await asyncio.gather(*self.hibp_client._refreshes)  # pylint: disable=protected-access
+            return result, duplicate
+
+        # When
+        result, duplicate = asyncio.run(check_breach())
+
+        # Then
+        assert result == frozenset({"12345"})
+        assert duplicate is None
+        assert self.cache.get("ABCDE")[0] == frozenset({"67890"})
+        assert self.http_stub.paths == ["/range/ABCDE"]
+
+    def test_check_breach_expired_unavailable(self):
+        # Given
+        self.cache.memory.set("ABCDE", (frozenset({"12345"}), time.time() - 7200))
+        self.http_stub.queue(status=404)
+
+        # When
+        result = asyncio.run(self.hibp_client.check_breach("ABCDE"))
+
+        # Then
+        assert result == frozenset({"12345"})
+
+    def test_check_breach_offline(self):
+        # Given
+        index = MagicMock()
+        hibp_client = AsyncHibpClient(cache=self.cache, index=index)
+
+        # When
+        result = asyncio.run(hibp_client.check_breach("abcde"))
+
+        # Then
+        assert hibp_client.offline
+        assert result is index.range.return_value
+        index.range.assert_called_once_with("abcde")
+        assert not self.http_stub.paths
+
+    def test_default_client(self):
+        # Then
+        assert async_hibp_client.cache is RANGE_CACHE
+        assert not async_hibp_client.offline
+
+
+class TestRangeCache:
+
+    def test_refresh_in_background_already_running(self):
+        # Given
+        cache = RangeCache(None, max_size=10, ttl=60, max_stale=3600)
+        fetch = MagicMock()
+        cache._refreshing.add("ABCDE")  # pylint: disable=protected-access
+
+        # When
+        thread = cache.refresh_in_background("ABCDE", fetch)
+
+        # Then
+        assert thread is None
+        fetch.assert_not_called()
+
+    def test_refresh_in_background_failure(self):
+        # Given
+        cache = RangeCache(None, max_size=10, ttl=60, max_stale=3600)
+        fetch = MagicMock(side_effect=RuntimeError)
+
+        # When
+        with patch("threading.excepthook"):
+            cache.refresh_in_background("ABCDE", fetch).join()
+
+        # Then
+        fetch.assert_called_once_with("ABCDE")
+        assert cache.refresh_in_background("ABCDE", MagicMock()) is not None
+
+    def test_memory_only(self):
+        # Given
+        cache = RangeCache(None, max_size=10, ttl=60, max_stale=3600)
+
+        # When
+        cache.set("ABCDE", frozenset({"12345"}))
+
+        # Then
+        assert cache.get("ABCDE")[0] == frozenset({"12345"})
+        assert cache.get("FFFFF") is None
+
+
+class TestRangeStore:
+
+    def test_get_missing(self, tmp_path):
+        # Given
+        store = RangeStore(str(tmp_path / "hibp.sqlite3"))
+
+        # Then
+        assert store.get("ABCDE") is None
+
+    def test_shared_between_instances(self, tmp_path):
+        # Given
+        path = str(tmp_path / "hibp.sqlite3")
+        RangeStore(path).set("ABCDE", frozenset({"12345", "67890"}), 42.0)
+
+        # When
+        entry = RangeStore(path).get("ABCDE")
+
+        # Then
+        assert entry == (frozenset({"12345", "67890"}), 42.0)
+
+    def test_unavailable_store(self, tmp_path):
+        # Given
+        store = RangeStore(str(tmp_path / "missing" / "hibp.sqlite3"))
+
+        # When
+        store.set("ABCDE", frozenset({"12345"}), 42.0)
+
+        # Then
+        assert store.get("ABCDE") is None
+
+    def test_corrupted_store(self, tmp_path):
+        # Given
+        path = tmp_path / "hibp.sqlite3"
+        path.write_bytes(b"not a database" * 100)
+        store = RangeStore(str(path))
+
+        # When
+        store.set("ABCDE", frozenset({"12345"}), 42.0)
+
+        # Then
+        assert store.get("ABCDE") is None
+
+    def test_created_private(self, tmp_path):
+        # Given
+        path = tmp_path / "hibp.sqlite3"
+
+        # When
+        RangeStore(str(path)).set("ABCDE", frozenset({"12345"}), 42.0)
+
+        # Then
+        assert path.stat().st_mode & 0o777 == 0o600
+
+    def test_shared_file_refused(self, tmp_path):
+        # Given
+        path = tmp_path / "hibp.sqlite3"
+        RangeStore(str(path)).set("ABCDE", frozenset({"12345"}), 42.0)
+        path.chmod(0o666)
+
+        # When
+        entry = RangeStore(str(path)).get("ABCDE")
+
+        # Then
+        assert entry is None
+
+    def test_other_owner_refused(self, tmp_path):
+        # Given
+        path = tmp_path / "hibp.sqlite3"
+        RangeStore(str(path)).set("ABCDE", frozenset({"12345"}), 42.0)
+
+        # When
+        with patch("adapters.hibp_client.os.getuid", return_value=os.getuid() + 1):
+            entry = RangeStore(str(path)).get("ABCDE")
+
+        # Then
+        assert entry is None
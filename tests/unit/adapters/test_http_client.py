@@ -3,7 +3,18 @@ from unittest.mock import MagicMock, patch
 import pytest
 import requests
 
-from adapters.http_client import HttpClient
+from adapters.http_client import HttpClient, RequestStats
+from tests.unit.testing_utils import get_free_port
+
+
+def build_response(status_code=200, payload=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = "text"
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    return response
 
 
 class TestGet:
@@ -13,16 +24,17 @@ class TestGet:
         self.base_url = "https://fake.url/"
         self.http_client = HttpClient(base_url=self.base_url)
 
-        self.patch_requests = patch("adapters.http_client.requests")
-        self.mock_requests = self.patch_requests.start()
-        request.addfinalizer(self.patch_requests.stop)
+        self.patch_request = patch.object(self.http_client.session, "request")
+        self.mock_request = self.patch_request.start()
+        request.addfinalizer(self.patch_request.stop)
+
+        self.patch_sleep = patch("adapters.http_client.time.sleep")
+        self.mock_sleep = self.patch_sleep.start()
+        request.addfinalizer(self.patch_sleep.stop)
 
     def test_get_success(self):
         # Given
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"message": "success"}
-        self.mock_requests.get.return_value = mock_response
+        self.mock_request.return_value = build_response(payload={"message": "success"})
 
         endpoint = "endpoint"
 
@@ -30,31 +42,116 @@ class TestGet:
         response = self.http_client.get(endpoint=endpoint)
 
         # Then
-        self.mock_requests.get.assert_called_once_with(
+        self.mock_request.assert_called_once_with(
+            "GET",
             "https://fake.url/endpoint",
+            timeout=5,
             params=None,
-            headers={},
-            timeout=5
+            headers={}
         )
         assert response == {"message": "success"}
 
+    def test_get_raw_text(self):
+        # Given
+        self.mock_request.return_value = build_response()
+
+        # When
+        response = self.http_client.get("endpoint", raw_text=True)
+
+        # Then
+        assert response == "text"
+
+    def test_get_invalid_json(self):
+        # Given
+        response = build_response()
+        response.json.side_effect = ValueError
+        self.mock_request.return_value = response
+
+        # When
+        result = self.http_client.get("endpoint")
+
+        # Then
+        assert result is None
+
     def test_get_failed(self):
         # Given
-        self.mock_requests.get.side_effect = requests.RequestException
+        self.mock_request.side_effect = requests.ConnectionError
         endpoint = "endpoint"
 
         # When
         response = self.http_client.get(endpoint=endpoint)
 
         # Then
-        self.mock_requests.get.assert_called_once_with(
-            "https://fake.url/endpoint",
-            params=None,
-            headers={},
-            timeout=5
-        )
+        assert self.mock_request.call_count == 3
+        assert self.mock_sleep.call_count == 2
         assert response is None
 
+    def test_get_retried_until_success(self):
+        # Given
+        self.mock_request.side_effect = [
+            requests.Timeout(),
+            build_response(503),
+            build_response(payload={"message": "success"}),
+        ]
+
+        # When
+        response = self.http_client.get("endpoint")
+
+        # Then
+        assert response == {"message": "success"}
+        assert self.http_client.stats.as_dict()["retries"] == 2
+
+    def test_get_client_error_not_retried(self):
+        # Given
+        self.mock_request.return_value = build_response(404)
+
+        # When
+        response = self.http_client.get("endpoint")
+
+        # Then
+        self.mock_request.assert_called_once()
+        self.mock_sleep.assert_not_called()
+        assert response is None
+
+    def test_get_invalid_url_not_retried(self):
+        # Given
+        self.mock_request.side_effect = requests.exceptions.InvalidURL
+
+        # When
+        response = self.http_client.get("endpoint")
+
+        # Then
+        self.mock_request.assert_called_once()
+        assert response is None
+
+    def test_get_retry_budget_exhausted(self):
+        # Given
+        self.http_client.retry_budget = 0
+        self.mock_request.side_effect = requests.ConnectionError
+
+        # When
+        response = self.http_client.get("endpoint")
+
+        # Then
+        self.mock_request.assert_called_once()
+        self.mock_sleep.assert_not_called()
+        assert response is None
+
+    def test_backoff(self):
+        # Given
+        self.http_client.backoff = 1
+        self.http_client.max_backoff = 3
+
+        # When
+        with patch("adapters.http_client.random.uniform", side_effect=lambda _, high: high):
+            delays = [
+                self.http_client._delay(attempt)  # pylint: disable=protected-access
+                for attempt in range(1, 5)
+            ]
+
+        # Then
+        assert delays == [1, 2, 3, 3]
+
 
 class TestPost:
 
@@ -63,16 +160,17 @@ class TestPost:
         self.base_url = "https://fake.url/"
         self.http_client = HttpClient(base_url=self.base_url)
 
-        self.patch_requests = patch("adapters.http_client.requests")
-        self.mock_requests = self.patch_requests.start()
-        request.addfinalizer(self.patch_requests.stop)
+        self.patch_request = patch.object(self.http_client.session, "request")
+        self.mock_request = self.patch_request.start()
+        request.addfinalizer(self.patch_request.stop)
+
+        self.patch_sleep = patch("adapters.http_client.time.sleep")
+        self.mock_sleep = self.patch_sleep.start()
+        request.addfinalizer(self.patch_sleep.stop)
 
     def test_post_success(self):
         # Given
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"message": "success"}
-        self.mock_requests.post.return_value = mock_response
+        self.mock_request.return_value = build_response(payload={"message": "success"})
 
         endpoint = "endpoint"
 
@@ -80,27 +178,156 @@ class TestPost:
         response = self.http_client.post(endpoint=endpoint)
 
         # Then
-        self.mock_requests.post.assert_called_once_with(
+        self.mock_request.assert_called_once_with(
+            "POST",
             "https://fake.url/endpoint",
+            timeout=5,
             json=None,
-            headers={},
-            timeout=5
+            headers={}
         )
         assert response == {"message": "success"}
 
+    def test_post_invalid_json(self):
+        # Given
+        response = build_response()
+        response.json.side_effect = ValueError
+        self.mock_request.return_value = response
+
+        # When
+        result = self.http_client.post("endpoint")
+
+        # Then
+        assert result is None
+
     def test_post_failed(self):
         # Given
-        self.mock_requests.post.side_effect = requests.RequestException
+        self.mock_request.side_effect = requests.RequestException
         endpoint = "endpoint"
 
         # When
         response = self.http_client.post(endpoint=endpoint)
 
         # Then
-        self.mock_requests.post.assert_called_once_with(
-            "https://fake.url/endpoint",
-            json=None,
-            headers={},
-            timeout=5
-        )
+        self.mock_request.assert_called_once()
+        assert response is None
+
+    def test_post_not_retried_once_sent(self):
+        # Given
+        self.mock_request.side_effect = [requests.ReadTimeout(), build_response(503)]
+
+        # When
+        response = self.http_client.post("endpoint")
+
+        # Then
+        self.mock_request.assert_called_once()
+        assert response is None
+
+    def test_post_retried_when_not_connected(self):
+        # Given
+        self.mock_request.side_effect = [
+            requests.ConnectTimeout(),
+            build_response(payload={"message": "success"}),
+        ]
+
+        # When
+        response = self.http_client.post("endpoint")
+
+        # Then
+        assert self.mock_request.call_count == 2
+        assert response == {"message": "success"}
+
+    def test_post_retried_when_refused(self):
+        # Given
+        http_client = HttpClient(f"http://127.0.0.1:{get_free_port()}/")
+
+        # When
+        response = http_client.post("endpoint")
+
+        # Then
+        http_client.close()
+        assert response is None
+        assert http_client.stats.as_dict()["retries"] == http_client.max_attempts - 1
+
+
+class TestRetry:
+
+    def test_post_not_retried_when_dropped(self, http_stub):
+        # Given
+        http_client = HttpClient(http_stub.url)
+        http_stub.queue(status=None)
+
+        # When
+        response = http_client.post("endpoint", data={"key": "value"})
+
+        # Then
+        http_client.close()
         assert response is None
+        assert http_stub.paths == ["/endpoint"]
+
+    def test_get_retried_when_dropped(self, http_stub):
+        # Given
+        http_client = HttpClient(http_stub.url)
+        http_stub.queue(status=None)
+
+        # When
+        response = http_client.get("endpoint")
+
+        # Then
+        http_client.close()
+        assert response == {"message": "success"}
+        assert http_stub.paths == ["/endpoint", "/endpoint"]
+
+
+class TestSession:
+
+    def test_connection_reused(self, http_stub):
+        # Given
+        http_client = HttpClient(http_stub.url)
+
+        # When
+        responses = [http_client.get("endpoint") for _ in range(3)]
+
+        # Then
+        http_client.close()
+        assert responses == [{"message": "success"}] * 3
+        assert len(http_stub.clients) == 1
+        assert http_client.stats.as_dict()["calls"] == 3
+
+
+class TestRequestStats:
+
+    def test_as_dict(self):
+        # Given
+        stats = RequestStats()
+
+        # When
+        empty = stats.as_dict()
+        stats.record(0.5, attempts=1, success=True)
+        stats.record(1.5, attempts=3, success=False)
+
+        # Then
+        assert empty["mean_time"] == 0.0
+        assert stats.as_dict() == {
+            "calls": 2,
+            "failures": 1,
+            "retries": 2,
+            "mean_time": 1.0,
+            "max_time": 1.5,
+        }
+
+    def test_reset(self, http_stub):
+        # Given
+        http_client = HttpClient(http_stub.url)
+        http_client.get("endpoint")
+        session = http_client.session
+
+        # When
+        http_client.reset()
+        response = http_client.get("endpoint")
+
+        # Then
+        http_client.close()
+        session.close()
+        assert http_client.session is not session
+        assert response == {"message": "success"}
+        assert len(http_stub.clients) == 2
@@ -0,0 +1,86 @@
+import hashlib
+
+import pytest
+
+from adapters.pwned_index import (HEADER, MAGIC, RECORDS_OFFSET, PwnedIndex,
+                                  build_index)
+
+
+def sha1(password):
+    return hashlib.sha1(password.encode()).hexdigest().upper()
+
+
+PASSWORDS = ["password", "123456", "azerty", "tempo", "letmein"]
+
+
+class TestPwnedIndex:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, tmp_path):
+        self.dump = tmp_path / "pwned.txt"
+        self.dump.write_text(
+            "".join(f"{sha1(password)}:{rank}\r\n" for rank, password in enumerate(PASSWORDS))
+            + f"{sha1('password')}:1\n"
+            + "not a hash\n"
+        )
+        self.path = str(tmp_path / "pwned.idx")
+        self.total = build_index(str(self.dump), self.path)
+        self.index = PwnedIndex(self.path)
+        request.addfinalizer(self.index.close)
+
+    def test_build_index(self):
+        # Then
+        assert self.total == len(PASSWORDS)
+        assert len(self.index) == len(PASSWORDS)
+
+    def test_contains(self):
+        # Then
+        for password in PASSWORDS:
+            assert bytes.fromhex(sha1(password)) in self.index
+        assert bytes.fromhex(sha1("correct horse battery staple")) not in self.index
+        assert b"short" not in self.index
+
+    def test_contains_same_bucket(self, tmp_path):
+        # Given
+        digests = [f"ABCD{value:036X}" for value in range(0, 700, 7)]
+        dump = tmp_path / "bucket.txt"
+        dump.write_text("".join(f"{digest}:1\n" for digest in reversed(digests)))
+        build_index(str(dump), str(tmp_path / "bucket.idx"))
+        index = PwnedIndex(str(tmp_path / "bucket.idx"))
+
+        # Then
+        for digest in digests:
+            assert bytes.fromhex(digest) in index
+        assert bytes.fromhex(f"ABCD{699:036X}") not in index
+        assert bytes.fromhex(f"ABCD{1:036X}") not in index
+        index.close()
+
+    def test_range(self):
+        # Given
+        hashed = sha1("azerty")
+
+        # When
+        result = self.index.range(hashed[:5].lower())
+
+        # Then
+        assert hashed[5:] in result
+        assert sha1("tempo")[5:] not in result
+        assert "not hexadecimal" not in result
+
+    def test_invalid_file(self, tmp_path):
+        # Given
+        path = tmp_path / "invalid.idx"
+        path.write_bytes(b"garbage")
+
+        # When
+        with pytest.raises(ValueError):
+            PwnedIndex(str(path))
+
+    def test_truncated_file(self, tmp_path):
+        # Given
+        path = tmp_path / "truncated.idx"
+        path.write_bytes(HEADER.pack(MAGIC, 10) + bytes(RECORDS_OFFSET - HEADER.size))
+
+        # When
+        with pytest.raises(ValueError):
+            PwnedIndex(str(path))
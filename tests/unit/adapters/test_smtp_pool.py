@@ -0,0 +1,251 @@
+import smtplib
+import threading
+from unittest.mock import patch
+
+import pytest
+from flask_mail import Message
+
+from adapters.smtp_pool import PooledConnection, SmtpPool
+from tests.unit.testing_utils import get_free_port, mail_state
+
+
+def build_message(subject="Hello"):
+    return Message(
+        subject,
+        sender="tempo@example.com",
+        recipients=["user@example.com"],
+        body="body"
+    )
+
+
+@pytest.mark.usefixtures("test_app")
+class TestSmtpPool:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, smtp_sink):
+        self.controller, self.handler = smtp_sink
+        self.pool = SmtpPool(
+            mail_state(self.controller.port),
+            max_size=2,
+            idle_timeout=60,
+            check_after=60
+        )
+        request.addfinalizer(self.pool.close)
+
+    def test_send_reuses_connection(self):
+        # When
+        self.pool.send(build_message("first"))
+        self.pool.send(build_message("second"))
+
+        # Then
+        assert len(self.handler.envelopes) == 2
+        assert self.pool.stats() == {
+            "opened": 1,
+            "reused": 1,
+            "handshakes_saved": 1,
+            "health_checks": 0,
+            "discarded": 0,
+            "idle": 1,
+            "in_use": 0,
+        }
+
+    def test_send_idle_timeout(self):
+        # Given
+        self.pool.idle_timeout = 0
+        self.pool.send(build_message())
+
+        # When
+        self.pool.send(build_message())
+
+        # Then
+        assert len(self.handler.envelopes) == 2
+        assert self.pool.opened == 2
+        assert self.pool.discarded == 1
+        assert self.pool.stats()["in_use"] == 0
+
+    def test_send_health_check(self):
+        # Given
+        self.pool.check_after = 0
+        self.pool.send(build_message())
+
+        # When
+        self.pool.send(build_message())
+
+        # Then
+        assert self.pool.health_checks == 1
+        assert self.pool.reused == 1
+        assert self.pool.opened == 1
+
+    def test_send_health_check_failed(self):
+        # Given
+        self.pool.check_after = 0
+        connection = self.pool.acquire()
+        connection.host.close()
+        self.pool.release(connection)
+
+        # When
+        self.pool.send(build_message())
+
+        # Then
+        assert len(self.handler.envelopes) == 1
+        assert self.pool.stats()["in_use"] == 0
+        assert self.pool.health_checks == 1
+        assert self.pool.discarded == 1
+        assert self.pool.opened == 2
+
+    def test_send_reconnect_when_disconnected(self):
+        # Given
+        self.pool.send(build_message())
+        connection = self.pool.acquire()
+        connection.host.close()
+        self.pool.release(connection)
+
+        # When
+        self.pool.send(build_message())
+
+        # Then
+        assert len(self.handler.envelopes) == 2
+        assert self.pool.discarded == 1
+        assert self.pool.opened == 2
+        assert self.pool.stats()["in_use"] == 0
+
+    def test_send_disconnected_on_new_connection(self):
+        # Given
+        with patch.object(
+                PooledConnection,
+                "send",
+                side_effect=smtplib.SMTPServerDisconnected("closed")
+        ):
+            # When
+            with pytest.raises(smtplib.SMTPServerDisconnected):
+                self.pool.send(build_message())
+
+        # Then
+        assert self.pool.stats()["in_use"] == 0
+        assert self.pool.discarded == 1
+
+    def test_send_refused_keeps_connection(self):
+        # Given
+        with patch.object(
+                PooledConnection,
+                "send",
+                side_effect=smtplib.SMTPRecipientsRefused({})
+        ):
+            # When
+            with pytest.raises(smtplib.SMTPRecipientsRefused):
+                self.pool.send(build_message())
+
+        # Then
+        assert self.pool.stats()["idle"] == 1
+        assert self.pool.discarded == 0
+
+    def test_send_socket_error_drops_connection(self):
+        # Given
+        with patch.object(PooledConnection, "send", side_effect=TimeoutError):
+            # When
+            with pytest.raises(TimeoutError):
+                self.pool.send(build_message())
+
+        # Then
+        assert self.pool.stats()["idle"] == 0
+        assert self.pool.discarded == 1
+
+    def test_send_invalid_message_keeps_connection(self):
+        # When
+        with pytest.raises(AssertionError):
+            self.pool.send(Message("Hello", sender="tempo@example.com"))
+
+        # Then
+        assert self.pool.stats()["idle"] == 1
+
+    def test_send_server_unavailable(self):
+        # Given
+        pool = SmtpPool(mail_state(get_free_port()))
+
+        # When
+        with pytest.raises(ConnectionRefusedError):
+            pool.send(build_message())
+
+        # Then
+        assert pool.stats()["in_use"] == 0
+        assert pool.opened == 0
+
+    def test_acquire_waits_for_release(self):
+        # Given
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(self.pool.acquire()))
+        thread.start()
+
+        # When
+        thread.join(timeout=0.1)
+        waiting = not acquired
+        self.pool.release(first)
+        thread.join(timeout=5)
+
+        # Then
+        assert waiting
+        assert acquired == [first]
+        self.pool.release(second)
+        self.pool.release(first)
+
+    def test_acquire_timeout(self):
+        # Given
+        self.pool.acquire_timeout = 0.01
+        connections = [self.pool.acquire(), self.pool.acquire()]
+
+        # When
+        with pytest.raises(TimeoutError):
+            self.pool.acquire()
+
+        # Then
+        for connection in connections:
+            self.pool.release(connection)
+        assert self.pool.stats()["idle"] == 2
+
+    def test_close(self):
+        # Given
+        self.pool.send(build_message())
+
+        # When
+        self.pool.close()
+
+        # Then
+        assert self.pool.stats()["idle"] == 0
+
+    def test_suppressed_send(self):
+        # Given
+        pool = SmtpPool(mail_state(get_free_port(), MAIL_SUPPRESS_SEND=True), check_after=0)
+
+        # When
+        pool.send(build_message())
+        pool.send(build_message())
+        pool.close()
+
+        # Then
+        assert pool.reused == 1
+        assert pool.health_checks == 1
+
+
+class TestPooledConnection:
+
+    def test_close_already_disconnected(self, smtp_sink):
+        # Given
+        controller, _ = smtp_sink
+        connection = PooledConnection(mail_state(controller.port))
+        connection.open()
+        connection.host.close()
+
+        # When
+        connection.close()
+
+        # Then
+        assert connection.host is None
+
+    def test_is_alive_not_opened(self):
+        # Given
+        connection = PooledConnection(mail_state(25))
+
+        # Then
+        assert not connection.is_alive()
@@ -1,14 +1,18 @@
 import json
+import threading
 import uuid
 from datetime import datetime
 
 import pytest
+from aiosmtpd.controller import Controller
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 from app import app
 from core.models import Connection, ConnectionStatusEnum, Token
 from core.models.user import StatusEnum, User
 from extensions import db
+from tests.unit.testing_utils import (SmtpSinkHandler, StubHttpServer,
+                                      get_free_port)
 
 
 @pytest.fixture(scope="module")
@@ -87,3 +91,28 @@ def token(user):
         value=str(uuid.uuid4()),
         is_active=True
     )
+
+
+@pytest.fixture
+def smtp_sink():
+    """
+    Fixture to run a local SMTP server keeping the received messages
+    """
+    handler = SmtpSinkHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=get_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def http_stub():
+    """
+    Fixture to run a local HTTP server answering the queued responses
+    """
+    server = StubHttpServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -1,11 +1,15 @@
 import os
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 
 import pytest
 from sqlalchemy.exc import SQLAlchemyError
 
 from adapters.hibp_client import HibpClient
-from controllers.health_controller import health_check
+from app import app
+from authentication import JWT_CACHE
+from controllers import health_controller
+from controllers.health_controller import (build_health_monitor, health_check,
+                                           liveness_check)
 
 
 @pytest.mark.usefixtures("session")
@@ -19,23 +23,67 @@ class TestHealthCheck:
 
         os.environ["HIPB_API_URL"] = "fake_url/"
 
-        self.patch_hibp = patch.object(HibpClient, "check_breach")
+        self.patch_hibp = patch.object(HibpClient, "fetch_range")
         self.mock_hibp = self.patch_hibp.start()
         request.addfinalizer(self.patch_hibp.stop)
 
+        self.monitor = build_health_monitor()
+        self.monitor.interval = 3600
+        self.patch_monitor = patch.object(health_controller, "health_monitor", self.monitor)
+        self.patch_monitor.start()
+        request.addfinalizer(self.patch_monitor.stop)
+        request.addfinalizer(self.monitor.stop)
+
     def test_health_check_success(self):
         # Given
-        mock_response = Mock()
-        mock_response.status_code = 200
-        self.mock_hibp.return_value = mock_response
+        self.mock_hibp.return_value = frozenset({"0005AD76BD555C1D6D771DE417A4B87E4B4"})
+        self.mock_core.health.select_1.return_value = True
+
+        # When
+        response, status_code = health_check()
+
+        # Then
+        assert status_code == 200
+        assert response["message"] == "API is UP"
+        assert set(response["dependencies"]) == {"database", "hibp"}
+        for status in response["dependencies"].values():
+            assert status["healthy"]
+            assert status["latency_ms"] is not None
+            assert status["last_success"] == status["last_check"]
+        self.mock_core.health.select_1.assert_called_once_with()
+        self.mock_hibp.assert_called_once_with("00000")
+
+    def test_health_check_cache_stats(self, request):
+        # Given
         self.mock_core.health.select_1.return_value = True
+        self.mock_core.user.cache.stats.return_value = {
+            "hits": 3, "misses": 1, "size": 1, "max_size": 1024
+        }
+        JWT_CACHE.clear()
+        request.addfinalizer(JWT_CACHE.clear)
+        JWT_CACHE.get("digest")
+
+        # When
+        response, _ = health_check()
+
+        # Then
+        assert response["caches"] == {
+            "jwt": JWT_CACHE.stats(),
+            "user_snapshots": {"hits": 3, "misses": 1, "size": 1, "max_size": 1024},
+        }
+        assert response["caches"]["jwt"]["misses"] == 1
+
+    def test_health_check_cached(self):
+        # Given
+        self.mock_hibp.return_value = frozenset()
+        health_check()
 
         # When
         response, status_code = health_check()
 
         # Then
         assert status_code == 200
-        assert response == {"message": "API is UP"}
+        assert response["message"] == "API is UP"
         self.mock_core.health.select_1.assert_called_once_with()
         self.mock_hibp.assert_called_once_with("00000")
 
@@ -48,15 +96,14 @@ class TestHealthCheck:
 
         # Then
         assert status_code == 500
-        assert response == {
-            "error": "API is DEGRADED, database not accessible"
-        }
+        assert response["error"] == "API is DEGRADED, database not accessible"
+        assert not response["dependencies"]["database"]["healthy"]
+        assert response["dependencies"]["database"]["last_success"] is None
         self.mock_core.health.select_1.assert_called_once_with()
-        self.mock_hibp.assert_not_called()
 
     def test_health_check_hipb_failure(self):
         # Given
-        self.mock_hibp.side_effect = RuntimeError()
+        self.mock_hibp.return_value = None
         self.mock_core.health.select_1.return_value = True
 
         # When
@@ -64,8 +111,44 @@ class TestHealthCheck:
 
         # Then
         assert status_code == 500
-        assert response == {
-            "error": "API is DEGRADED, subj-ascent HIBP not accessible"
-        }
+        assert response["error"] == "API is DEGRADED, subj-ascent HIBP not accessible"
+        assert response["dependencies"]["database"]["healthy"]
         self.mock_core.health.select_1.assert_called_once_with()
         self.mock_hibp.assert_called_once_with("00000")
+
+    def test_health_check_offline_index(self):
+        # Given
+        self.mock_core.health.select_1.return_value = True
+
+        # When
+        with patch.object(HibpClient, "offline", True):
+            response, status_code = health_check()
+
+        # Then
+        assert status_code == 200
+        assert response["message"] == "API is UP"
+        self.mock_hibp.assert_not_called()
+
+
+class TestLivenessCheck:
+
+    def test_liveness_check(self):
+        # When
+        with patch.object(health_controller, "health_monitor") as mock_monitor:
+            response, status_code = liveness_check()
+
+        # Then
+        assert status_code == 200
+        assert response == {"message": "API is ALIVE"}
+        mock_monitor.ensure_started.assert_not_called()
+
+    @pytest.mark.usefixtures("test_app")
+    def test_liveness_route(self):
+        # When
+        with patch.object(health_controller, "health_monitor") as mock_monitor:
+            response = app.test_client().get("/health/live")
+
+        # Then
+        assert response.status_code == 200
+        assert response.json() == {"message": "API is ALIVE"}
+        mock_monitor.ensure_started.assert_not_called()
@@ -10,13 +10,18 @@ import jwt
 import pytest
 from freezegun import freeze_time
 
-from controllers.security_controller import (check_user, forgotten_password,
-                                             get_last_valid_allow_conn,
+from controllers.security_controller import (catalog_etag, check_user,
+                                             forgotten_password,
                                              get_question_by_id, get_questions,
-                                             get_random_list, refresh_token,
+                                             get_random_list,
+                                             is_forgotten_password_allowed,
+                                             question_etag, refresh_token,
                                              validate_connection)
 from core.models import (Connection, ConnectionStatusEnum, Question,
-                         StatusEnum, UserQuestion)
+                         StatusEnum, UserLoginState, UserQuestion)
+from core.services.question import QuestionCatalog
+from core.services.user import UserSnapshot
+from utils.http_cache import make_etag
 
 
 @pytest.mark.usefixtures("session")
@@ -28,35 +33,46 @@ class TestGetQuestions:
         self.mock_core = self.patch_core.start()
         request.addfinalizer(self.patch_core.stop)
 
-    def test_get_questions(self):
-        # Given
-        question1 = Question(id=1, question="Question1 ?")
-        question2 = Question(id=2, question="Question2 ?")
-        self.mock_core.question.get_all.return_value = [question1, question2]
+        self.question1 = Question(id=1, question="Question1 ?")
+        self.question2 = Question(id=2, question="Question2 ?")
+        self.catalog = QuestionCatalog.from_rows(1, [self.question1, self.question2])
+        self.mock_core.question.get_catalog.return_value = self.catalog
 
+    def test_get_questions(self):
         # When
-        response, status_code = get_questions()
+        response, status_code, headers = get_questions()
 
         # Then
         assert status_code == 200
         assert isinstance(response, dict)
         assert "questions" in response
-        assert response["questions"] == [question1.to_dict(), question2.to_dict()]
-        self.mock_core.question.get_all.assert_called_with()
+        assert response["questions"] == [self.question1.to_dict(), self.question2.to_dict()]
+        assert headers == {
+            "ETag": f'"{self.catalog.etag}"',
+            "Cache-Control": "public, max-age=300",
+        }
+        self.mock_core.question.get_catalog.assert_called_with()
+        self.mock_core.question.get_all.assert_not_called()
 
     def test_get_questions_empty_output(self):
         # Given
-        self.mock_core.question.get_all.return_value = []
+        self.mock_core.question.get_catalog.return_value = QuestionCatalog.from_rows(1, [])
 
         # When
-        response, status_code = get_questions()
+        response, status_code, _ = get_questions()
 
         # Then
         assert status_code == 200
         assert isinstance(response, dict)
         assert "questions" in response
         assert response["questions"] == []
-        self.mock_core.question.get_all.assert_called_with()
+
+    def test_catalog_etag(self):
+        # When
+        etag = catalog_etag()
+
+        # Then
+        assert etag == self.catalog.etag
 
 
 @pytest.mark.usefixtures("session")
@@ -68,19 +84,51 @@ class TestGetQuestionById:
         self.mock_core = self.patch_core.start()
         request.addfinalizer(self.patch_core.stop)
 
+        self.question = Question(id=1, question="Question1 ?")
+        self.mock_core.question.get_catalog.return_value = QuestionCatalog.from_rows(
+            1, [self.question]
+        )
+
     def test_get_question_by_id(self):
         # Given
-        question = Question(id=1, question="Question1 ?")
-        kwargs = {"questionId": question.id}
-        self.mock_core.question.get_by_id.return_value = question
+        kwargs = {"questionId": self.question.id}
 
         # When
-        response, status_code = get_question_by_id(**kwargs)
+        response, status_code, headers = get_question_by_id(**kwargs)
 
         # Then
         assert status_code == 200
         assert isinstance(response, dict)
         assert "question" in response
+        assert response["question"] == self.question.to_dict()
+        assert headers["ETag"] == f'"{make_etag(self.question.to_dict())}"'
+        self.mock_core.question.get_by_id.assert_not_called()
+
+    def test_question_etag(self):
+        # When
+        etag = question_etag(questionId=self.question.id)
+
+        # Then
+        assert etag == make_etag(self.question.to_dict())
+
+    def test_question_etag_not_in_catalog(self):
+        # When
+        etag = question_etag(questionId=2)
+
+        # Then
+        assert etag is None
+
+    def test_get_question_by_id_not_in_catalog(self):
+        # Given
+        question = Question(id=2, question="Question2 ?")
+        kwargs = {"questionId": question.id}
+        self.mock_core.question.get_by_id.return_value = question
+
+        # When
+        response, status_code, _ = get_question_by_id(**kwargs)
+
+        # Then
+        assert status_code == 200
         assert response["question"] == question.to_dict()
         self.mock_core.question.get_by_id.assert_called_with(question.id)
 
@@ -128,7 +176,6 @@ class TestRandomList:
         kwargs = {"number": number}
 
         random_list = [self.question4.to_dict(), self.question2.to_dict(), self.question3.to_dict()]
-        self.mock_core.question.get_all.return_value = self.question_list
         self.mock_core.question.get_random_questions.return_value = random_list
 
         # When
@@ -139,7 +186,6 @@ class TestRandomList:
         assert isinstance(response, dict)
         assert "questions" in response
         assert response["questions"] == random_list
-        self.mock_core.question.get_all.assert_called_with()
         self.mock_core.question.get_random_questions.assert_called_with(number)
 
     def test_get_random_list_invalid_number(self):
@@ -147,7 +193,7 @@ class TestRandomList:
         number = len(self.question_list) + 1
         kwargs = {"number": number}
 
-        self.mock_core.question.get_all.return_value = self.question_list
+        self.mock_core.question.get_random_questions.return_value = None
 
         # When
         response, status_code = get_random_list(**kwargs)
@@ -157,8 +203,7 @@ class TestRandomList:
         assert isinstance(response, dict)
         assert "message" in response
         assert response["message"] == "Length ask is above database length"
-        self.mock_core.question.get_all.assert_called_with()
-        self.mock_core.question.get_random_questions.assert_not_called()
+        self.mock_core.question.get_random_questions.assert_called_with(number)
 
 
 @pytest.mark.usefixtures("session")
@@ -194,7 +239,7 @@ class TestCheckUser:
     def test_check_user_basic_auth(self, user, token):
         # Given
         self.mock_g.auth_type = "Basic"
-        self.mock_core.user.get_instance_by_key.return_value = user
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(user)
         self.mock_core.token.create.return_value = token
         kwargs = {
             "user": user.username
@@ -213,7 +258,7 @@ class TestCheckUser:
         assert call_kwargs["expiration_date"] == datetime.now() + timedelta(days=10)
         assert isinstance(call_kwargs["value"], str)
         assert call_kwargs["is_active"]
-        self.mock_core.user.get_instance_by_key.assert_called_once_with(username=user.username)
+        self.mock_core.user.get_snapshot_by_username.assert_called_once_with(user.username)
         self.mock_jwt.encode.assert_called_once_with({
             "username": user.username,
             "exp": datetime.now() + timedelta(minutes=30)
@@ -352,32 +397,7 @@ class TestValidateConnection:
             status=ConnectionStatusEnum.SUSPICIOUS
         )
 
-        connection4 = Connection(
-            id=4,
-            user_id=user.id,
-            date=datetime(2025, 5, 4, 17, 45),
-            device="Windows PC",
-            ip_address="10.0.0.1",
-            output="Account locked",
-            status=ConnectionStatusEnum.VALIDATION_FAILED
-        )
-
-        connection5 = Connection(
-            id=5,
-            user_id=user.id,
-            date=datetime(2025, 5, 5, 12, 0),
-            device="Android Phone",
-            ip_address="172.16.0.2",
-            output="Login failed: timeout",
-            status=ConnectionStatusEnum.VALIDATED
-        )
-
         self.connection_main.status = ConnectionStatusEnum.VALIDATION_FAILED
-        self.connection_failed_list = [
-            self.connection_main,
-            connection4,
-            connection5
-        ]
 
         self.pepper = "pepper"
         os.environ["PEPPER"] = self.pepper
@@ -603,10 +623,13 @@ class TestValidateConnection:
         self.connection_main.output = json.dumps({"question": self.question_text})
         self.mock_core.connection.get_list_by_key.side_effect = [
             [self.connection_main],
-            [],
-            self.connection_failed_list
+            []
         ]
         self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user_login_state.get_by_id.return_value = UserLoginState(
+            user_id=self.user.id,
+            validation_failed_count=2
+        )
         answer = "invalid"
         kwargs = {
             "validationId": self.connection_main.id,
@@ -620,13 +643,8 @@ class TestValidateConnection:
         # Then
         assert status_code == 403
         assert response["message"] == "Provided answer does not match"
-        last_call_args = self.mock_core.connection.get_list_by_key.call_args_list[2]
-        assert last_call_args == mock.call(
-            order_by=Connection.date,
-            limit=3,
-            order="desc",
-            user_id=self.user.id
-        )
+        self.mock_core.user_login_state.get_by_id.assert_called_once_with(self.user.id)
+        self.mock_core.user.update.assert_not_called()
         self.mock_core.connection.create.assert_called_with(
             user_id=self.user.id,
             date=datetime.now(),
@@ -639,10 +657,10 @@ class TestValidateConnection:
         self.connection_main.output = json.dumps({"question": self.question_text})
         self.mock_core.connection.get_list_by_key.side_effect = [
             [self.connection_main],
-            [],
             []
         ]
         self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user_login_state.get_by_id.return_value = None
         answer = "invalid"
         kwargs = {
             "validationId": self.connection_main.id,
@@ -656,13 +674,8 @@ class TestValidateConnection:
         # Then
         assert status_code == 403
         assert response["message"] == "Provided answer does not match"
-        last_call_args = self.mock_core.connection.get_list_by_key.call_args_list[2]
-        assert last_call_args == mock.call(
-            order_by=Connection.date,
-            limit=3,
-            order="desc",
-            user_id=self.user.id
-        )
+        self.mock_core.user_login_state.get_by_id.assert_called_once_with(self.user.id)
+        self.mock_core.user.update.assert_not_called()
         self.mock_core.connection.create.assert_called_with(
             user_id=self.user.id,
             date=datetime.now(),
@@ -673,13 +686,15 @@ class TestValidateConnection:
     def test_validate_connection_max_errors(self):
         # Given
         self.connection_main.output = json.dumps({"question": self.question_text})
-        self.connection_failed_list[2].status = ConnectionStatusEnum.VALIDATION_FAILED
         self.mock_core.connection.get_list_by_key.side_effect = [
             [self.connection_main],
-            [],
-            self.connection_failed_list
+            []
         ]
         self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user_login_state.get_by_id.return_value = UserLoginState(
+            user_id=self.user.id,
+            validation_failed_count=3
+        )
         answer = "invalid"
         kwargs = {
             "validationId": self.connection_main.id,
@@ -740,45 +755,21 @@ class TestForgottenPassword:
         )
         self. user.questions = [user_question]
 
-        self.last_conn = Connection(
-            id=99,
-            user_id=user.id,
-            date=datetime.now() - timedelta(minutes=4, seconds=30),
-            device="iPhone",
-            ip_address="1.2.3.4",
-            output="",
-            status=ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD
-        )
-
-        self.failed_conn = Connection(
-            id=100,
+        self.login_state = UserLoginState(
             user_id=user.id,
-            date=datetime.now() - timedelta(minutes=4, seconds=30),
-            device="iPhone",
-            ip_address="1.2.3.4",
-            output="",
-            status=ConnectionStatusEnum.VALIDATION_FAILED
+            last_date=datetime.now() - timedelta(minutes=4, seconds=30),
+            last_status=ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD,
+            last_attempt_status=ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD,
+            validation_failed_count=0
         )
 
     @freeze_time(datetime.now())
-    @pytest.mark.parametrize(
-        "connections_list",
-        [
-            pytest.param(
-                lambda self: [self.last_conn],
-                id="single_valid_connection"
-            ),
-            pytest.param(
-                lambda self: [self.failed_conn, self.failed_conn, self.last_conn],
-                id="failed_then_valid_connection"
-            ),
-        ]
-    )
-    @freeze_time(datetime.now())
-    def test_forgotten_password(self, connections_list):
+    @pytest.mark.parametrize("validation_failed_count", [0, 2])
+    def test_forgotten_password(self, validation_failed_count):
         # Given
         self.mock_core.user.get_instance_by_key.return_value = self.user
-        self.mock_core.connection.get_list_by_key.return_value = connections_list(self)
+        self.login_state.validation_failed_count = validation_failed_count
+        self.mock_core.user_login_state.get_by_id.return_value = self.login_state
         kwargs = {"username": self.user.username}
 
         # When
@@ -788,19 +779,15 @@ class TestForgottenPassword:
         assert status_code == 200
         assert response["message"] == "Demand validated, an email has been sent to the user"
         self.mock_core.user.get_instance_by_key.assert_called_once_with(username=self.user.username)
-        self.mock_core.connection.get_list_by_key.assert_called_once_with(
-            order_by=Connection.date,
-            limit=5,
-            order="desc",
-            user_id=self.user.id
-        )
+        self.mock_core.user_login_state.get_by_id.assert_called_once_with(self.user.id)
+        self.mock_core.connection.get_list_by_key.assert_not_called()
         self.mock_email.assert_called_once_with(self.user)
 
     @freeze_time(datetime.now())
     def test_forgotten_password_creates_connection(self):
         # Given
         self.mock_core.user.get_instance_by_key.return_value = self.user
-        self.mock_core.connection.get_list_by_key.return_value = []
+        self.mock_core.user_login_state.get_by_id.return_value = None
 
         mock_create = self.mock_core.connection.create
         mock_create.return_value.id = 123
@@ -840,16 +827,10 @@ class TestForgottenPassword:
     def test_forgotten_password_error_connection_status(self, status):
         # Given
         self.mock_core.user.get_instance_by_key.return_value = self.user
-        last_conn = Connection(
-            id=99,
-            user_id=self.user.id,
-            date=datetime.now() - timedelta(minutes=5),
-            device="iPhone",
-            ip_address="1.2.3.4",
-            output="",
-            status=status
-        )
-        self.mock_core.connection.get_list_by_key.return_value = [last_conn]
+        self.login_state.last_date = datetime.now() - timedelta(minutes=5)
+        self.login_state.last_status = status
+        self.login_state.last_attempt_status = status
+        self.mock_core.user_login_state.get_by_id.return_value = self.login_state
 
         mock_create = self.mock_core.connection.create
         mock_create.return_value.id = 123
@@ -887,71 +868,59 @@ class TestForgottenPassword:
         assert response["message"] == "User unknown_user not found"
 
 
-class TestGetLastValidAllowConn:
+class TestIsForgottenPasswordAllowed:
     @pytest.fixture(autouse=True)
     def setup_method(self, user):
-        self.user = user
-
-    def test_get_last_valid_conn(self):
-        # Given
-        last_conn = Connection(
-            id=99,
-            user_id=self.user.id,
-            date=datetime.now() - timedelta(minutes=4, seconds=30),
-            device="iPhone",
-            ip_address="1.2.3.4",
-            output="",
-            status=ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD
+        self.login_state = UserLoginState(
+            user_id=user.id,
+            last_date=datetime.now() - timedelta(minutes=4, seconds=30),
+            last_status=ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD,
+            last_attempt_status=ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD,
+            validation_failed_count=0
         )
 
+    def test_is_forgotten_password_allowed(self):
         # When
-        result = get_last_valid_allow_conn([last_conn])
+        result = is_forgotten_password_allowed(self.login_state)
 
         # Then
-        assert result == last_conn
+        assert result
 
-    def test_get_last_valid_conn_invalid_status(self):
+    def test_is_forgotten_password_allowed_invalid_status(self):
         # Given
-        last_conn = Connection(
-            id=99,
-            user_id=self.user.id,
-            date=datetime.now() - timedelta(minutes=4, seconds=30),
-            device="iPhone",
-            ip_address="1.2.3.4",
-            output="",
-            status=ConnectionStatusEnum.SUSPICIOUS
-        )
+        self.login_state.last_attempt_status = ConnectionStatusEnum.SUSPICIOUS
 
         # When
-        result = get_last_valid_allow_conn([last_conn])
+        result = is_forgotten_password_allowed(self.login_state)
 
         # Then
         assert not result
 
-    def test_get_last_valid_conn_failed_before(self):
+    def test_is_forgotten_password_allowed_failed_after(self):
         # Given
-        last_conn = Connection(
-            id=99,
-            user_id=self.user.id,
-            date=datetime.now() - timedelta(minutes=4, seconds=30),
-            device="iPhone",
-            ip_address="1.2.3.4",
-            output="",
-            status=ConnectionStatusEnum.ALLOW_FORGOTTEN_PASSWORD
-        )
+        self.login_state.last_status = ConnectionStatusEnum.VALIDATION_FAILED
+        self.login_state.validation_failed_count = 4
 
-        failed_conn = Connection(
-            id=99,
-            user_id=self.user.id,
-            date=datetime.now() - timedelta(minutes=4, seconds=30),
-            device="iPhone",
-            ip_address="1.2.3.4",
-            output="",
-            status=ConnectionStatusEnum.VALIDATION_FAILED
-        )
+        # When
+        result = is_forgotten_password_allowed(self.login_state)
+
+        # Then
+        assert result
+
+    def test_is_forgotten_password_allowed_too_many_failures(self):
+        # Given
+        self.login_state.last_status = ConnectionStatusEnum.VALIDATION_FAILED
+        self.login_state.validation_failed_count = 5
 
         # When
-        result = get_last_valid_allow_conn([failed_conn, last_conn])
+        result = is_forgotten_password_allowed(self.login_state)
 
         # Then
-        assert result == last_conn
+        assert not result
+
+    def test_is_forgotten_password_allowed_no_state(self):
+        # When
+        result = is_forgotten_password_allowed(None)
+
+        # Then
+        assert not result
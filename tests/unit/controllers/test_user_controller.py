@@ -1,20 +1,23 @@
 import hashlib
 import json
 import os
-import smtplib
 from unittest.mock import call, patch
 
 import pytest
+from sqlalchemy.exc import IntegrityError
 
 from adapters.hibp_client import HibpClient
-from controllers.user_controller import (generate_salt, generate_substrings,
+from controllers.user_controller import (export_users, generate_salt,
+                                         generate_substrings,
                                          get_user_by_username,
                                          get_user_details, get_user_info,
                                          get_users, post_users, reset_password)
-from core.models import Question
+from core.models import EmailKindEnum, Question
 from core.models.role import Role, RoleEnum
 from core.models.user import StatusEnum, User
+from core.services.user import UserSnapshot
 from tests.unit.testing_utils import generate_password
+from utils.pagination import decode_cursor, encode_cursor
 
 
 @pytest.mark.usefixtures("session")
@@ -42,7 +45,7 @@ class TestGetUsers:
     def test_get_questions(self):
         # Given
         user_list = [self.user1, self.user2]
-        self.mock_core.user.get_all.return_value = user_list
+        self.mock_core.user.get_page.return_value = user_list
 
         # When
         response, status_code = get_users()
@@ -52,12 +55,13 @@ class TestGetUsers:
         assert isinstance(response, dict)
         assert "users" in response
         assert response["users"] == [self.user1.to_dict(), self.user2.to_dict()]
-        self.mock_core.user.get_all.assert_called_with()
+        assert response["next_cursor"] is None
+        self.mock_core.user.get_page.assert_called_with(51, None, ["id", "username"])
 
     def test_get_questions_with_status(self):
         # Given
         user_list = [self.user1, self.user2]
-        self.mock_core.user.get_list_by_key.return_value = user_list
+        self.mock_core.user.get_page.return_value = user_list
         kwargs = {
             "status": StatusEnum.READY
         }
@@ -70,7 +74,110 @@ class TestGetUsers:
         assert isinstance(response, dict)
         assert "users" in response
         assert response["users"] == [self.user1.to_dict(), self.user2.to_dict()]
-        self.mock_core.user.get_list_by_key.assert_called_with(status=StatusEnum.READY)
+        self.mock_core.user.get_page.assert_called_with(
+            51, None, ["id", "username"], status=StatusEnum.READY
+        )
+
+    def test_get_users_next_page(self):
+        # Given
+        self.mock_core.user.get_page.return_value = [self.user1, self.user2]
+
+        # When
+        response, status_code = get_users(limit=1)
+
+        # Then
+        assert status_code == 200
+        assert response["users"] == [self.user1.to_dict()]
+        assert decode_cursor(response["next_cursor"]) == {"id": self.user1.id}
+        self.mock_core.user.get_page.assert_called_with(2, None, ["id", "username"])
+
+    def test_get_users_with_cursor(self):
+        # Given
+        self.mock_core.user.get_page.return_value = [self.user2]
+        cursor = encode_cursor({"id": 1})
+
+        # When
+        response, status_code = get_users(limit=1, cursor=cursor)
+
+        # Then
+        assert status_code == 200
+        assert response == {"users": [self.user2.to_dict()], "next_cursor": None}
+        self.mock_core.user.get_page.assert_called_with(2, 1, ["id", "username"])
+
+    def test_get_users_invalid_cursor(self):
+        # When
+        response, status_code = get_users(cursor="invalid")
+
+        # Then
+        assert status_code == 400
+        assert response == {"message": "Invalid cursor"}
+        self.mock_core.user.get_page.assert_not_called()
+
+
+@pytest.mark.usefixtures("session")
+class TestExportUsers:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, user):
+        self.patch_core = patch("controllers.user_controller.tempo_core")
+        self.mock_core = self.patch_core.start()
+        request.addfinalizer(self.patch_core.stop)
+
+        self.user = user
+        self.user.roles = [Role(id=2, name=RoleEnum.ADMIN)]
+
+    def test_export_users(self, test_app):
+        # Given
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(
+            self.user
+        )
+        self.mock_core.user.stream_rows.return_value = iter([
+            [(1, "first", "first@email.com", "0102030405", StatusEnum.READY),
+             (2, "second", "second@email.com", "0602030405", StatusEnum.CHECKING_EMAIL)],
+            [(3, "third", "third@email.com", "0702030405", StatusEnum.BANNED)],
+        ])
+
+        # When
+        with test_app.test_request_context():
+            response = export_users(user=self.user.username)
+            chunks = list(response.iter_encoded())
+
+        # Then
+        assert response.mimetype == "application/x-ndjson"
+        assert len(chunks) == 2
+        lines = "".join(chunk.decode() for chunk in chunks).splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {
+                "id": 1, "username": "first", "email": "first@email.com",
+                "phone": "0102030405", "status": "READY"
+            },
+            {
+                "id": 2, "username": "second", "email": "second@email.com",
+                "phone": "0602030405", "status": "CHECKING_EMAIL"
+            },
+            {
+                "id": 3, "username": "third", "email": "third@email.com",
+                "phone": "0702030405", "status": "BANNED"
+            },
+        ]
+        self.mock_core.user.stream_rows.assert_called_once_with(
+            ["id", "username", "email", "phone", "status"], 1000
+        )
+
+    def test_export_users_not_admin(self):
+        # Given
+        self.user.roles = [Role(id=1, name=RoleEnum.USER)]
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(
+            self.user
+        )
+
+        # When
+        response, status_code = export_users(user=self.user.username)
+
+        # Then
+        assert status_code == 401
+        assert response == {"message": "Only an admin can export the users"}
+        self.mock_core.user.stream_rows.assert_not_called()
 
 
 @pytest.mark.usefixtures("session")
@@ -95,7 +202,9 @@ class TestGetUserByUsername:
         assert isinstance(response, dict)
         assert "user" in response
         assert response["user"] == user.to_dict()
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id", "username"], username=user.username
+        )
 
     def test_get_user_by_username_not_found(self, user):
         # Given
@@ -109,7 +218,9 @@ class TestGetUserByUsername:
         assert status_code == 404
         assert isinstance(response, dict)
         assert "message" in response
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id", "username"], username=user.username
+        )
 
 
 @pytest.mark.usefixtures("session")
@@ -133,19 +244,15 @@ class TestGetUserDetails:
             password="adminpassword",
             salt="xyz",
             phone="0602030405",
-            devices="['android']",
+            devices='["android"]',
             status=StatusEnum.READY
         )
         self.admin_user.roles = [role_admin]
 
-        self.mock_core.user.get_instance_by_key.side_effect = lambda username: (
-            user if username == "username" else self.admin_user
-        )
-
     def test_get_user_details_user_role(self, user):
         # Given
         kwargs = {"userId": user.id, "user": user.username}
-        self.mock_core.user.get_instance_by_key.return_value = user
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(user)
         self.mock_core.user.get_details.return_value = user.to_dict()
 
         # When
@@ -156,13 +263,13 @@ class TestGetUserDetails:
         assert isinstance(response, dict)
         assert "user" in response
         assert response["user"] == user.to_dict()
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.user.get_snapshot_by_username.assert_called_with(user.username)
         self.mock_core.user.get_details.assert_called_with(user.id)
 
     def test_get_user_details_user_role_not_allowed(self, user):
         # Given
         kwargs = {"userId": 10, "user": user.username}
-        self.mock_core.user.get_instance_by_key.return_value = user
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(user)
         self.mock_core.user.get_details.return_value = user.to_dict()
 
         # When
@@ -172,13 +279,13 @@ class TestGetUserDetails:
         assert status_code == 401
         assert isinstance(response, dict)
         assert "message" in response
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.user.get_snapshot_by_username.assert_called_with(user.username)
         self.mock_core.user.get_details.assert_called_with(10)
 
     def test_get_user_details_user_role_not_found(self, user):
         # Given
         kwargs = {"userId": user.id, "user": user.username}
-        self.mock_core.user.get_instance_by_key.return_value = user
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(user)
         self.mock_core.user.get_details.return_value = None
 
         # When
@@ -188,13 +295,15 @@ class TestGetUserDetails:
         assert status_code == 404
         assert isinstance(response, dict)
         assert "message" in response
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.user.get_snapshot_by_username.assert_called_with(user.username)
         self.mock_core.user.get_details.assert_called_with(user.id)
 
     def test_get_user_details_admin_role(self):
         # Given
         kwargs = {"userId": self.admin_user.id, "user": self.admin_user.username}
-        self.mock_core.user.get_instance_by_key.return_value = self.admin_user
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(
+            self.admin_user
+        )
         self.mock_core.user.get_details.return_value = self.admin_user.to_dict()
 
         # When
@@ -205,8 +314,8 @@ class TestGetUserDetails:
         assert isinstance(response, dict)
         assert "user" in response
         assert response["user"] == self.admin_user.to_dict()
-        self.mock_core.user.get_instance_by_key.assert_called_with(
-            username=self.admin_user.username
+        self.mock_core.user.get_snapshot_by_username.assert_called_with(
+            self.admin_user.username
         )
         self.mock_core.user.get_details.assert_called_with(self.admin_user.id)
 
@@ -214,7 +323,7 @@ class TestGetUserDetails:
         # Given
         kwargs = {"userId": user.id, "user": user.username}
         user.roles = []
-        self.mock_core.user.get_instance_by_key.return_value = user
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(user)
         self.mock_core.user.get_details.return_value = user.to_dict()
 
         # When
@@ -224,7 +333,7 @@ class TestGetUserDetails:
         assert status_code == 401
         assert isinstance(response, dict)
         assert "message" in response
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.user.get_snapshot_by_username.assert_called_with(user.username)
         self.mock_core.user.get_details.assert_called_with(user.id)
 
 
@@ -249,12 +358,6 @@ class TestPostUser:
         self.mock_hibp = patch_hibp.start()
         request.addfinalizer(patch_hibp.stop)
 
-        patch_handle_email = patch(
-            "controllers.user_controller.handle_email_create_user"
-        )
-        self.mock_handle_email = patch_handle_email.start()
-        request.addfinalizer(patch_handle_email.stop)
-
         self.valid_kwargs = {
             "body": {
                 "username": "username",
@@ -292,11 +395,11 @@ class TestPostUser:
         # Given
         kwargs = self.valid_kwargs
         kwargs["body"]["password"] = "Gu8mpzc336Sab"
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = None
         self.mock_get_user_info.return_value = ["username", "fake"]
-        self.mock_hibp.return_value = ["ok"]
-        self.mock_core.user.create.return_value = user
+        self.mock_hibp.return_value = frozenset({"ok"})
+        self.mock_core.user.register.return_value = user
         self.mock_core.role.get_instance_by_key.return_value = self.role
         pepper = os.environ.get("PEPPER")
         mock_salt.return_value = "abcd"
@@ -309,14 +412,21 @@ class TestPostUser:
         assert isinstance(response, dict)
         assert "user" in response
         assert response["user"] == user.to_dict()
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
+        )
         self.mock_get_user_info.assert_called_with(
             user.username,
             user.email
         )
         self.mock_hibp.assert_called_once()
-        self.mock_core.user.create.assert_called_once_with(
+        self.mock_core.user.register.assert_called_once_with(
+            role=self.role,
+            answers=[(
+                1,
+                hashlib.sha256((pepper + "answer" + "abcd").encode("utf-8")).hexdigest().upper()
+            )],
             username=kwargs.get("body").get("username"),
             email=kwargs.get("body").get("email"),
             password=hashlib.sha256(
@@ -329,21 +439,40 @@ class TestPostUser:
             phone=kwargs.get("body").get("phone")
         )
         self.mock_core.role.get_instance_by_key.assert_called_once_with(name=self.role.name)
-        self.mock_core.user_role.create.assert_called_once_with(
-            user_id=user.id,
-            role_id=self.role.id
-        )
-        self.mock_core.user_questions.create.assert_called_with(
-            user_id=user.id,
-            question_id=1,
-            response=hashlib.sha256(
-                (pepper + "answer" + "abcd").encode("utf-8")).hexdigest().upper()
-        )
-        self.mock_handle_email.assert_called_once_with(
-            user_email=user.email,
-            username=user.username,
-            user_id=user.id
-        )
+        self.mock_core.user.create.assert_not_called()
+        self.mock_core.user_role.create.assert_not_called()
+        self.mock_core.user_questions.create.assert_not_called()
+
+    def test_post_user_username_taken_concurrently(self):
+        # Given
+        kwargs = self.valid_kwargs
+        kwargs["body"]["password"] = "Gu8mpzc336Sab"
+        self.mock_core.question.get_by_ids.return_value = [self.question]
+        self.mock_core.user.get_instance_by_key.return_value = None
+        self.mock_get_user_info.return_value = ["username", "fake"]
+        self.mock_hibp.return_value = frozenset({"ok"})
+        self.mock_core.user.register.side_effect = IntegrityError("INSERT", {}, Exception())
+
+        # When
+        response, status_code = post_users(**kwargs)
+
+        # Then
+        assert status_code == 400
+        assert response == {"message": "Username is already used"}
+
+    def test_post_user_one_question_not_found(self):
+        # Given
+        kwargs = self.valid_kwargs
+        kwargs["body"]["questions"].append({"questionId": 2, "response": "answer"})
+        self.mock_core.question.get_by_ids.return_value = [self.question]
+
+        # When
+        response, status_code = post_users(**kwargs)
+
+        # Then
+        assert status_code == 404
+        assert response == {"message": "Question 2 not found"}
+        self.mock_core.question.get_by_ids.assert_called_once_with([1, 2])
 
     def test_post_user_question_wrong_input_question_id(self):
         # Given
@@ -359,7 +488,7 @@ class TestPostUser:
         assert "message" in response
         assert response["message"] == ("Input error, for each question you have "
                                        "to provide the questionId and the answer")
-        self.mock_core.question.get_by_id.assert_not_called()
+        self.mock_core.question.get_by_ids.assert_not_called()
 
     def test_post_user_question_wrong_input_response(self):
         # Given
@@ -373,12 +502,12 @@ class TestPostUser:
         assert status_code == 400
         assert isinstance(response, dict)
         assert "message" in response
-        self.mock_core.question.get_by_id.assert_not_called()
+        self.mock_core.question.get_by_ids.assert_not_called()
 
     def test_post_user_question_not_found(self):
         # Given
         kwargs = self.valid_kwargs
-        self.mock_core.question.get_by_id.return_value = None
+        self.mock_core.question.get_by_ids.return_value = []
 
         # When
         response, status_code = post_users(**kwargs)
@@ -387,12 +516,12 @@ class TestPostUser:
         assert status_code == 404
         assert isinstance(response, dict)
         assert "message" in response
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
 
     def test_post_user_user_already_exists(self, user):
         # Given
         kwargs = self.valid_kwargs
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = user
 
         # When
@@ -403,8 +532,10 @@ class TestPostUser:
         assert isinstance(response, dict)
         assert "message" in response
         assert response["message"] == "Username is already used"
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
+        )
 
     def test_post_user_invalid_password_length(self, user):
         # Given
@@ -417,7 +548,7 @@ class TestPostUser:
             allow_repetitions=False,
             allow_series=False
         )
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = None
 
         # When
@@ -428,8 +559,10 @@ class TestPostUser:
         assert isinstance(response, dict)
         assert "message" in response
         assert response["message"] == "Password length should be minimum 10."
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
+        )
 
     def test_post_user_invalid_password_repetition(self, user):
         # Given
@@ -442,7 +575,7 @@ class TestPostUser:
             allow_repetitions=True,
             allow_series=False
         )
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = None
 
         # When
@@ -453,8 +586,10 @@ class TestPostUser:
         assert isinstance(response, dict)
         assert "message" in response
         assert response["message"] == "You cannot have 3 identical characters in a row."
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
+        )
 
     def test_post_user_invalid_password_series(self, user):
         # Given
@@ -467,7 +602,7 @@ class TestPostUser:
             allow_repetitions=False,
             allow_series=True
         )
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = None
 
         # When
@@ -478,8 +613,10 @@ class TestPostUser:
         assert isinstance(response, dict)
         assert "message" in response
         assert response["message"] == "Sequence longer than 3 characters detected."
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
+        )
 
     @pytest.mark.parametrize(
         "password",
@@ -496,7 +633,7 @@ class TestPostUser:
         # Given
         kwargs = self.valid_kwargs
         kwargs["body"]["password"] = password
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = None
 
         # When
@@ -508,8 +645,10 @@ class TestPostUser:
         assert "message" in response
         assert response["message"] == ("Password must have a number, an uppercase letter, "
                                        "and a lowercase letter.")
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
+        )
 
     def test_post_user_invalid_password_personal_info(self, user):
         # Given
@@ -523,7 +662,7 @@ class TestPostUser:
         )
         kwargs = self.valid_kwargs
         kwargs["body"]["password"] = password
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = None
         self.mock_get_user_info.return_value = [password]
 
@@ -535,8 +674,10 @@ class TestPostUser:
         assert isinstance(response, dict)
         assert "message" in response
         assert response["message"] == "Password seems to contain personal information."
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
+        )
         self.mock_get_user_info.assert_called_with(
             user.username,
             user.email
@@ -562,10 +703,10 @@ class TestPostUser:
 
         kwargs = self.valid_kwargs
         kwargs["body"]["password"] = password
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = None
         self.mock_get_user_info.return_value = ["username", "fake"]
-        self.mock_hibp.return_value = [f"{hash_end}:ok"]
+        self.mock_hibp.return_value = frozenset({hash_end})
 
         # When
         response, status_code = post_users(**kwargs)
@@ -575,8 +716,10 @@ class TestPostUser:
         assert isinstance(response, dict)
         assert "message" in response
         assert response["message"] == "Password is too weak."
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
+        )
         self.mock_get_user_info.assert_called_with(
             user.username,
             user.email
@@ -588,10 +731,10 @@ class TestPostUser:
     def test_post_user_hibp_error(self, user):
         # Given
         kwargs = self.valid_kwargs
-        self.mock_core.question.get_by_id.return_value = self.question
+        self.mock_core.question.get_by_ids.return_value = [self.question]
         self.mock_core.user.get_instance_by_key.return_value = None
         self.mock_get_user_info.return_value = ["username", "fake"]
-        self.mock_hibp.return_value = []
+        self.mock_hibp.return_value = None
 
         # When
         response, status_code = post_users(**kwargs)
@@ -601,51 +744,15 @@ class TestPostUser:
         assert isinstance(response, dict)
         assert "message" in response
         assert response["message"] == "Password checking feature is unavailable."
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
-        self.mock_get_user_info.assert_called_with(
-            user.username,
-            user.email
+        self.mock_core.question.get_by_ids.assert_called_with([self.question.id])
+        self.mock_core.user.get_instance_by_key.assert_called_with(
+            columns=["id"], username=user.username
         )
-        self.mock_hibp.assert_called_once()
-
-    def test_post_user_email_error(self, user):
-        # Given
-        kwargs = self.valid_kwargs
-        self.mock_core.question.get_by_id.return_value = self.question
-        self.mock_core.user.get_instance_by_key.return_value = None
-        self.mock_get_user_info.return_value = ["username", "fake"]
-        self.mock_hibp.return_value = ["ok"]
-        self.mock_core.user.create.return_value = user
-        self.mock_core.role.get_instance_by_key.return_value = self.role
-        self.mock_handle_email.side_effect = smtplib.SMTPException
-
-        # When
-        response, status_code = post_users(**kwargs)
-
-        # Then
-        assert status_code == 500
-        assert isinstance(response, dict)
-        assert "message" in response
-        self.mock_core.question.get_by_id.assert_called_with(self.question.id)
-        self.mock_core.user.get_instance_by_key.assert_called_with(username=user.username)
         self.mock_get_user_info.assert_called_with(
             user.username,
             user.email
         )
         self.mock_hibp.assert_called_once()
-        self.mock_core.user.create.assert_called_once()
-        self.mock_core.role.get_instance_by_key.assert_called_once_with(name=self.role.name)
-        self.mock_core.user_role.create.assert_called_once_with(
-            user_id=user.id,
-            role_id=self.role.id
-        )
-        self.mock_core.user_questions.create.assert_called()
-        self.mock_handle_email.assert_called_once_with(
-            user_email=user.email,
-            username=user.username,
-            user_id=user.id
-        )
 
     def test_generate_salt(self):
         # When
@@ -753,12 +860,6 @@ class TestResetPassword:
         self.mock_check_password = self.patch_check_password.start()
         request.addfinalizer(self.patch_check_password.stop)
 
-        self.patch_handle_email_password_changed = patch(
-            "controllers.user_controller.handle_email_password_changed"
-        )
-        self.mock_handle_email_password_changed = self.patch_handle_email_password_changed.start()
-        request.addfinalizer(self.patch_handle_email_password_changed.stop)
-
         role_user = Role(id=1, name=RoleEnum.USER)
         user.roles = [role_user]
         self.user = user
@@ -775,7 +876,9 @@ class TestResetPassword:
 
     def test_reset_password(self):
         # Given
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_snapshot_by_username.return_value = (
+            UserSnapshot.from_user(self.user)
+        )
         self.mock_check_password.return_value = None
         pepper = os.environ.get("PEPPER")
         new_password = pepper + "new_password" + self.user.salt
@@ -785,14 +888,15 @@ class TestResetPassword:
         response, status_code = reset_password(**self.kwargs)
 
         # Then
-        self.mock_core.user.update.assert_called_once_with(self.user.id, password=new_password)
-        self.mock_core.user.get_instance_by_key.assert_called_once_with(username=self.user.username)
+        self.mock_core.user.update.assert_called_once_with(
+            self.user.id, password=new_password, email_kind=EmailKindEnum.PASSWORD_CHANGED
+        )
+        self.mock_core.user.get_snapshot_by_username.assert_called_once_with(self.user.username)
         self.mock_check_password.assert_called_once_with(
             password="new_password",
             username=self.user.username,
             email=self.user.email
         )
-        self.mock_handle_email_password_changed.assert_called_once_with(self.user)
         assert status_code == 200
         assert isinstance(response, dict)
         assert response == {"message": "The password has been successfully reset"}
@@ -802,7 +906,9 @@ class TestResetPassword:
         role_admin = Role(id=2, name=RoleEnum.ADMIN)
         self.user.roles = [role_admin]
 
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_snapshot_by_username.return_value = (
+            UserSnapshot.from_user(self.user)
+        )
         self.mock_check_password.return_value = None
 
         # When
@@ -810,7 +916,10 @@ class TestResetPassword:
 
         # Then
         self.mock_core.user.update.assert_called_once()
-        self.mock_handle_email_password_changed.assert_called_once_with(self.user)
+        assert (
+            self.mock_core.user.update.call_args.kwargs["email_kind"]
+            == EmailKindEnum.PASSWORD_CHANGED
+        )
         assert status_code == 200
         assert isinstance(response, dict)
         assert (
@@ -820,21 +929,22 @@ class TestResetPassword:
 
     def test_reset_password_user_not_found(self):
         # Given
-        self.mock_core.user.get_instance_by_key.return_value = None
+        self.mock_core.user.get_snapshot_by_username.return_value = None
 
         # When
         response, status_code = reset_password(**self.kwargs)
 
         # Then
         self.mock_core.user.update.assert_not_called()
-        self.mock_handle_email_password_changed.assert_not_called()
         assert status_code == 404
         assert isinstance(response, dict)
         assert response == {"message": f"User with id {self.user.id} not found"}
 
     def test_reset_password_password_not_valid(self):
         # Given
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_snapshot_by_username.return_value = (
+            UserSnapshot.from_user(self.user)
+        )
         self.mock_check_password.return_value = "error"
 
         # When
@@ -842,7 +952,6 @@ class TestResetPassword:
 
         # Then
         self.mock_core.user.update.assert_not_called()
-        self.mock_handle_email_password_changed.assert_not_called()
         assert response == "error"
 
     def test_reset_password_same_password(self):
@@ -854,7 +963,9 @@ class TestResetPassword:
         ).hexdigest().upper()
         self.user.password = same_password_hash
 
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_snapshot_by_username.return_value = (
+            UserSnapshot.from_user(self.user)
+        )
         self.mock_check_password.return_value = None
 
         # When
@@ -862,7 +973,6 @@ class TestResetPassword:
 
         # Then
         self.mock_core.user.update.assert_not_called()
-        self.mock_handle_email_password_changed.assert_not_called()
         assert status_code == 400
         assert isinstance(response, dict)
         assert response == {"message": "You cannot use the same password"}
@@ -876,7 +986,9 @@ class TestResetPassword:
                 "newPassword": "new_password"
             }
         }
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_snapshot_by_username.return_value = (
+            UserSnapshot.from_user(self.user)
+        )
         self.mock_check_password.return_value = None
 
         # When
@@ -884,7 +996,6 @@ class TestResetPassword:
 
         # Then
         self.mock_core.user.update.assert_not_called()
-        self.mock_handle_email_password_changed.assert_not_called()
         assert status_code == 401
         assert isinstance(response, dict)
         assert (
@@ -895,7 +1006,9 @@ class TestResetPassword:
     def test_reset_password_no_required_role(self):
         # Given
         self.user.roles = []
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_snapshot_by_username.return_value = (
+            UserSnapshot.from_user(self.user)
+        )
         self.mock_check_password.return_value = None
 
         # When
@@ -903,7 +1016,6 @@ class TestResetPassword:
 
         # Then
         self.mock_core.user.update.assert_not_called()
-        self.mock_handle_email_password_changed.assert_not_called()
         assert status_code == 401
         assert isinstance(response, dict)
         assert (
@@ -4,8 +4,13 @@ class for simplicity, but all these tests are applicable to the other models in
 the project.
 """
 
+from unittest.mock import patch
+
 import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 
+from app import db
 from core.models import Question
 from core.repositories.base import BaseRepository
 
@@ -48,6 +53,175 @@ class TestUpdate:
         assert not updated_question
 
 
+class TestBulkCreate:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, session):
+        self.repo = BaseRepository(Question)
+
+        self.commits = []
+        event.listen(session(), "after_commit", self.commits.append)
+
+    def test_bulk_create(self, session):
+        # When
+        count = self.repo.bulk_create([
+            {"question": f"Question {number} ?"} for number in range(100)
+        ])
+
+        # Then
+        assert count == 100
+        assert Question.query.count() == 100
+        assert len(self.commits) == 1
+
+    def test_bulk_create_empty(self, session):
+        # When
+        count = self.repo.bulk_create([])
+
+        # Then
+        assert count == 0
+        assert not self.commits
+
+    def test_bulk_create_failure(self, session):
+        # Given
+        rows = [{"question": "Question ?"}, {"question": "Question ?"}]
+
+        rollbacks = []
+        event.listen(session(), "after_rollback", rollbacks.append)
+
+        # When
+        with pytest.raises(IntegrityError):
+            self.repo.bulk_create(rows)
+
+        # Then
+        assert len(rollbacks) == 1
+        assert not self.commits
+
+
+class TestBulkUpdateByIds:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, session):
+        self.repo = BaseRepository(Question)
+
+        session.add_all([
+            Question(id=1, question="What is the capital of France?"),
+            Question(id=2, question="What is the capital of Germany?"),
+            Question(id=3, question="What is the capital of Spain?"),
+        ])
+        session.commit()
+
+    def test_bulk_update_by_ids(self, session):
+        # When
+        count = self.repo.bulk_update_by_ids([
+            {"id": 1, "question": "What is the capital of Italy?"},
+            {"id": 3, "question": "What is the capital of Portugal?"},
+        ])
+
+        # Then
+        assert count == 2
+        assert [question.question for question in Question.query.order_by(Question.id)] == [
+            "What is the capital of Italy?",
+            "What is the capital of Germany?",
+            "What is the capital of Portugal?",
+        ]
+
+    def test_bulk_update_by_ids_empty(self, session):
+        # When
+        count = self.repo.bulk_update_by_ids([])
+
+        # Then
+        assert count == 0
+
+
+class TestUpdateWhere:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, session):
+        self.repo = BaseRepository(Question)
+
+        session.add_all([
+            Question(id=1, question="What is the capital of France?"),
+            Question(id=2, question="What is the capital of Germany?"),
+        ])
+        session.commit()
+
+    def test_update_where(self, session):
+        # Given
+        question = self.repo.get_by_id(1)
+
+        # When
+        count = self.repo.update_where({"question": "What is the capital of Italy?"}, id=1)
+
+        # Then
+        assert count == 1
+        assert question.question == "What is the capital of Italy?"
+        assert self.repo.get_by_id(2).question == "What is the capital of Germany?"
+
+    def test_update_where_no_match(self, session):
+        # When
+        count = self.repo.update_where({"question": "What is the capital of Italy?"}, id=3)
+
+        # Then
+        assert count == 0
+
+
+class TestUpsert:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, session):
+        self.repo = BaseRepository(Question)
+
+        session.add(Question(id=1, question="What is the capital of France?"))
+        session.commit()
+
+    def test_upsert(self, session):
+        # When
+        count = self.repo.upsert(
+            [
+                {"id": 1, "question": "What is the capital of Italy?"},
+                {"id": 2, "question": "What is the capital of Germany?"},
+            ],
+            index_elements=["id"]
+        )
+
+        # Then
+        assert count == 2
+        assert [question.question for question in Question.query.order_by(Question.id)] == [
+            "What is the capital of Italy?",
+            "What is the capital of Germany?",
+        ]
+
+    def test_upsert_do_nothing(self, session):
+        # When
+        self.repo.upsert(
+            [
+                {"id": 3, "question": "What is the capital of France?"},
+                {"id": 2, "question": "What is the capital of Germany?"},
+            ],
+            index_elements=["question"],
+            update_columns=[]
+        )
+
+        # Then
+        assert [question.id for question in Question.query.order_by(Question.id)] == [1, 2]
+
+    def test_upsert_empty(self, session):
+        # When
+        count = self.repo.upsert([], index_elements=["id"])
+
+        # Then
+        assert count == 0
+
+    def test_upsert_unsupported_dialect(self, session):
+        # Given
+        bind = db.session.get_bind()
+
+        # When
+        with patch.object(bind.dialect, "name", "mysql"):
+            with pytest.raises(NotImplementedError):
+                self.repo.upsert([{"id": 2, "question": "Question ?"}], index_elements=["id"])
+
+
 class TestGetById:
 
     @pytest.fixture(autouse=True)
@@ -66,6 +240,103 @@ class TestGetById:
         assert question.question == "What is the capital of France?"
 
 
+class TestGetByIds:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, session):
+        self.repo = BaseRepository(Question)
+
+        session.add_all([
+            Question(id=1, question="What is the capital of France?"),
+            Question(id=2, question="What is the capital of Germany?"),
+        ])
+        session.commit()
+
+    def test_get_by_ids(self, session):
+        # When
+        questions = self.repo.get_by_ids([2, 1, 3])
+
+        # Then
+        assert sorted(question.id for question in questions) == [1, 2]
+
+    def test_get_by_ids_empty(self, session):
+        # When
+        questions = self.repo.get_by_ids([])
+
+        # Then
+        assert questions == []
+
+
+class TestGetPage:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, session):
+        self.repo = BaseRepository(Question)
+
+        session.add_all([
+            Question(id=number, question=f"Question {number} ?") for number in range(1, 6)
+        ])
+        session.commit()
+
+    def test_get_page_first(self, session):
+        # When
+        questions = self.repo.get_page(2)
+
+        # Then
+        assert [question.id for question in questions] == [1, 2]
+
+    def test_get_page_after_id(self, session):
+        # When
+        questions = self.repo.get_page(2, after_id=4)
+
+        # Then
+        assert [question.id for question in questions] == [5]
+
+    def test_get_page_columns(self, session):
+        # When
+        rows = self.repo.get_page(2, after_id=2, columns=["id"], question="Question 4 ?")
+
+        # Then
+        assert [tuple(row) for row in rows] == [(4,)]
+
+    def test_get_page_with_filters(self, session):
+        # When
+        questions = self.repo.get_page(2, after_id=1, question="Question 3 ?")
+
+        # Then
+        assert [question.id for question in questions] == [3]
+
+
+class TestStreamRows:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, session):
+        self.repo = BaseRepository(Question)
+
+        session.add_all([
+            Question(id=number, question=f"Question {number} ?") for number in range(1, 6)
+        ])
+        session.commit()
+
+    def test_stream_rows(self, session):
+        # When
+        batches = list(self.repo.stream_rows(["id", "question"], batch_size=2))
+
+        # Then
+        assert [[tuple(row) for row in batch] for batch in batches] == [
+            [(1, "Question 1 ?"), (2, "Question 2 ?")],
+            [(3, "Question 3 ?"), (4, "Question 4 ?")],
+            [(5, "Question 5 ?")],
+        ]
+
+    def test_stream_rows_with_filters(self, session):
+        # When
+        batches = list(self.repo.stream_rows(["id"], batch_size=2, question="Question 3 ?"))
+
+        # Then
+        assert [[tuple(row) for row in batch] for batch in batches] == [[(3,)]]
+
+
 class TestGetAll:
 
     def test_get_all(self, session):
@@ -101,6 +372,24 @@ class TestGetInstanceByKey:
         # Then
         assert instance == question
 
+    def test_get_instance_by_key_columns(self, session):
+        # Given
+        self.repo = BaseRepository(Question)
+
+        session.add(Question(id=1, question="What is the capital of France?"))
+        session.commit()
+        session.expunge_all()
+
+        # When
+        row = self.repo.get_instance_by_key(
+            columns=["id"], question="What is the capital of France?"
+        )
+
+        # Then
+        assert row.id == 1
+        assert tuple(row) == (1,)
+        assert not list(session.identity_map.values())
+
 
 class TestGetIListByKey:
 
@@ -154,3 +443,22 @@ class TestGetIListByKey:
 
         # Then
         assert len(instances) == 1
+
+    def test_get_list_by_key_columns(self, session):
+        # Given
+        self.repo = BaseRepository(Question)
+
+        session.add_all([
+            Question(id=1, question="What is the capital of France?"),
+            Question(id=2, question="What is the capital of Germany?"),
+        ])
+        session.commit()
+
+        # When
+        rows = self.repo.get_list_by_key(order_by=Question.id, order="desc", columns=["question"])
+
+        # Then
+        assert [row.question for row in rows] == [
+            "What is the capital of Germany?",
+            "What is the capital of France?",
+        ]
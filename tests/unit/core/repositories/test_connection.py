@@ -0,0 +1,322 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from core.models import (Connection, ConnectionStatusEnum, EmailKindEnum,
+                         EmailOutbox, UserLoginState)
+from core.repositories.connection import ConnectionRepository
+
+
+class TestCreate:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session, user):
+        self.repo = ConnectionRepository()
+        self.user = user
+
+        session.add(user)
+        session.commit()
+
+    def create(self, status, minutes_ago=0, ip_address="0.0.0.0"):
+        return self.repo.create(
+            user_id=self.user.id,
+            date=datetime.now() - timedelta(minutes=minutes_ago),
+            ip_address=ip_address,
+            status=status
+        )
+
+    def test_create_first_connection(self, session):
+        # When
+        connection = self.create(ConnectionStatusEnum.SUCCESS)
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_connection_id == connection.id
+        assert state.last_status == ConnectionStatusEnum.SUCCESS
+        assert state.last_date == connection.date
+        assert state.last_ip_address == "0.0.0.0"
+        assert state.failed_count == 0
+        assert state.validation_failed_count == 0
+        assert state.last_attempt_id == connection.id
+        assert state.last_attempt_status == ConnectionStatusEnum.SUCCESS
+
+    def test_create_counts_failed_streak(self, session):
+        # Given
+        self.create(ConnectionStatusEnum.FAILED, minutes_ago=3)
+        self.create(ConnectionStatusEnum.SUCCESS, minutes_ago=2)
+        self.create(ConnectionStatusEnum.FAILED, minutes_ago=1)
+
+        # When
+        self.create(ConnectionStatusEnum.FAILED)
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.failed_count == 2
+        assert state.validation_failed_count == 0
+
+    def test_create_counts_validation_failed_streak(self, session):
+        # Given
+        asked = self.create(ConnectionStatusEnum.ASK_FORGOTTEN_PASSWORD, minutes_ago=2)
+        self.create(ConnectionStatusEnum.VALIDATION_FAILED, minutes_ago=1)
+
+        # When
+        answer = self.create(ConnectionStatusEnum.VALIDATION_FAILED, ip_address=None)
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_connection_id == answer.id
+        assert state.last_status == ConnectionStatusEnum.VALIDATION_FAILED
+        assert state.last_ip_address is None
+        assert state.failed_count == 0
+        assert state.validation_failed_count == 2
+        assert state.last_attempt_id == asked.id
+        assert state.last_attempt_status == ConnectionStatusEnum.ASK_FORGOTTEN_PASSWORD
+
+    def test_create_login_state_inserted_meanwhile(self, session):
+        # Given
+        session.execute(insert(UserLoginState).values(
+            user_id=self.user.id, failed_count=1, validation_failed_count=0
+        ))
+
+        # When
+        self.create(ConnectionStatusEnum.FAILED)
+
+        # Then
+        assert session.query(UserLoginState).count() == 1
+        assert session.get(UserLoginState, self.user.id).failed_count == 2
+
+    def test_create_queues_email(self, session):
+        # Given
+        commits = []
+        event.listen(session(), "after_commit", commits.append)
+
+        # When
+        connection = self.repo.create(
+            user_id=self.user.id,
+            date=datetime.now(),
+            status=ConnectionStatusEnum.SUSPICIOUS,
+            email_kind=EmailKindEnum.SUSPICIOUS_CONNECTION
+        )
+
+        # Then
+        assert len(commits) == 1
+        email = session.query(EmailOutbox).one()
+        assert email.kind == EmailKindEnum.SUSPICIOUS_CONNECTION
+        assert email.user_id == self.user.id
+        assert email.connection_id == connection.id
+
+    def test_create_without_user(self, session):
+        # When
+        connection = self.repo.create(date=datetime.now(), status=ConnectionStatusEnum.FAILED)
+
+        # Then
+        assert connection.id is not None
+        assert session.query(UserLoginState).count() == 0
+
+
+class TestUpdate:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session, user):
+        self.repo = ConnectionRepository()
+        self.user = user
+
+        session.add(user)
+        session.commit()
+
+        self.suspicious = self.repo.create(
+            user_id=user.id,
+            date=datetime.now() - timedelta(minutes=1),
+            status=ConnectionStatusEnum.SUSPICIOUS
+        )
+
+    def test_update_last_connection(self, session):
+        # When
+        self.repo.update(self.suspicious.id, status=ConnectionStatusEnum.VALIDATED)
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_status == ConnectionStatusEnum.VALIDATED
+        assert state.last_attempt_status == ConnectionStatusEnum.VALIDATED
+
+    def test_update_after_wrong_answer(self, session):
+        # Given
+        self.repo.create(
+            user_id=self.user.id,
+            date=datetime.now(),
+            status=ConnectionStatusEnum.VALIDATION_FAILED
+        )
+
+        # When
+        self.repo.update(self.suspicious.id, status=ConnectionStatusEnum.VALIDATED)
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_status == ConnectionStatusEnum.VALIDATION_FAILED
+        assert state.last_attempt_status == ConnectionStatusEnum.VALIDATED
+
+    def test_update_other_field(self, session):
+        # When
+        connection = self.repo.update(self.suspicious.id, device="iphone")
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert connection.device == "iphone"
+        assert state.last_status == ConnectionStatusEnum.SUSPICIOUS
+
+    def test_update_old_connection(self, session):
+        # Given
+        session.add(
+            Connection(
+                id=99,
+                user_id=self.user.id,
+                date=datetime.now() - timedelta(days=1),
+                status=ConnectionStatusEnum.SUCCESS
+            )
+        )
+        session.commit()
+
+        # When
+        self.repo.update(99, status=ConnectionStatusEnum.FAILED)
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_status == ConnectionStatusEnum.SUSPICIOUS
+
+    def test_update_not_found(self):
+        # When
+        connection = self.repo.update(1234, status=ConnectionStatusEnum.VALIDATED)
+
+        # Then
+        assert connection is None
+
+
+class TestBulkOperations:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session, user):
+        self.repo = ConnectionRepository()
+        self.user = user
+
+        session.add(user)
+        session.commit()
+
+        self.now = datetime.now()
+        self.first = self.repo.create(**self.row(ConnectionStatusEnum.FAILED, minutes_ago=3))
+        self.second = self.repo.create(**self.row(ConnectionStatusEnum.FAILED, minutes_ago=2))
+
+    def row(self, status, minutes_ago=0, **values):
+        return {
+            "user_id": self.user.id,
+            "date": self.now - timedelta(minutes=minutes_ago),
+            "ip_address": "0.0.0.1",
+            "status": status,
+            **values
+        }
+
+    def test_bulk_create(self, session):
+        # Given
+        commits = []
+        event.listen(session(), "after_commit", commits.append)
+
+        # When
+        count = self.repo.bulk_create([
+            self.row(ConnectionStatusEnum.FAILED, minutes_ago=1),
+            self.row(ConnectionStatusEnum.VALIDATION_FAILED),
+        ])
+
+        # Then
+        assert count == 2
+        assert len(commits) == 1
+        last = session.query(Connection).order_by(Connection.date.desc()).first()
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_connection_id == last.id
+        assert state.last_status == ConnectionStatusEnum.VALIDATION_FAILED
+        assert state.last_ip_address == "0.0.0.1"
+        assert state.failed_count == 0
+        assert state.validation_failed_count == 1
+        assert state.last_attempt_status == ConnectionStatusEnum.FAILED
+
+    def test_bulk_create_first_connection(self, session):
+        # Given
+        session.query(UserLoginState).delete()
+        session.query(Connection).delete()
+        session.commit()
+
+        # When
+        self.repo.bulk_create([self.row(ConnectionStatusEnum.SUCCESS)])
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_status == ConnectionStatusEnum.SUCCESS
+        assert state.failed_count == 0
+
+    def test_bulk_update_by_ids(self, session):
+        # When
+        self.repo.bulk_update_by_ids([
+            {"id": self.second.id, "status": ConnectionStatusEnum.SUCCESS}
+        ])
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_connection_id == self.second.id
+        assert state.last_status == ConnectionStatusEnum.SUCCESS
+        assert state.failed_count == 0
+
+    def test_update_where(self, session):
+        # When
+        count = self.repo.update_where(
+            {"status": ConnectionStatusEnum.VALIDATED}, status=ConnectionStatusEnum.FAILED
+        )
+
+        # Then
+        assert count == 2
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_status == ConnectionStatusEnum.VALIDATED
+        assert state.failed_count == 0
+
+    def test_update_where_removes_user(self, session):
+        # When
+        self.repo.update_where({"user_id": None}, user_id=self.user.id)
+
+        # Then
+        assert session.query(UserLoginState).count() == 0
+
+    def test_upsert(self, session):
+        # Given
+        rows = [
+            self.row(ConnectionStatusEnum.SUCCESS, minutes_ago=2, id=self.second.id),
+            self.row(ConnectionStatusEnum.FAILED, id=self.second.id + 1),
+        ]
+
+        # When
+        count = self.repo.upsert(rows, ["id"])
+
+        # Then
+        assert count == 2
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_connection_id == self.second.id + 1
+        assert state.failed_count == 1
+        assert state.last_attempt_id == self.second.id + 1
+
+    def test_bulk_create_without_user(self, session):
+        # When
+        self.repo.bulk_create([self.row(ConnectionStatusEnum.SUCCESS, user_id=None)])
+
+        # Then
+        state = session.get(UserLoginState, self.user.id)
+        assert state.last_connection_id == self.second.id
+        assert state.failed_count == 2
+
+    def test_bulk_operations_without_rows(self, session):
+        # When
+        counts = [
+            self.repo.bulk_create([]),
+            self.repo.bulk_update_by_ids([]),
+            self.repo.upsert([], ["id"]),
+        ]
+
+        # Then
+        assert counts == [0, 0, 0]
+        assert session.get(UserLoginState, self.user.id).failed_count == 2
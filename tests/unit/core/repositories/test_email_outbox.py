@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.models import EmailKindEnum, EmailOutbox, EmailStatusEnum
+from core.repositories.email_outbox import EmailOutboxRepository
+
+
+class TestClaimDue:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session, user):
+        self.repo = EmailOutboxRepository()
+        self.now = datetime(2025, 1, 1, 12)
+        self.user = user
+
+        session.add(user)
+        session.commit()
+
+    def create(self, minutes=0, status=EmailStatusEnum.PENDING):
+        return self.repo.create(
+            kind=EmailKindEnum.CREATE_USER,
+            user_id=self.user.id,
+            status=status,
+            attempts=0,
+            next_attempt_at=self.now + timedelta(minutes=minutes),
+            created_at=self.now
+        )
+
+    def test_claim_due(self, session):
+        # Given
+        later = self.create(minutes=-1)
+        first = self.create(minutes=-5)
+        self.create(minutes=5)
+        self.create(minutes=-10, status=EmailStatusEnum.SENT)
+        self.create(minutes=-10, status=EmailStatusEnum.DEAD)
+        lease_until = self.now + timedelta(minutes=5)
+
+        # When
+        emails = self.repo.claim_due(10, self.now, lease_until)
+
+        # Then
+        assert emails == [first, later]
+        assert session.get(EmailOutbox, first.id).next_attempt_at == lease_until
+
+    def test_claim_due_limit(self):
+        # Given
+        first = self.create(minutes=-2)
+        self.create(minutes=-1)
+
+        # When
+        emails = self.repo.claim_due(1, self.now, self.now)
+
+        # Then
+        assert emails == [first]
+
+    def test_claim_due_claimed_emails_are_skipped(self):
+        # Given
+        self.create(minutes=-1)
+        self.repo.claim_due(10, self.now, self.now + timedelta(minutes=5))
+
+        # When
+        emails = self.repo.claim_due(10, self.now, self.now + timedelta(minutes=5))
+
+        # Then
+        assert emails == []
@@ -1,6 +1,15 @@
+import json
+from datetime import datetime
+
 import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 
-from core.models import Question, UserQuestion
+from core.models import (Connection, ConnectionStatusEnum, EmailKindEnum,
+                         EmailOutbox, EmailStatusEnum, Question, Role, User,
+                         UserLoginState, UserQuestion, UserRole)
+from core.models.role import RoleEnum
+from core.models.user import StatusEnum
 from core.repositories.user import UserRepository
 
 
@@ -47,3 +56,163 @@ class TestGetDetails:
             assert result.phone == user.phone
             assert result.question == question.question
             assert result.question_id == question.id
+
+
+class TestGetLoginSnapshot:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session, user):
+        self.repo = UserRepository()
+
+        session.add(user)
+        session.commit()
+
+    def test_get_login_snapshot(self, session, user):
+        # Given
+        last_connection = Connection(
+            id=1,
+            user_id=user.id,
+            date=datetime.now(),
+            status=ConnectionStatusEnum.FAILED
+        )
+        session.add(last_connection)
+        session.commit()
+        login_state = UserLoginState(
+            user_id=user.id,
+            last_connection_id=last_connection.id,
+            failed_count=1,
+            validation_failed_count=0
+        )
+        session.add(login_state)
+        session.commit()
+
+        # When
+        row = self.repo.get_login_snapshot(user.username)
+
+        # Then
+        assert tuple(row) == (user, login_state, last_connection)
+
+    def test_get_login_snapshot_no_connection(self, session, user):
+        # When
+        row = self.repo.get_login_snapshot(user.username)
+
+        # Then
+        assert tuple(row) == (user, None, None)
+
+    def test_get_login_snapshot_user_not_found(self, session):
+        # When
+        row = self.repo.get_login_snapshot("unknown")
+
+        # Then
+        assert row is None
+
+
+class TestUpdate:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session, user):
+        self.repo = UserRepository()
+        self.user = user
+
+        session.add(user)
+        session.commit()
+
+    def test_update_queues_email(self, session):
+        # Given
+        commits = []
+        event.listen(session(), "after_commit", commits.append)
+
+        # When
+        user = self.repo.update(
+            self.user.id, password="new_password", email_kind=EmailKindEnum.PASSWORD_CHANGED
+        )
+
+        # Then
+        assert len(commits) == 1
+        assert user.password == "new_password"
+        email = session.query(EmailOutbox).filter_by(user_id=self.user.id).one()
+        assert email.kind == EmailKindEnum.PASSWORD_CHANGED
+        assert email.status == EmailStatusEnum.PENDING
+
+    def test_update_without_email(self, session):
+        # When
+        self.repo.update(self.user.id, password="new_password")
+
+        # Then
+        assert session.query(EmailOutbox).count() == 0
+
+    def test_update_not_found(self, session):
+        # When
+        user = self.repo.update(
+            2, password="new_password", email_kind=EmailKindEnum.PASSWORD_CHANGED
+        )
+
+        # Then
+        assert user is None
+        assert session.query(EmailOutbox).count() == 0
+
+
+class TestRegister:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session):
+        self.repo = UserRepository()
+
+        self.role = Role(id=1, name=RoleEnum.USER)
+        self.questions = [
+            Question(id=1, question="What is the capital of France?"),
+            Question(id=2, question="What is the capital of Germany?"),
+        ]
+        session.add_all([self.role, *self.questions])
+        session.commit()
+
+        self.fields = {
+            "username": "username",
+            "email": "username@email.com",
+            "password": "password",
+            "salt": "abcde",
+            "phone": "0102030405",
+            "devices": json.dumps(["iphone"]),
+            "status": StatusEnum.CHECKING_EMAIL,
+        }
+
+    def test_register(self, session):
+        # When
+        user = self.repo.register(self.role, [(1, "PARIS"), (2, "BERLIN")], **self.fields)
+
+        # Then
+        session.expire_all()
+        assert user.roles == [self.role]
+        assert sorted((answer.question_id, answer.response) for answer in user.questions) == [
+            (1, "PARIS"), (2, "BERLIN")
+        ]
+        email = session.query(EmailOutbox).filter_by(user_id=user.id).one()
+        assert email.kind == EmailKindEnum.CREATE_USER
+        assert email.status == EmailStatusEnum.PENDING
+
+    def test_register_single_commit(self, session):
+        # Given
+        commits = []
+        event.listen(session(), "after_commit", commits.append)
+
+        # When
+        self.repo.register(self.role, [(1, "PARIS"), (2, "BERLIN")], **self.fields)
+
+        # Then
+        assert len(commits) == 1
+
+    def test_register_failure_saves_nothing(self, session):
+        # Given
+        rollbacks = []
+        event.listen(session(), "after_rollback", rollbacks.append)
+
+        # When
+        with pytest.raises(IntegrityError):
+            self.repo.register(self.role, [(1, "PARIS"), (2, None)], **self.fields)
+
+        # Then
+        assert len(rollbacks) == 1
+        assert session.query(User).filter_by(username="username").count() == 0
+        assert session.query(UserQuestion).count() == 0
+        assert session.query(UserRole).count() == 0
+        assert session.query(EmailOutbox).count() == 0
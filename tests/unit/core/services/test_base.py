@@ -40,6 +40,58 @@ class TestUpdate:
         assert updated_question.question == "Updated question"
 
 
+class TestBulkOperations:
+
+    def test_bulk_create(self, session):
+        # Given
+        service = BaseService(BaseRepository(Question))
+
+        # When
+        count = service.bulk_create([{"question": "Question 1 ?"}, {"question": "Question 2 ?"}])
+
+        # Then
+        assert count == 2
+        assert len(service.get_all()) == 2
+
+    def test_bulk_update_by_ids(self, session):
+        # Given
+        service = BaseService(BaseRepository(Question))
+        question = service.create(question="Original question")
+
+        # When
+        count = service.bulk_update_by_ids([{"id": question.id, "question": "Updated question"}])
+
+        # Then
+        assert count == 1
+        assert service.get_by_id(question.id).question == "Updated question"
+
+    def test_update_where(self, session):
+        # Given
+        service = BaseService(BaseRepository(Question))
+        question = service.create(question="Original question")
+
+        # When
+        count = service.update_where({"question": "Updated question"}, question="Original question")
+
+        # Then
+        assert count == 1
+        assert service.get_by_id(question.id).question == "Updated question"
+
+    def test_upsert(self, session):
+        # Given
+        service = BaseService(BaseRepository(Question))
+        question = service.create(question="Original question")
+
+        # When
+        count = service.upsert(
+            [{"id": question.id, "question": "Updated question"}], index_elements=["id"]
+        )
+
+        # Then
+        assert count == 1
+        assert service.get_by_id(question.id).question == "Updated question"
+
+
 class TestGetById:
 
     def test_get_by_id(self, session):
@@ -57,6 +109,54 @@ class TestGetById:
         assert retrieved_question.question == "What is the capital of France?"
 
 
+class TestGetByIds:
+
+    def test_get_by_ids(self, session):
+        # Given
+        repo = BaseRepository(Question)
+        service = BaseService(repo)
+        question = service.create(question="What is the capital of France?")
+
+        # When
+        retrieved_questions = service.get_by_ids([question.id])
+
+        # Then
+        assert retrieved_questions == [question]
+
+
+class TestGetPage:
+
+    def test_get_page(self, session):
+        # Given
+        repo = BaseRepository(Question)
+        service = BaseService(repo)
+        question1 = service.create(question="What is the capital of France?")
+        question2 = service.create(question="What is the capital of Germany?")
+
+        # When
+        questions = service.get_page(1, after_id=question1.id)
+
+        # Then
+        assert questions == [question2]
+
+
+class TestStreamRows:
+
+    def test_stream_rows(self, session):
+        # Given
+        repo = BaseRepository(Question)
+        service = BaseService(repo)
+        question = service.create(question="What is the capital of France?")
+
+        # When
+        batches = list(service.stream_rows(["id", "question"], batch_size=10))
+
+        # Then
+        assert [[tuple(row) for row in batch] for batch in batches] == [
+            [(question.id, "What is the capital of France?")]
+        ]
+
+
 class TestGetAll:
 
     def test_get_all(self, session):
@@ -90,6 +190,18 @@ class TestGetInstanceByKey:
         assert retrieved_question is not None
         assert retrieved_question.id == question.id
 
+    def test_get_instance_by_key_columns(self, session):
+        # Given
+        repo = BaseRepository(Question)
+        service = BaseService(repo)
+        question = service.create(question="What is the capital of France?")
+
+        # When
+        row = service.get_instance_by_key(columns=["id"], question=question.question)
+
+        # Then
+        assert tuple(row) == (question.id,)
+
 
 class TestGetIListByKey:
 
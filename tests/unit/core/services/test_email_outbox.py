@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from freezegun import freeze_time
+
+from core.models import EmailKindEnum, EmailOutbox, EmailStatusEnum
+from core.repositories.email_outbox import EmailOutboxRepository
+from core.services.email_outbox import EmailOutboxService
+
+
+class TestEmailOutboxService:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.mock_repo = MagicMock(spec=EmailOutboxRepository)
+
+        self.service = EmailOutboxService()
+        self.service.repository = self.mock_repo
+
+        self.email = EmailOutbox(id=3, kind=EmailKindEnum.CREATE_USER, user_id=1, attempts=2)
+
+    @freeze_time(datetime.now())
+    def test_enqueue(self):
+        # When
+        result = self.service.enqueue(
+            EmailKindEnum.SUSPICIOUS_CONNECTION,
+            user_id=1,
+            connection_id=2
+        )
+
+        # Then
+        self.mock_repo.create.assert_called_once_with(
+            kind=EmailKindEnum.SUSPICIOUS_CONNECTION,
+            user_id=1,
+            connection_id=2,
+            status=EmailStatusEnum.PENDING,
+            attempts=0,
+            next_attempt_at=datetime.now(),
+            created_at=datetime.now()
+        )
+        assert result == self.mock_repo.create.return_value
+
+    @freeze_time(datetime.now())
+    def test_claim_due(self):
+        # When
+        result = self.service.claim_due(10, timedelta(minutes=5))
+
+        # Then
+        self.mock_repo.claim_due.assert_called_once_with(
+            10,
+            datetime.now(),
+            datetime.now() + timedelta(minutes=5)
+        )
+        assert result == self.mock_repo.claim_due.return_value
+
+    @freeze_time(datetime.now())
+    def test_mark_sent(self):
+        # When
+        self.service.mark_sent(self.email)
+
+        # Then
+        self.mock_repo.update.assert_called_once_with(
+            3,
+            status=EmailStatusEnum.SENT,
+            attempts=3,
+            sent_at=datetime.now(),
+            last_error=None
+        )
+
+    def test_mark_failed(self):
+        # Given
+        retry_at = datetime(2025, 1, 1)
+
+        # When
+        self.service.mark_failed(self.email, "error", retry_at)
+
+        # Then
+        self.mock_repo.update.assert_called_once_with(
+            3,
+            attempts=3,
+            next_attempt_at=retry_at,
+            last_error="error"
+        )
+
+    def test_mark_failed_dead(self):
+        # When
+        self.service.mark_failed(self.email, "error", None)
+
+        # Then
+        self.mock_repo.update.assert_called_once_with(
+            3,
+            status=EmailStatusEnum.DEAD,
+            attempts=3,
+            last_error="error"
+        )
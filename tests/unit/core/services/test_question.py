@@ -4,7 +4,7 @@ import pytest
 
 from core.models import Question
 from core.repositories.question import QuestionRepository
-from core.services.question import QuestionService
+from core.services.question import QuestionCatalog, QuestionService
 
 
 class TestGetRandomQuestion:
@@ -16,15 +16,136 @@ class TestGetRandomQuestion:
         self.service = QuestionService()
         self.service.repository = self.mock_repo
 
+        self.question1 = Question(id=1, question="What is the capital of France?")
+        self.question2 = Question(id=2, question="What is the capital of Germany?")
+        self.mock_repo.get_list_by_key.return_value = [self.question1, self.question2]
+
     def test_get_random_questions(self):
+        # When
+        result = self.service.get_random_questions(2)
+
+        # Then
+        self.mock_repo.get_list_by_key.assert_called_once_with(
+            order_by="id", columns=["id", "question"]
+        )
+        self.mock_repo.get_random_questions.assert_not_called()
+        assert sorted(result, key=lambda question: question["id"]) == [
+            self.question1.to_dict(),
+            self.question2.to_dict(),
+        ]
+
+    def test_get_random_questions_from_cache(self):
+        # When
+        first = self.service.get_random_questions(1)
+        second = self.service.get_random_questions(1)
+
+        # Then
+        self.mock_repo.get_list_by_key.assert_called_once()
+        assert first[0] in [self.question1.to_dict(), self.question2.to_dict()]
+        assert second[0] in [self.question1.to_dict(), self.question2.to_dict()]
+
+    def test_get_random_questions_reloaded(self):
         # Given
-        question1 = Question(id=1, question="What is the capital of France?")
-        question2 = Question(id=2, question="What is the capital of Germany?")
-        self.mock_repo.get_random_questions.return_value = [question1, question2]
+        self.service.get_catalog()
+        question3 = Question(id=3, question="What is the capital of Spain?")
+        self.mock_repo.get_list_by_key.return_value = [
+            self.question1, self.question2, question3
+        ]
 
         # When
-        result = self.service.get_random_questions(2)
+        result = self.service.get_random_questions(3)
 
         # Then
-        self.mock_repo.get_random_questions.assert_called_once_with(2)
-        assert result == [question1.to_dict(), question2.to_dict()]
+        assert self.mock_repo.get_list_by_key.call_count == 2
+        self.mock_repo.get_random_questions.assert_not_called()
+        assert sorted(result, key=lambda question: question["id"]) == [
+            self.question1.to_dict(), self.question2.to_dict(), question3.to_dict()
+        ]
+
+    def test_get_random_questions_not_enough(self):
+        # When
+        result = self.service.get_random_questions(3)
+
+        # Then
+        assert result is None
+        assert self.mock_repo.get_list_by_key.call_count == 2
+
+    def test_count(self):
+        # When
+        count = self.service.count()
+
+        # Then
+        assert count == 2
+
+    def test_get_catalog(self):
+        # When
+        catalog = self.service.get_catalog()
+
+        # Then
+        assert catalog.version == 0
+        assert catalog.by_id == {1: self.question1.question, 2: self.question2.question}
+        assert catalog.to_list() == [self.question1.to_dict(), self.question2.to_dict()]
+        assert catalog.etag == QuestionCatalog.from_rows(5, [self.question1, self.question2]).etag
+
+    def test_get_catalog_changed_while_loading(self):
+        # Given
+        def load(**_):
+            self.service.create(question="What is the capital of Spain?")
+            return [self.question1, self.question2]
+
+        self.mock_repo.get_list_by_key.side_effect = load
+
+        # When
+        catalog = self.service.get_catalog()
+
+        # Then
+        assert catalog.version == 0
+        assert self.service.version == 1
+        assert self.service.cache.get("catalog") is None
+
+
+class TestCatalogInvalidation:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session):
+        self.service = QuestionService()
+        self.question = self.service.create(question="What is the capital of France?")
+
+    def test_create(self, session):
+        # Given
+        assert self.service.count() == 1
+
+        # When
+        self.service.create(question="What is the capital of Germany?")
+
+        # Then
+        assert self.service.count() == 2
+
+    def test_update(self, session):
+        # Given
+        self.service.get_catalog()
+
+        # When
+        self.service.update(self.question.id, question="What is the capital of Spain?")
+
+        # Then
+        catalog = self.service.get_catalog()
+        assert catalog.questions == ((self.question.id, "What is the capital of Spain?"),)
+        assert catalog.version == 2
+
+    def test_bulk_operations(self, session):
+        # Given
+        self.service.get_catalog()
+
+        # When / Then
+        self.service.bulk_create([{"question": "What is the capital of Italy?"}])
+        assert self.service.count() == 2
+
+        self.service.bulk_update_by_ids([{"id": self.question.id, "question": "Question 1 ?"}])
+        assert (self.question.id, "Question 1 ?") in self.service.get_catalog().questions
+
+        self.service.update_where({"question": "Question 2 ?"}, question="Question 1 ?")
+        assert (self.question.id, "Question 2 ?") in self.service.get_catalog().questions
+
+        self.service.upsert([{"id": self.question.id, "question": "Question 3 ?"}], ["id"])
+        assert (self.question.id, "Question 3 ?") in self.service.get_catalog().questions
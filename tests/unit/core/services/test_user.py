@@ -3,8 +3,10 @@ from unittest.mock import MagicMock
 
 import pytest
 
+from core.models import Role, UserLoginState, UserRole
+from core.models.role import RoleEnum
 from core.repositories.user import UserRepository
-from core.services.user import UserService
+from core.services.user import UserService, UserSnapshot
 
 
 class TestGetDetails:
@@ -62,3 +64,237 @@ class TestGetDetails:
         # Then
         self.mock_repo.get_details.assert_called_once_with(2)
         assert result is None
+
+
+class TestGetLoginSnapshot:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.mock_repo = MagicMock(spec=UserRepository)
+
+        self.service = UserService()
+        self.service.repository = self.mock_repo
+
+    def test_get_login_snapshot(self, user, connection):
+        # Given
+        login_state = UserLoginState(user_id=user.id, failed_count=2)
+        self.mock_repo.get_login_snapshot.return_value = (user, login_state, connection)
+
+        # When
+        result = self.service.get_login_snapshot(user.username)
+
+        # Then
+        self.mock_repo.get_login_snapshot.assert_called_once_with(user.username)
+        assert result == {
+            "user": user,
+            "last_connection": connection,
+            "failed_streak": 2,
+            "devices": ["iphone"],
+        }
+
+    def test_get_login_snapshot_refreshes_snapshot(self, user):
+        # Given
+        self.service.cache.set(user.username, "stale")
+        self.mock_repo.get_login_snapshot.return_value = (user, None, None)
+
+        # When
+        self.service.get_login_snapshot(user.username)
+
+        # Then
+        assert self.service.cache.get(user.username) == UserSnapshot.from_user(user)
+
+    def test_get_login_snapshot_no_connection(self, user):
+        # Given
+        user.devices = ""
+        self.mock_repo.get_login_snapshot.return_value = (user, None, None)
+
+        # When
+        result = self.service.get_login_snapshot(user.username)
+
+        # Then
+        assert result == {
+            "user": user,
+            "last_connection": None,
+            "failed_streak": 0,
+            "devices": [],
+        }
+
+    def test_get_login_snapshot_not_found(self):
+        # Given
+        self.mock_repo.get_login_snapshot.return_value = None
+
+        # When
+        result = self.service.get_login_snapshot("unknown")
+
+        # Then
+        assert result is None
+
+
+class TestGetSnapshotByUsername:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.mock_repo = MagicMock(spec=UserRepository)
+
+        self.service = UserService()
+        self.service.repository = self.mock_repo
+
+    def test_get_snapshot_by_username(self, user):
+        # Given
+        self.mock_repo.get_instance_by_key.return_value = user
+
+        # When
+        result = self.service.get_snapshot_by_username(user.username)
+
+        # Then
+        self.mock_repo.get_instance_by_key.assert_called_once_with(username=user.username)
+        assert result == UserSnapshot.from_user(user)
+        assert result.devices == ("iphone",)
+
+    def test_get_snapshot_by_username_cached(self, user):
+        # Given
+        self.mock_repo.get_instance_by_key.return_value = user
+        first = self.service.get_snapshot_by_username(user.username)
+
+        # When
+        result = self.service.get_snapshot_by_username(user.username)
+
+        # Then
+        self.mock_repo.get_instance_by_key.assert_called_once()
+        assert result is first
+
+    def test_get_credentials(self, user):
+        # Given
+        self.service.cache.set(user.username, UserSnapshot.from_user(user))
+        self.mock_repo.get_instance_by_key.return_value = (user.id, "salt", "new_password")
+
+        # When
+        result = self.service.get_credentials(user.username)
+
+        # Then
+        self.mock_repo.get_instance_by_key.assert_called_once_with(
+            columns=["id", "salt", "password"], username=user.username
+        )
+        assert result == (user.id, "salt", "new_password")
+
+    def test_get_snapshot_by_username_not_found(self):
+        # Given
+        self.mock_repo.get_instance_by_key.return_value = None
+
+        # When
+        result = self.service.get_snapshot_by_username("unknown")
+
+        # Then
+        assert result is None
+        assert len(self.service.cache) == 0
+
+    def test_update_invalidates_snapshot(self, user):
+        # Given
+        self.mock_repo.get_instance_by_key.return_value = user
+        self.mock_repo.update.return_value = user
+        self.service.get_snapshot_by_username(user.username)
+
+        # When
+        self.service.update(user.id, status="BANNED")
+        self.service.get_snapshot_by_username(user.username)
+
+        # Then
+        assert self.mock_repo.get_instance_by_key.call_count == 2
+
+    def test_update_not_found(self):
+        # Given
+        self.mock_repo.update.return_value = None
+
+        # When
+        result = self.service.update(42, status="BANNED")
+
+        # Then
+        assert result is None
+
+    def test_create_invalidates_snapshot(self, user):
+        # Given
+        self.service.cache.set(user.username, "stale")
+        self.mock_repo.create.return_value = user
+
+        # When
+        result = self.service.create(username=user.username)
+
+        # Then
+        assert result is user
+        assert self.service.cache.get(user.username) is None
+
+    def test_register_invalidates_snapshot(self, user):
+        # Given
+        role = MagicMock()
+        self.service.cache.set(user.username, "stale")
+        self.mock_repo.register.return_value = user
+
+        # When
+        result = self.service.register(role, [(1, "answer")], username=user.username)
+
+        # Then
+        assert result is user
+        self.mock_repo.register.assert_called_once_with(
+            role, [(1, "answer")], username=user.username
+        )
+        assert self.service.cache.get(user.username) is None
+
+    @pytest.mark.parametrize("method, args", [
+        ("bulk_create", ([{"username": "username"}],)),
+        ("bulk_update_by_ids", ([{"id": 1, "status": "BANNED"}],)),
+        ("update_where", ({"status": "BANNED"},)),
+        ("upsert", ([{"id": 1, "status": "BANNED"}], ["id"])),
+    ])
+    def test_bulk_operations_clear_snapshots(self, user, method, args):
+        # Given
+        self.mock_repo.get_instance_by_key.return_value = user
+        getattr(self.mock_repo, method).return_value = 1
+        self.service.get_snapshot_by_username(user.username)
+
+        # When
+        count = getattr(self.service, method)(*args)
+
+        # Then
+        assert count == 1
+        assert len(self.service.cache) == 0
+
+
+class TestSnapshotAcrossProcesses:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session, user):
+        session.add_all([user, Role(id=1, name=RoleEnum.ADMIN)])
+        session.commit()
+        self.user = user
+
+        # Each worker has its own service, with its own cache of snapshots
+        self.worker = UserService()
+        self.other_worker = UserService()
+
+    def test_password_changed_by_other_process(self):
+        # Given
+        self.worker.get_snapshot_by_username(self.user.username)
+
+        # When
+        self.other_worker.update(self.user.id, password="new_password")
+
+        # Then
+        assert self.worker.get_credentials(self.user.username).password == "new_password"
+        # Limit: out of a secured request, the cached snapshot keeps the old hash until its TTL
+        assert self.worker.get_snapshot_by_username(self.user.username).password == "password"
+
+    def test_role_revoked_by_other_process(self, session):
+        # Given
+        session.add(UserRole(user_id=self.user.id, role_id=1))
+        session.commit()
+        assert self.worker.get_snapshot_by_username(self.user.username).roles == (
+            RoleEnum.ADMIN,
+        )
+
+        # When
+        session.query(UserRole).delete()
+        session.commit()
+        self.worker.get_login_snapshot(self.user.username)
+
+        # Then
+        assert self.worker.get_snapshot_by_username(self.user.username).roles == ()
@@ -1,8 +1,10 @@
 from core.services.connection import ConnectionService
+from core.services.email_outbox import EmailOutboxService
 from core.services.health import HealthService
 from core.services.question import QuestionService
 from core.services.role import RoleService
 from core.services.user import UserService
+from core.services.user_login_state import UserLoginStateService
 from core.services.user_question import UserQuestionService
 from core.services.user_role import UserRoleService
 from core.tempo_core import TempoCore
@@ -17,3 +19,5 @@ def test_tempo_core_initialization():
     assert isinstance(core.role, RoleService)
     assert isinstance(core.user_role, UserRoleService)
     assert isinstance(core.connection, ConnectionService)
+    assert isinstance(core.user_login_state, UserLoginStateService)
+    assert isinstance(core.email_outbox, EmailOutboxService)
@@ -0,0 +1,87 @@
+import pytest
+
+from app import db
+from core.models import Connection, Role, Token, User, UserQuestion
+from core.models.user import StatusEnum
+from core.repositories.connection import ConnectionRepository
+from core.repositories.token import TokenRepository
+
+
+def query_plan(query) -> str:
+    """ SQLite plan of a query, one step per line """
+    sql = query.statement.compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={"literal_binds": True}
+    )
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.usefixtures("session")
+class TestQueryPlans:
+
+    def test_connection_history(self):
+        # Given
+        query = ConnectionRepository().model.query.filter_by(user_id=1).order_by(
+            Connection.date.desc()
+        ).limit(1)
+
+        # When
+        plan = query_plan(query)
+
+        # Then
+        assert "USING INDEX ix_connection_user_id_date" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_token_by_value(self):
+        # Given
+        query = TokenRepository().model.query.filter_by(value="token")
+
+        # When
+        plan = query_plan(query)
+
+        # Then
+        assert "USING INDEX ix_token_value" in plan
+
+    def test_active_token_of_user(self):
+        # Given
+        query = db.session.query(Token).filter_by(user_id=1, is_active=True)
+
+        # When
+        plan = query_plan(query)
+
+        # Then
+        assert "USING INDEX ix_token_user_id_active" in plan
+
+    def test_user_questions(self):
+        # Given
+        query = db.session.query(UserQuestion).filter(UserQuestion.user_id == 1)
+
+        # When
+        plan = query_plan(query)
+
+        # Then
+        assert "USING INDEX ix_user_question_user_id" in plan
+
+    def test_user_roles(self):
+        # Given
+        query = db.session.query(Role).join(User.roles).filter(User.id == 1)
+
+        # When
+        plan = query_plan(query)
+
+        # Then
+        assert "ix_user_role_user_id" in plan
+
+    def test_users_page_by_status(self):
+        # Given
+        query = User.query.filter_by(status=StatusEnum.READY).filter(User.id > 100).order_by(
+            User.id
+        ).limit(50)
+
+        # When
+        plan = query_plan(query)
+
+        # Then
+        assert "USING INDEX ix_user_status_id (status=? AND id>?)" in plan
+        assert "TEMP B-TREE" not in plan
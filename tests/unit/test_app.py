@@ -0,0 +1,142 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import (SECURE_ENDPOINTS, app, create_app, load_secure_endpoints,
+                 reset_after_fork, warm_up)
+from extensions import db
+from utils.json_provider import OrjsonProvider
+
+
+class TestLoadSecureEndpoints:
+
+    def test_load_secure_endpoints(self):
+        # Given
+        specification = MagicMock(base_path="", security=None)
+        specification.__getitem__.return_value = {
+            "/users/{userId}": {
+                "parameters": [],
+                "get": {
+                    "operationId": "controllers.user_controller.get_user",
+                    "security": [{"basic": []}, {"bearerAuth": []}],
+                },
+                "patch": {"operationId": "controllers.user_controller.update_user"},
+            },
+        }
+
+        # When
+        secure_endpoints = load_secure_endpoints(MagicMock(specification=specification))
+
+        # Then
+        assert secure_endpoints == {
+            ("/.controllers_user_controller_get_user", "GET"): ("basic", "bearerAuth"),
+        }
+
+    def test_load_secure_endpoints_global_security(self):
+        # Given
+        specification = MagicMock(base_path="/api", security=[{"bearerAuth": []}])
+        specification.__getitem__.return_value = {
+            "/users": {
+                "get": {"operationId": "controllers.user_controller.get_users"},
+                "post": {
+                    "operationId": "controllers.user_controller.post_users",
+                    "security": [],
+                },
+            },
+        }
+
+        # When
+        secure_endpoints = load_secure_endpoints(MagicMock(specification=specification))
+
+        # Then
+        assert secure_endpoints == {
+            ("/api.controllers_user_controller_get_users", "GET"): ("bearerAuth",),
+        }
+
+    def test_secure_endpoints_registered(self, test_app):
+        # When
+        app.test_client().get("/")
+        endpoints = {rule.endpoint for rule in test_app.url_map.iter_rules()}
+
+        # Then
+        assert SECURE_ENDPOINTS
+        assert {endpoint for endpoint, _ in SECURE_ENDPOINTS} <= endpoints
+
+
+class TestCreateApp:
+
+    def test_create_app(self):
+        # When
+        connexion_app = create_app()
+
+        # Then
+        assert connexion_app is not app
+        assert isinstance(connexion_app.app.json, OrjsonProvider)
+        assert "routes" in connexion_app.app.blueprints
+        assert connexion_app.middleware.apis[-1].specification["paths"]
+        assert connexion_app.middleware.middleware_stack is None
+
+    def test_create_app_missing_environment(self, monkeypatch):
+        # Given
+        monkeypatch.delenv("SESSION_SECRET_KEY")
+
+        # When / Then
+        with pytest.raises(KeyError, match="SESSION_SECRET_KEY"):
+            create_app()
+
+
+class TestWarmUp:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request):
+        self.connexion_app = create_app()
+        self.mock_get_catalog = patch("core.tempo_core.tempo_core.question.get_catalog").start()
+        request.addfinalizer(patch.stopall)
+
+    def test_warm_up(self):
+        # When
+        warm_up(self.connexion_app)
+
+        # Then
+        middleware = self.connexion_app.middleware
+        assert middleware.middleware_stack is not None
+        assert len(self.connexion_app.app.jinja_env.cache) == len(
+            self.connexion_app.app.jinja_env.list_templates()
+        )
+        self.mock_get_catalog.assert_called_once()
+
+        # The stack is not built again
+        stack = middleware.middleware_stack
+        warm_up(self.connexion_app)
+        assert middleware.middleware_stack is stack
+
+    def test_warm_up_database_unavailable(self):
+        # Given
+        self.mock_get_catalog.side_effect = SQLAlchemyError
+
+        # When
+        warm_up(self.connexion_app)
+
+        # Then
+        assert self.connexion_app.middleware.middleware_stack is not None
+
+
+class TestResetAfterFork:
+
+    def test_reset_after_fork(self):
+        # Given
+        connexion_app = create_app()
+        with connexion_app.app.app_context():
+            engine = db.engine
+
+        # When
+        with patch.object(type(engine), "dispose") as mock_dispose, \
+                patch("app.hibp_client") as mock_hibp_client, \
+                patch("app.async_hibp_client") as mock_async_hibp_client:
+            reset_after_fork(connexion_app)
+
+        # Then
+        mock_dispose.assert_called_once_with(close=False)
+        mock_hibp_client.reset.assert_called_once()
+        mock_async_hibp_client.reset.assert_called_once()
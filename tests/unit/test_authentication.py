@@ -1,20 +1,23 @@
 import base64
+import contextvars
 import hashlib
 import json
 import os
-import smtplib
 from datetime import datetime, timedelta
-from unittest import mock
 from unittest.mock import MagicMock, patch
 
 import jwt
 import pytest
+from flask import has_app_context
 from freezegun import freeze_time
 
-from authentication import (basic_auth, check_is_suspicious, check_route,
-                            jwt_auth)
-from core.models import (Connection, ConnectionStatusEnum, Question,
-                         StatusEnum, UserQuestion)
+from app import app
+from authentication import (JWT_CACHE, basic_auth, check_is_suspicious,
+                            check_route, decode_access_token, jwt_auth)
+from core.models import (Connection, ConnectionStatusEnum, EmailKindEnum,
+                         Question, StatusEnum, UserQuestion)
+from core.services.user import UserSnapshot
+from core.tempo_core import tempo_core
 
 
 @pytest.mark.usefixtures("session")
@@ -38,13 +41,13 @@ class TestBasicAuth:
             to_encode.encode("utf-8")
         ).hexdigest().upper()
         user.password = hashed_password
-        self.mock_core.user.get_instance_by_key.return_value = user
+        self.mock_core.user.get_credentials.return_value = UserSnapshot.from_user(user)
 
         # When
         response = basic_auth(username_input, password_input)
 
         # Then
-        self.mock_core.user.get_instance_by_key.assert_called_once_with(username=username_input)
+        self.mock_core.user.get_credentials.assert_called_once_with(username_input)
         assert response == {"sub": username_input}
 
     def test_basic_auth_wrong_input_username(self):
@@ -73,7 +76,7 @@ class TestBasicAuth:
         # Given
         username_input = "username"
         password_input = "password"
-        self.mock_core.user.get_instance_by_key.return_value = None
+        self.mock_core.user.get_credentials.return_value = None
 
         # When
         response = basic_auth(username_input, password_input)
@@ -86,7 +89,7 @@ class TestBasicAuth:
         # Given
         username_input = "username"
         password_input = "password"
-        self.mock_core.user.get_instance_by_key.return_value = user
+        self.mock_core.user.get_credentials.return_value = UserSnapshot.from_user(user)
 
         # When
         response = basic_auth(username_input, password_input)
@@ -111,6 +114,9 @@ class TestJwtAuth:
         os.environ["SECRET_KEY"] = "SECRET"
         self.key = os.environ["SECRET_KEY"]
 
+        JWT_CACHE.clear()
+        request.addfinalizer(JWT_CACHE.clear)
+
     def test_jwt_auth_valid_token(self):
         # Given
         payload = {
@@ -134,13 +140,13 @@ class TestJwtAuth:
         }
         token = jwt.encode(payload, self.key)
 
-        self.mock_core.user.get_instance_by_key.return_value = user
+        self.mock_core.user.get_snapshot_by_username.return_value = UserSnapshot.from_user(user)
 
         # When
         result = jwt_auth(token)
 
         # Then
-        self.mock_core.user.get_instance_by_key.assert_called_once_with(username="john")
+        self.mock_core.user.get_snapshot_by_username.assert_called_once_with("john")
         self.mock_core.connection.create.assert_called_once_with(
             user_id=user.id,
             date=datetime.now(),
@@ -148,6 +154,22 @@ class TestJwtAuth:
         )
         assert result is None
 
+    def test_jwt_auth_expired_token_user_not_found(self):
+        # Given
+        payload = {
+            "username": "john",
+            "exp": datetime.now().timestamp() - 10
+        }
+        token = jwt.encode(payload, self.key)
+        self.mock_core.user.get_snapshot_by_username.return_value = None
+
+        # When
+        result = jwt_auth(token)
+
+        # Then
+        self.mock_core.connection.create.assert_not_called()
+        assert result is None
+
     def test_jwt_auth_invalid_signature(self):
         # Given
         payload = {"username": "john", "exp": datetime.now().timestamp() + 100}
@@ -160,55 +182,151 @@ class TestJwtAuth:
         assert result is None
 
 
+class TestJwtAuthThroughApp:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, session, user):
+        os.environ["SECRET_KEY"] = "SECRET"
+        JWT_CACHE.clear()
+        request.addfinalizer(JWT_CACHE.clear)
+
+        session.add(user)
+        session.commit()
+        self.user = user
+
+        # The session of the fixtures works out of an application context, unlike
+        # the one of Flask-SQLAlchemy, so the services check they are given one
+        for service, method in [
+            (tempo_core.user, "get_snapshot_by_username"),
+            (tempo_core.connection, "create"),
+        ]:
+            patcher = patch.object(
+                service, method, side_effect=self.in_app_context(getattr(service, method))
+            )
+            patcher.start()
+            request.addfinalizer(patcher.stop)
+
+    @staticmethod
+    def in_app_context(function):
+        def wrapper(*args, **kwargs):
+            assert has_app_context()
+            return function(*args, **kwargs)
+        return wrapper
+
+    def test_expired_token(self, session):
+        # Given
+        payload = {"username": self.user.username, "exp": datetime.now().timestamp() - 10}
+        token = jwt.encode(payload, os.environ["SECRET_KEY"])
+
+        # When
+        # Out of the application context of the fixtures, like a served request
+        response = contextvars.Context().run(
+            app.test_client().get,
+            f"/users/{self.user.id}/details",
+            headers={"Authorization": f"Bearer {token}", "Device": "iphone"}
+        )
+
+        # Then
+        assert response.status_code == 401
+        connection = session.query(Connection).filter_by(user_id=self.user.id).one()
+        assert connection.status == ConnectionStatusEnum.FAILED
+
+
+class TestDecodeAccessToken:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request):
+        os.environ["SECRET_KEY"] = "SECRET"
+        self.key = os.environ["SECRET_KEY"]
+
+        JWT_CACHE.clear()
+        request.addfinalizer(JWT_CACHE.clear)
+
+        self.patch_decode = patch("authentication.jwt.decode", side_effect=jwt.decode)
+        self.mock_decode = self.patch_decode.start()
+        request.addfinalizer(self.patch_decode.stop)
+
+    def test_decode_access_token_cached(self):
+        # Given
+        payload = {"username": "john", "exp": int(datetime.now().timestamp()) + 3600}
+        token = jwt.encode(payload, self.key)
+
+        # When
+        first = decode_access_token(token)
+        second = decode_access_token(token)
+
+        # Then
+        assert first == second == payload
+        self.mock_decode.assert_called_once_with(token, self.key, algorithms=["HS256"])
+        assert JWT_CACHE.hits == 1
+        assert JWT_CACHE.misses == 1
+
+    def test_decode_access_token_evicted_at_expiration(self):
+        # Given
+        with freeze_time(datetime.now()) as frozen:
+            payload = {"username": "john", "exp": int(datetime.now().timestamp()) + 60}
+            token = jwt.encode(payload, self.key)
+            decode_access_token(token)
+            frozen.tick(timedelta(seconds=61))
+
+            # When, Then
+            with pytest.raises(jwt.ExpiredSignatureError):
+                decode_access_token(token)
+
+        assert self.mock_decode.call_count == 2
+
+    def test_decode_access_token_key_rotated(self):
+        # Given
+        payload = {"username": "john", "exp": int(datetime.now().timestamp()) + 3600}
+        token = jwt.encode(payload, self.key)
+        decode_access_token(token)
+        os.environ["SECRET_KEY"] = "NEW_SECRET"
+
+        # When, Then
+        with pytest.raises(jwt.InvalidSignatureError):
+            decode_access_token(token)
+        os.environ["SECRET_KEY"] = self.key
+
+
 @pytest.mark.usefixtures("session")
 class TestCheckIsSuspicious:
 
     @pytest.fixture(autouse=True)
-    def setup_method(self, request, connection):
+    def setup_method(self, request, user, connection):
         self.patch_core = patch("authentication.tempo_core")
         self.mock_core = self.patch_core.start()
         request.addfinalizer(self.patch_core.stop)
 
         connection.date = datetime.now()
         self.connection = connection
+        self.snapshot = {
+            "user": user,
+            "last_connection": connection,
+            "failed_streak": 0,
+            "devices": json.loads(user.devices)
+        }
 
     @freeze_time(datetime.now())
     def test_check_is_suspicious(self, user):
         # Given
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-            []
-        ]
         device = json.loads(user.devices)[0]
         self.connection.date = datetime.now() - timedelta(days=30)
 
         # When
-        response = check_is_suspicious(user, device, "0.0.0.0")
+        response = check_is_suspicious(self.snapshot, device, "0.0.0.0")
 
         # Then
         assert not response
-        first_call_args = self.mock_core.connection.get_list_by_key.call_args_list[0]
-        second_call_args = self.mock_core.connection.get_list_by_key.call_args_list[1]
-        assert first_call_args == mock.call(
-            order_by=Connection.date,
-            limit=1,
-            order="desc",
-            user_id=user.id
-        )
-        assert second_call_args == mock.call(
-            order_by=Connection.date,
-            limit=5,
-            order="desc",
-            user_id=user.id
-        )
+        self.mock_core.connection.get_list_by_key.assert_not_called()
+        self.mock_core.user.update.assert_not_called()
 
     def test_check_is_suspicious_first_connection(self, user):
         # Given
-        self.mock_core.connection.get_list_by_key.return_value = []
+        self.snapshot["last_connection"] = None
         device = json.loads(user.devices)[0]
 
         # When
-        response = check_is_suspicious(user, device, "0.0.0.0")
+        response = check_is_suspicious(self.snapshot, device, "0.0.0.0")
 
         # Then
         assert not response
@@ -216,11 +334,10 @@ class TestCheckIsSuspicious:
     def test_check_is_suspicious_last_connection_validated(self, user):
         # Given
         self.connection.status = ConnectionStatusEnum.VALIDATED
-        self.mock_core.connection.get_list_by_key.return_value = [self.connection]
         device = json.loads(user.devices)[0]
 
         # When
-        response = check_is_suspicious(user, device, "0.0.0.0")
+        response = check_is_suspicious(self.snapshot, device, "0.0.0.0")
 
         # Then
         assert not response
@@ -228,28 +345,18 @@ class TestCheckIsSuspicious:
 
     def test_check_is_suspicious_last_conn_date_one_month(self, user):
         # Given
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-            []
-        ]
         device = json.loads(user.devices)[0]
         self.connection.date = datetime.now() - timedelta(days=30, hours=10)
 
         # When
-        response = check_is_suspicious(user, device, "0.0.0.0")
+        response = check_is_suspicious(self.snapshot, device, "0.0.0.0")
 
         # Then
         assert response
 
-    def test_check_is_suspicious_unknowned_device(self, user):
-        # Given
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-            []
-        ]
-
+    def test_check_is_suspicious_unknowned_device(self):
         # When
-        response = check_is_suspicious(user, "unknowned", "0.0.0.0")
+        response = check_is_suspicious(self.snapshot, "unknowned", "0.0.0.0")
 
         # Then
         assert response
@@ -257,30 +364,35 @@ class TestCheckIsSuspicious:
     def test_check_is_suspicious_5_time_error(self, user):
         # Given
         self.connection.status = ConnectionStatusEnum.FAILED
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-            [self.connection, self.connection, self.connection, self.connection, self.connection]
-        ]
+        self.snapshot["failed_streak"] = 5
         device = json.loads(user.devices)[0]
 
         # When
-        response = check_is_suspicious(user, device, "0.0.0.0")
+        response = check_is_suspicious(self.snapshot, device, "0.0.0.0")
 
         # Then
         assert response
 
+    def test_check_is_suspicious_4_time_error(self, user):
+        # Given
+        self.connection.status = ConnectionStatusEnum.FAILED
+        self.snapshot["failed_streak"] = 4
+        device = json.loads(user.devices)[0]
+
+        # When
+        response = check_is_suspicious(self.snapshot, device, "0.0.0.0")
+
+        # Then
+        assert not response
+
     @freeze_time(datetime.now())
     def test_check_is_suspicious_ip_changed(self, user):
         # Given
         self.connection.date = datetime.now() - timedelta(minutes=59)
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-            []
-        ]
         device = json.loads(user.devices)[0]
 
         # When
-        response = check_is_suspicious(user, device, "0.0.0.1")
+        response = check_is_suspicious(self.snapshot, device, "0.0.0.1")
 
         # Then
         assert response
@@ -289,14 +401,10 @@ class TestCheckIsSuspicious:
     def test_check_is_suspicious_ip_changed_after_an_hour(self, user):
         # Given
         self.connection.date = datetime.now() - timedelta(hours=1)
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-            []
-        ]
         device = json.loads(user.devices)[0]
 
         # When
-        response = check_is_suspicious(user, device, "0.0.0.1")
+        response = check_is_suspicious(self.snapshot, device, "0.0.0.1")
 
         # Then
         assert not response
@@ -317,13 +425,20 @@ class TestBeforeRequest:
         self.client = client
         self.user = user
         self.connection = connection
+        self.snapshot = {
+            "user": user,
+            "last_connection": connection,
+            "failed_streak": 0,
+            "devices": json.loads(user.devices)
+        }
 
         self.patch_core = patch("authentication.tempo_core")
         self.mock_core = self.patch_core.start()
         request.addfinalizer(self.patch_core.stop)
 
         self.patch_paths = patch(
-            "authentication.SECURE_PATHS", ["GET /test_func", "GET /test_func/{id}"]
+            "authentication.SECURE_ENDPOINTS",
+            {("routes.test_route", "GET"): ("basic", "bearerAuth")}
         )
         self.mock_paths = self.patch_paths.start()
         request.addfinalizer(self.patch_paths.stop)
@@ -332,10 +447,6 @@ class TestBeforeRequest:
         self.mock_check = self.patch_check.start()
         request.addfinalizer(self.patch_check.stop)
 
-        self.patch_handle_email = patch("authentication.handle_email_suspicious_connection")
-        self.mock_handle_email = self.patch_handle_email.start()
-        request.addfinalizer(self.patch_handle_email.stop)
-
     def get_auth_header(self):
         credentials = f"{self.user.username}:password"
         encoded = base64.b64encode(credentials.encode()).decode()
@@ -355,10 +466,7 @@ class TestBeforeRequest:
     @freeze_time(datetime.now())
     def test_before_request(self, auth_type):
         # Given
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-        ]
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_login_snapshot.return_value = self.snapshot
 
         if auth_type == "basic":
             auth_header = self.get_auth_header()
@@ -373,6 +481,8 @@ class TestBeforeRequest:
 
         # Then
         assert response.status_code == 200
+        self.mock_core.user.get_login_snapshot.assert_called_once_with(self.user.username)
+        self.mock_core.connection.get_list_by_key.assert_not_called()
         self.mock_core.connection.create.assert_called_once_with(
             user_id=self.user.id,
             date=datetime.now(),
@@ -384,10 +494,7 @@ class TestBeforeRequest:
     @freeze_time(datetime.now())
     def test_before_request_user_not_found(self):
         # Given
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-        ]
-        self.mock_core.user.get_instance_by_key.return_value = None
+        self.mock_core.user.get_login_snapshot.return_value = None
 
         # When
         response = self.client.get("/test_func", headers={
@@ -412,10 +519,7 @@ class TestBeforeRequest:
     def test_before_request_user_banned(self):
         # Given
         self.user.status = StatusEnum.BANNED
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-        ]
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_login_snapshot.return_value = self.snapshot
 
         # When
         response = self.client.get("/test_func", headers={
@@ -429,10 +533,7 @@ class TestBeforeRequest:
 
     def test_before_request_missing_device_header(self):
         # Given
-        self.mock_core.connection.get_list_by_key.side_effect = [
-            [self.connection],
-        ]
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_login_snapshot.return_value = self.snapshot
 
         # When
         response = self.client.get("/test_func", headers={
@@ -446,8 +547,8 @@ class TestBeforeRequest:
     @freeze_time(datetime.now())
     def test_before_request_first_connection(self):
         # Given
-        self.mock_core.connection.get_list_by_key.return_value = []
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.snapshot["last_connection"] = None
+        self.mock_core.user.get_login_snapshot.return_value = self.snapshot
 
         # When
         response = self.client.get("/test_func", headers={
@@ -469,8 +570,7 @@ class TestBeforeRequest:
     def test_before_request_create_suspicious(self):
         # Given
         self.mock_check.return_value = True
-        self.mock_core.connection.get_list_by_key.return_value = [self.connection]
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_login_snapshot.return_value = self.snapshot
         self.mock_core.connection.create.return_value = self.connection
 
         # When
@@ -481,7 +581,6 @@ class TestBeforeRequest:
 
         # Then
         assert response.status_code == 412
-        self.mock_handle_email.assert_called_once_with(user=self.user, connection=self.connection)
         self.mock_core.connection.create.assert_called_once_with(
             user_id=self.user.id,
             date=datetime.now(),
@@ -491,7 +590,8 @@ class TestBeforeRequest:
             output=json.dumps({
                 "message": "suspicious connexion",
                 "question": self.question.question
-            }, ensure_ascii=False)
+            }, ensure_ascii=False),
+            email_kind=EmailKindEnum.SUSPICIOUS_CONNECTION
         )
 
     @freeze_time(datetime.now())
@@ -500,8 +600,7 @@ class TestBeforeRequest:
         self.mock_check.return_value = True
         self.connection.status = ConnectionStatusEnum.SUSPICIOUS
         self.connection.date = datetime.now()
-        self.mock_core.connection.get_list_by_key.return_value = [self.connection]
-        self.mock_core.user.get_instance_by_key.return_value = self.user
+        self.mock_core.user.get_login_snapshot.return_value = self.snapshot
         self.mock_core.connection.create.return_value = self.connection
 
         # When
@@ -512,72 +611,41 @@ class TestBeforeRequest:
 
         # Then
         assert response.status_code == 412
-        self.mock_handle_email.assert_not_called()
         self.mock_core.connection.create.assert_not_called()
 
-    @freeze_time(datetime.now())
-    def test_before_request_create_suspicious_error_email(self):
-        # Given
-        self.mock_check.return_value = True
-        self.mock_core.connection.get_list_by_key.return_value = [self.connection]
-        self.mock_core.user.get_instance_by_key.return_value = self.user
-        self.mock_core.connection.create.return_value = self.connection
-        self.mock_handle_email.side_effect = smtplib.SMTPException("error")
-
-        # When
-        response = self.client.get("/test_func", headers={
-            "Authorization": self.get_auth_header(),
-            "Device": "iphone"
-        })
-
-        # Then
-        assert response.status_code == 500
-        self.mock_handle_email.assert_called_once_with(user=self.user, connection=self.connection)
-        self.mock_core.connection.create.assert_called_once_with(
-            user_id=self.user.id,
-            date=datetime.now(),
-            device="iphone",
-            ip_address="127.0.0.1",
-            status=ConnectionStatusEnum.SUSPICIOUS,
-            output=json.dumps({
-                "message": "suspicious connexion",
-                "question": self.question.question
-            }, ensure_ascii=False)
-        )
-
     def test_check_route(self):
         # Given
-        mock_request = MagicMock(rule="/test_func")
+        mock_rule = MagicMock(endpoint="routes.test_route")
 
         # When
-        route = check_route(mock_request, "GET")
+        schemes = check_route(mock_rule, "GET")
 
         # Then
-        assert route == "GET /test_func"
+        assert schemes == ("basic", "bearerAuth")
 
-    def test_check_route_with_arg(self):
+    def test_check_route_other_method(self):
         # Given
-        mock_request = MagicMock(rule="/test_func/<id>")
+        mock_rule = MagicMock(endpoint="routes.test_route")
 
         # When
-        route = check_route(mock_request, "GET")
+        schemes = check_route(mock_rule, "POST")
 
         # Then
-        assert route == "GET /test_func/{id}"
+        assert not schemes
 
     def test_check_route_no_url_rule(self):
         # When
-        route = check_route(None, "GET")
+        schemes = check_route(None, "GET")
 
         # Then
-        assert not route
+        assert not schemes
 
     def test_check_route_no_secure_route(self):
         # Given
-        mock_request = MagicMock(rule="/test_fake")
+        mock_rule = MagicMock(endpoint="routes.test_fake")
 
         # When
-        route = check_route(mock_request, "GET")
+        schemes = check_route(mock_rule, "GET")
 
         # Then
-        assert not route
+        assert not schemes
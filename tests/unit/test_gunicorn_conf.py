@@ -0,0 +1,46 @@
+import importlib.util
+import pathlib
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+CONFIG_PATH = pathlib.Path(__file__).parents[2] / "gunicorn.conf.py"
+
+
+def load_config():
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", CONFIG_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestGunicornConf:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.config = load_config()
+        self.server = MagicMock()
+
+    def test_settings(self):
+        # Then
+        assert self.config.preload_app is True
+        assert self.config.worker_class == "uvicorn.workers.UvicornWorker"
+        assert self.config.workers >= 1
+
+    def test_when_ready(self):
+        # When
+        with patch.object(self.config, "warm_up") as mock_warm_up, \
+                patch.object(self.config.gc, "freeze") as mock_freeze:
+            self.config.when_ready(self.server)
+
+        # Then
+        mock_warm_up.assert_called_once_with(self.server.app.wsgi.return_value)
+        mock_freeze.assert_called_once()
+
+    def test_post_fork(self):
+        # When
+        with patch.object(self.config, "reset_after_fork") as mock_reset_after_fork:
+            self.config.post_fork(self.server, MagicMock())
+
+        # Then
+        mock_reset_after_fork.assert_called_once_with(self.server.app.wsgi.return_value)
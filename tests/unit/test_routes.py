@@ -1,6 +1,5 @@
 import json
 import os
-import smtplib
 import uuid
 from unittest.mock import patch
 
@@ -342,6 +341,7 @@ class TestResendEmail:
                 # Then
                 assert status_code == 202
                 self.mock_core.user.get_instance_by_key.assert_called_with(username="valid_user")
+                self.mock_handle_email.assert_called_once_with(self.user)
                 self.mock_render_template.assert_called_with(
                     "email_resend_template.html"
                 )
@@ -388,28 +388,6 @@ class TestResendEmail:
                     "email_resend_template.html"
                 )
 
-    def test_resend_email_error(self, test_app):
-        # Given
-        kwargs = {"username": "valid_user"}
-        self.mock_core.user.get_instance_by_key.return_value = self.user
-        self.mock_handle_email.side_effect = smtplib.SMTPException
-
-        with test_app.test_request_context():
-            with patch(
-                    "routes.session",
-                    {"email_token": "token"}
-            ) as mock_session:
-                # When
-                _, status_code = resend_email(**kwargs)
-
-                # Then
-                assert status_code == 500
-                self.mock_core.user.get_instance_by_key.assert_called_with(username="valid_user")
-                self.mock_render_template.assert_called_with(
-                    "error_template.html"
-                )
-                assert "email_token" not in mock_session
-
 
 @pytest.mark.usefixtures("session")
 class TestCheckAnswer:
@@ -965,26 +943,6 @@ class TestResendEmailForgotten:
             self.mock_render_template.assert_called_once_with("email_resend_template.html")
             assert code == 401
 
-    def test_resend_email_forgotten_email_error(self, test_app):
-        # Given
-        self.mock_core.user.get_instance_by_key.return_value = self.user
-        self.mock_handle_email.side_effect = smtplib.SMTPException("Email error")
-        token = str(uuid.uuid4())
-
-        with test_app.test_request_context(
-            f"/security/resend-email/forgotten-password/{self.user.username}",
-            method="POST"
-        ):
-            session["email_token"] = token
-
-            # When
-            _, code = resend_email_forgotten(self.user.username)
-
-            # Then
-            self.mock_handle_email.assert_called_once_with(user=self.user)
-            self.mock_render_template.assert_called_once_with("error_template.html")
-            assert code == 500
-
 
 @pytest.mark.usefixtures("session")
 class TestCheckPhoneForgotten:
@@ -1,5 +1,10 @@
 import secrets
+import socket
 import string
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask_mail import Mail
 
 
 def generate_password(
@@ -148,3 +153,78 @@ def remove_repetitions_series(
             )
 
     return password
+
+
+def get_free_port():
+    """ Find a local port nobody listens to """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def mail_state(port, **config):
+    """ Flask-Mail configuration sending to the local SMTP server """
+    return Mail().init_mail({"MAIL_SERVER": "127.0.0.1", "MAIL_PORT": port, **config})
+
+
+class SmtpSinkHandler:
+    """ Keep the messages received by the local SMTP server """
+
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        self.envelopes.append(envelope)
+        return "250 OK"
+
+
+class StubHttpHandler(BaseHTTPRequestHandler):
+    """ Answer the requests with the responses queued in the server """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # noqa: N802
+        self.answer()
+
+    def do_POST(self):  # noqa: N802
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.answer()
+
+    def answer(self):
+        self.server.clients.add(self.client_address)
+        self.server.paths.append(self.path)
+        status, body, delay = (
+            self.server.responses.pop(0) if self.server.responses
+            else (200, b'{"message": "success"}', 0)
+        )
+        time.sleep(delay)
+        if status is None:
+            # Drop the connection without answering
+            self.close_connection = True
+            return
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class StubHttpServer(ThreadingHTTPServer):
+    """ Local HTTP server keeping the requests it received """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHttpHandler)
+        self.responses = []
+        self.clients = set()
+        self.paths = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def queue(self, status=200, body=b'{"message": "success"}', delay=0):
+        self.responses.append((status, body, delay))
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+import pytest
+from freezegun import freeze_time
+
+from utils.cache import TTLCache
+
+
+class TestTTLCache:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.cache = TTLCache(max_size=2, ttl=60)
+
+    def test_get_hit(self):
+        # Given
+        self.cache.set("key", "value")
+
+        # When
+        value = self.cache.get("key")
+
+        # Then
+        assert value == "value"
+        assert self.cache.stats() == {"hits": 1, "misses": 0, "size": 1, "max_size": 2}
+
+    def test_get_miss(self):
+        # When
+        value = self.cache.get("key", "default")
+
+        # Then
+        assert value == "default"
+        assert self.cache.misses == 1
+
+    def test_get_expired_ttl(self):
+        # Given
+        with freeze_time(datetime.now()) as frozen:
+            self.cache.set("key", "value")
+            frozen.tick(timedelta(seconds=60))
+
+            # When
+            value = self.cache.get("key")
+
+        # Then
+        assert value is None
+        assert len(self.cache) == 0
+        assert self.cache.misses == 1
+
+    @freeze_time(datetime.now())
+    def test_get_expired_at(self):
+        # Given
+        self.cache.set("key", "value", expires_at=datetime.now().timestamp() - 1)
+
+        # When
+        value = self.cache.get("key")
+
+        # Then
+        assert value is None
+
+    def test_set_without_ttl(self):
+        # Given
+        cache = TTLCache(max_size=2)
+
+        # When
+        with freeze_time(datetime.now()) as frozen:
+            cache.set("key", "value")
+            frozen.tick(timedelta(days=365))
+            value = cache.get("key")
+
+        # Then
+        assert value == "value"
+
+    def test_set_evicts_least_recently_used(self):
+        # Given
+        self.cache.set("first", 1)
+        self.cache.set("second", 2)
+        self.cache.get("first")
+
+        # When
+        self.cache.set("third", 3)
+
+        # Then
+        assert self.cache.get("first") == 1
+        assert self.cache.get("second") is None
+        assert self.cache.get("third") == 3
+
+    def test_invalidate(self):
+        # Given
+        self.cache.set("key", "value")
+
+        # When
+        self.cache.invalidate("key")
+        self.cache.invalidate("unknown")
+
+        # Then
+        assert self.cache.get("key") is None
+
+    def test_clear(self):
+        # Given
+        self.cache.set("key", "value")
+        self.cache.get("key")
+
+        # When
+        self.cache.clear()
+
+        # Then
+        assert self.cache.stats() == {"hits": 0, "misses": 0, "size": 0, "max_size": 2}
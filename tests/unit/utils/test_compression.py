@@ -0,0 +1,250 @@
+import asyncio
+import gzip
+
+import brotli
+import pytest
+
+from app import app
+from utils.compression import CompressionMiddleware, negotiate_encoding
+
+
+def build_app(bodies: list[bytes], headers: list = None):
+    """ ASGI application sending the given body chunks """
+    async def application(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": headers or [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(sum(len(body) for body in bodies)).encode()),
+                (b"etag", b'"abc"'),
+            ],
+        })
+        for index, body in enumerate(bodies):
+            await send({
+                "type": "http.response.body",
+                "body": body,
+                "more_body": index < len(bodies) - 1,
+            })
+    return application
+
+
+def call(middleware: CompressionMiddleware, accept_encoding: str | None, scope_type="http"):
+    """ Run a request through the middleware and collect the messages it sends """
+    messages = []
+    scope = {
+        "type": scope_type,
+        "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+    }
+
+    async def receive():
+        return {"type": "http.request"}  # pragma: no cover
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages
+
+
+def headers_of(messages: list) -> dict:
+    return {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+
+
+def body_of(messages: list) -> bytes:
+    return b"".join(message["body"] for message in messages[1:])
+
+
+class TestNegotiateEncoding:
+
+    @pytest.mark.parametrize("accept_encoding, expected", [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+        ("*", "br"),
+        ("br;q=invalid, gzip;q=0.1", "gzip"),
+    ])
+    def test_negotiate_encoding(self, accept_encoding, expected):
+        # When
+        encoding = negotiate_encoding(accept_encoding)
+
+        # Then
+        assert encoding == expected
+
+
+class TestCompressionMiddleware:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.body = b'{"users": [' + b'{"id": 1, "username": "username"}, ' * 100 + b"]}"
+
+    def test_gzip(self):
+        # Given
+        middleware = CompressionMiddleware(build_app([self.body]), minimum_size=500)
+
+        # When
+        messages = call(middleware, "gzip")
+
+        # Then
+        headers = headers_of(messages)
+        assert headers["content-encoding"] == "gzip"
+        assert headers["vary"] == "Accept-Encoding"
+        assert headers["etag"] == 'W/"abc"'
+        assert int(headers["content-length"]) == len(body_of(messages)) < len(self.body)
+        assert gzip.decompress(body_of(messages)) == self.body
+
+    def test_brotli(self):
+        # Given
+        middleware = CompressionMiddleware(build_app([self.body]), minimum_size=500)
+
+        # When
+        messages = call(middleware, "gzip, br")
+
+        # Then
+        assert headers_of(messages)["content-encoding"] == "br"
+        assert brotli.decompress(body_of(messages)) == self.body
+
+    def test_streamed(self):
+        # Given
+        chunks = [self.body[:1000], self.body[1000:2000], self.body[2000:]]
+        middleware = CompressionMiddleware(build_app(chunks), minimum_size=500)
+
+        # When
+        messages = call(middleware, "gzip")
+
+        # Then
+        headers = headers_of(messages)
+        assert headers["content-encoding"] == "gzip"
+        assert "content-length" not in headers
+        assert len(messages) == 4
+        assert all(message["body"] for message in messages[1:])
+        assert gzip.decompress(body_of(messages)) == self.body
+
+    def test_small_body(self):
+        # Given
+        middleware = CompressionMiddleware(build_app([b"{}"]), minimum_size=500)
+
+        # When
+        messages = call(middleware, "gzip")
+
+        # Then
+        assert "content-encoding" not in headers_of(messages)
+        assert body_of(messages) == b"{}"
+
+    def test_small_body_in_chunks(self):
+        # Given
+        headers = [(b"content-type", b"application/json")]
+        middleware = CompressionMiddleware(
+            build_app([b'{"message": ', b'"API is ALIVE"}', b""], headers), minimum_size=500
+        )
+
+        # When
+        messages = call(middleware, "gzip")
+
+        # Then
+        assert "content-encoding" not in headers_of(messages)
+        assert body_of(messages) == b'{"message": "API is ALIVE"}'
+
+    def test_small_content_length(self):
+        # Given
+        chunks = [self.body[:100], b""]
+        headers = [(b"content-type", b"application/json"), (b"content-length", b"100")]
+        middleware = CompressionMiddleware(build_app(chunks, headers), minimum_size=500)
+
+        # When
+        messages = call(middleware, "gzip")
+
+        # Then
+        assert headers_of(messages) == {"content-type": "application/json", "content-length": "100"}
+        assert [message["body"] for message in messages[1:]] == chunks
+
+    def test_large_body_in_chunks(self):
+        # Given
+        headers = [(b"content-type", b"application/json")]
+        chunks = [self.body[:300], self.body[300:600], self.body[600:], b""]
+        middleware = CompressionMiddleware(build_app(chunks, headers), minimum_size=500)
+
+        # When
+        messages = call(middleware, "gzip")
+
+        # Then
+        assert headers_of(messages)["content-encoding"] == "gzip"
+        assert "content-length" not in headers_of(messages)
+        assert len(messages) == 4
+        assert gzip.decompress(body_of(messages)) == self.body
+
+    def test_not_accepted(self):
+        # Given
+        middleware = CompressionMiddleware(build_app([self.body]), minimum_size=500)
+
+        # When
+        messages = call(middleware, None)
+
+        # Then
+        assert "content-encoding" not in headers_of(messages)
+        assert body_of(messages) == self.body
+
+    @pytest.mark.parametrize("headers", [
+        [(b"content-type", b"image/png")],
+        [(b"content-type", b"application/json"), (b"content-encoding", b"gzip")],
+    ])
+    def test_already_compressed(self, headers):
+        # Given
+        middleware = CompressionMiddleware(build_app([self.body], headers), minimum_size=500)
+
+        # When
+        messages = call(middleware, "gzip")
+
+        # Then
+        assert headers_of(messages) == {
+            key.decode(): value.decode() for key, value in headers
+        }
+        assert body_of(messages) == self.body
+
+    def test_not_http(self):
+        # Given
+        middleware = CompressionMiddleware(build_app([self.body]), minimum_size=500)
+
+        # When
+        messages = call(middleware, "gzip", scope_type="websocket")
+
+        # Then
+        assert body_of(messages) == self.body
+
+    def test_settings_from_environment(self, monkeypatch):
+        # Given
+        monkeypatch.setenv("COMPRESSION_MINIMUM_SIZE", "10")
+        monkeypatch.setenv("COMPRESSION_GZIP_LEVEL", "1")
+        monkeypatch.setenv("COMPRESSION_BROTLI_QUALITY", "11")
+
+        # When
+        middleware = CompressionMiddleware(build_app([self.body]))
+
+        # Then
+        assert (middleware.minimum_size, middleware.gzip_level, middleware.brotli_quality) == (
+            10, 1, 11
+        )
+
+    @pytest.mark.usefixtures("test_app")
+    def test_small_response_not_compressed(self):
+        # When
+        response = app.test_client().get("/health/live", headers={"Accept-Encoding": "gzip"})
+
+        # Then
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-length"] == str(len(response.content))
+        assert response.json() == {"message": "API is ALIVE"}
+
+    def test_specification_compressed(self, test_app):
+        # When
+        response = app.test_client().get(
+            "/openapi.json", headers={"Accept-Encoding": "gzip"}
+        )
+
+        # Then
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
@@ -0,0 +1,150 @@
+import threading
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.health_monitor import HealthMonitor
+
+
+class TestHealthMonitor:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request):
+        self.database = MagicMock(return_value=True)
+        self.hibp = MagicMock(return_value=True)
+        self.monitor = HealthMonitor(
+            {"database": self.database, "hibp": self.hibp},
+            interval=3600,
+            timeout=1
+        )
+        request.addfinalizer(self.monitor.stop)
+
+    def test_snapshot_before_probes(self):
+        # When
+        statuses = self.monitor.snapshot()
+
+        # Then
+        assert statuses == {
+            name: {"healthy": None, "latency_ms": None, "last_check": None, "last_success": None}
+            for name in ("database", "hibp")
+        }
+
+    def test_probes_run_concurrently(self):
+        # Given
+        barrier = threading.Barrier(2, timeout=1)
+        self.database.side_effect = lambda: barrier.wait() is not None
+        self.hibp.side_effect = lambda: barrier.wait() is not None
+
+        # When
+        self.monitor.probe_all()
+
+        # Then
+        statuses = self.monitor.snapshot()
+        assert statuses["database"]["healthy"]
+        assert statuses["hibp"]["healthy"]
+
+    def test_probe_failure_keeps_last_success(self):
+        # Given
+        self.monitor.probe_all()
+        last_success = self.monitor.snapshot()["hibp"]["last_success"]
+        self.hibp.return_value = False
+
+        # When
+        self.monitor.probe_all()
+
+        # Then
+        status = self.monitor.snapshot()["hibp"]
+        assert not status["healthy"]
+        assert status["last_success"] == last_success
+        assert status["last_check"] >= last_success
+
+    def test_probe_exception(self):
+        # Given
+        self.database.side_effect = RuntimeError("boom")
+
+        # When
+        self.monitor.probe_all()
+
+        # Then
+        assert not self.monitor.snapshot()["database"]["healthy"]
+        assert self.monitor.snapshot()["hibp"]["healthy"]
+
+    def test_probe_timeout(self):
+        # Given
+        release = threading.Event()
+        # Long enough for the other probe to answer on a busy machine
+        self.monitor.timeout = 0.5
+        self.database.side_effect = release.wait
+
+        # When
+        self.monitor.probe_all()
+        release.set()
+
+        # Then
+        status = self.monitor.snapshot()["database"]
+        assert not status["healthy"]
+        assert status["latency_ms"] == 500.0
+        assert self.monitor.snapshot()["hibp"]["healthy"]
+
+    def test_probe_context(self):
+        # Given
+        entered = []
+
+        @contextmanager
+        def context():
+            entered.append(True)
+            yield
+
+        monitor = HealthMonitor({"database": self.database}, context=context)
+
+        # When
+        monitor.probe_all()
+
+        # Then
+        assert entered == [True]
+
+    def test_ensure_started(self):
+        # When
+        self.monitor.ensure_started()
+        self.monitor.ensure_started()
+
+        # Then
+        self.database.assert_called_once_with()
+        assert self.monitor.snapshot()["database"]["healthy"]
+
+    def test_background_probes(self):
+        # Given
+        probed = threading.Event()
+        self.monitor.interval = 0.01
+
+        def probe():
+            if self.database.call_count > 1:
+                probed.set()
+            return True
+
+        self.database.side_effect = probe
+
+        # When
+        self.monitor.ensure_started()
+
+        # Then
+        assert probed.wait(timeout=5)
+
+    def test_restarted_after_fork(self):
+        # Given
+        self.monitor.ensure_started()
+
+        # When
+        with patch("utils.health_monitor.os.getpid", return_value=-1):
+            self.monitor.ensure_started()
+
+        # Then
+        assert self.database.call_count == 2
+
+    def test_stop_not_started(self):
+        # When
+        self.monitor.stop()
+
+        # Then
+        assert self.database.call_count == 0
@@ -0,0 +1,177 @@
+from unittest.mock import MagicMock
+
+import pytest
+from connexion.frameworks.flask import flaskify_endpoint
+from flask import Flask, Response
+
+from utils.http_cache import (ConditionalGet, cache_headers, is_not_modified,
+                              make_etag)
+
+
+class TestMakeEtag:
+
+    def test_same_content(self):
+        # When
+        first = make_etag({"id": 1, "question": "Question ?"})
+        second = make_etag({"question": "Question ?", "id": 1})
+
+        # Then
+        assert first == second
+        assert len(first) == 32
+
+    def test_different_content(self):
+        # When / Then
+        assert make_etag([1, "Question ?"]) != make_etag([1, "Question 2 ?"])
+
+
+class TestCacheHeaders:
+
+    def test_cache_headers(self):
+        # When
+        headers = cache_headers("abc", 60)
+
+        # Then
+        assert headers == {"ETag": '"abc"', "Cache-Control": "public, max-age=60"}
+
+
+class TestIsNotModified:
+
+    @pytest.mark.parametrize("header, expected", [
+        (None, False),
+        ('"abc"', True),
+        ('"other", "abc"', True),
+        ('W/"abc"', True),
+        ("*", True),
+        ('"other"', False),
+    ])
+    def test_is_not_modified(self, test_app, header, expected):
+        # Given
+        headers = {"If-None-Match": header} if header else {}
+
+        # When
+        with test_app.test_request_context(headers=headers):
+            result = is_not_modified("abc")
+
+        # Then
+        assert result is expected
+
+
+def get_item(**kwargs):
+    """ Controller of the test application """
+    return {"id": kwargs.get("item_id")}
+
+
+class TestConditionalGet:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self):
+        self.conditional_get = ConditionalGet()
+        self.provider = MagicMock(return_value="abc")
+        self.controller = MagicMock(side_effect=get_item)
+
+        flask_app = Flask(__name__)
+        operation_id = flaskify_endpoint(f"{get_item.__module__}.{get_item.__name__}")
+        self.endpoint = f"/.{operation_id}"
+        flask_app.add_url_rule(
+            "/items/<int:item_id>", endpoint=self.endpoint, view_func=self.controller,
+            methods=["GET", "POST"]
+        )
+        flask_app.add_url_rule("/stream", view_func=lambda: Response(iter(["{}"]), 200))
+        self.conditional_get.init_app(flask_app)
+        self.client = flask_app.test_client()
+
+    def test_etag_added(self):
+        # When
+        response = self.client.get("/items/1")
+
+        # Then
+        assert response.status_code == 200
+        assert response.headers["ETag"]
+        self.controller.assert_called_once()
+
+    def test_not_modified_by_body(self):
+        # Given
+        etag = self.client.get("/items/1").headers["ETag"]
+
+        # When
+        response = self.client.get("/items/1", headers={"If-None-Match": etag})
+
+        # Then
+        assert response.status_code == 304
+        assert response.data == b""
+
+    def test_not_modified_by_provider(self):
+        # Given
+        self.conditional_get.etag(self.provider)(get_item)
+
+        # When
+        response = self.client.get("/items/1", headers={"If-None-Match": '"abc"'})
+
+        # Then
+        assert response.status_code == 304
+        assert response.headers["ETag"] == '"abc"'
+        self.provider.assert_called_once_with(item_id=1)
+        self.controller.assert_not_called()
+
+    def test_secured_endpoint_not_answered_by_provider(self):
+        # Given
+        self.conditional_get.etag(self.provider)(get_item)
+        self.conditional_get.secure_endpoints = {(self.endpoint, "GET"): ("basic",)}
+
+        # When
+        response = self.client.get("/items/1", headers={"If-None-Match": '"abc"'})
+
+        # Then
+        assert response.status_code == 200
+        self.provider.assert_not_called()
+        self.controller.assert_called_once()
+
+    def test_provider_etag_changed(self):
+        # Given
+        self.conditional_get.etag(self.provider)(get_item)
+
+        # When
+        response = self.client.get("/items/1", headers={"If-None-Match": '"old"'})
+
+        # Then
+        assert response.status_code == 200
+        self.controller.assert_called_once()
+
+    def test_provider_etag_unknown(self):
+        # Given
+        self.provider.return_value = None
+        self.conditional_get.etag(self.provider)(get_item)
+
+        # When
+        response = self.client.get("/items/1", headers={"If-None-Match": '"abc"'})
+
+        # Then
+        assert response.status_code == 200
+        self.controller.assert_called_once()
+
+    def test_post_ignored(self):
+        # Given
+        self.conditional_get.etag(self.provider)(get_item)
+
+        # When
+        response = self.client.post("/items/1", headers={"If-None-Match": '"abc"'})
+
+        # Then
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+        self.provider.assert_not_called()
+
+    def test_unknown_route(self):
+        # When
+        response = self.client.get("/unknown")
+
+        # Then
+        assert response.status_code == 404
+
+    def test_streamed_response_ignored(self):
+        # When
+        response = self.client.get("/stream")
+
+        # Then
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
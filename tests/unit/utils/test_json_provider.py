@@ -0,0 +1,119 @@
+import datetime
+import uuid
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+from app import app
+from core.models.connection import ConnectionStatusEnum
+from core.models.user import StatusEnum
+from utils.json_provider import (JSONProvider, OrjsonProvider,
+                                 json_provider_class)
+
+PAYLOAD = {
+    "status": StatusEnum.READY,
+    "connection": ConnectionStatusEnum.VALIDATED,
+    "date": datetime.datetime(2024, 9, 25, 23, 14, 42, 588601),
+    "aware_date": datetime.datetime(2024, 9, 25, 23, 14, 42, tzinfo=datetime.timezone.utc),
+    "day": datetime.date(2024, 9, 25),
+    "amount": Decimal("1.5"),
+    "uuid": uuid.UUID(int=1),
+}
+
+EXPECTED = {
+    "status": "READY",
+    "connection": "VALIDATED",
+    "date": "2024-09-25T23:14:42.588601Z",
+    "day": "2024-09-25",
+    "amount": 1.5,
+    "uuid": "00000000-0000-0000-0000-000000000001",
+}
+
+
+class TestJSONProvider:
+
+    @pytest.mark.parametrize("provider_class", [JSONProvider, OrjsonProvider])
+    def test_dumps(self, provider_class):
+        # Given
+        provider = provider_class(Flask(__name__))
+
+        # When
+        output = provider.loads(provider.dumps(PAYLOAD))
+
+        # Then
+        assert output.pop("aware_date") in ("2024-09-25T23:14:42+00:00", "2024-09-25T23:14:42Z")
+        assert output == EXPECTED
+
+    @pytest.mark.parametrize("provider_class", [JSONProvider, OrjsonProvider])
+    def test_sort_keys(self, provider_class):
+        # Given
+        provider = provider_class(Flask(__name__))
+
+        # When / Then
+        assert provider.dumps({"b": 1, "a": 2}).replace(" ", "") == '{"a":2,"b":1}'
+        assert provider.dumps({"b": 1, "a": 2}, sort_keys=False).replace(" ", "") == (
+            '{"b":1,"a":2}'
+        )
+
+    def test_orjson_indent(self):
+        # Given
+        provider = OrjsonProvider(Flask(__name__))
+
+        # When
+        output = provider.dumps({"a": [1]}, indent=2)
+
+        # Then
+        assert output == '{\n  "a": [\n    1\n  ]\n}'
+
+    def test_orjson_fallback(self):
+        # Given
+        provider = OrjsonProvider(Flask(__name__))
+
+        # When
+        output = provider.dumps({"big": 2 ** 70})
+
+        # Then
+        assert provider.loads(output) == {"big": 2 ** 70}
+
+    def test_orjson_loads(self):
+        # Given
+        provider = OrjsonProvider(Flask(__name__))
+
+        # When / Then
+        assert provider.loads(b'{"id": 1}') == {"id": 1}
+        assert provider.loads('{"id": 1}') == {"id": 1}
+
+
+class TestJsonProviderClass:
+
+    @pytest.mark.parametrize("name, expected", [
+        ("orjson", OrjsonProvider),
+        ("json", JSONProvider),
+    ])
+    def test_json_provider_class(self, name, expected):
+        # When / Then
+        assert json_provider_class(name) is expected
+
+    def test_from_environment(self, monkeypatch):
+        # Given
+        monkeypatch.setenv("JSON_PROVIDER", "json")
+
+        # When / Then
+        assert json_provider_class() is JSONProvider
+
+    def test_orjson_missing(self):
+        # Given
+        with patch("utils.json_provider.orjson", None):
+            # When / Then
+            assert json_provider_class("orjson") is JSONProvider
+
+    @pytest.mark.usefixtures("test_app")
+    def test_app_provider(self):
+        # When
+        response = app.test_client().get("/health/live")
+
+        # Then
+        assert isinstance(app.app.json, OrjsonProvider)
+        assert response.text == '{"message":"API is ALIVE"}\n'
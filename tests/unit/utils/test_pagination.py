@@ -0,0 +1,23 @@
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor
+
+
+class TestCursor:
+
+    def test_round_trip(self):
+        # Given
+        position = {"id": 12345}
+
+        # When
+        cursor = encode_cursor(position)
+
+        # Then
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == position
+
+    @pytest.mark.parametrize("cursor", ["not base64 !", "bm90IGpzb24", "WzFd", "eyJpZCI6ICIxIn0"])
+    def test_invalid_cursor(self, cursor):
+        # When / Then
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
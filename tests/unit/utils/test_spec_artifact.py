@@ -0,0 +1,78 @@
+import json
+import logging
+import pathlib
+
+import pytest
+import yaml
+from connexion.exceptions import InvalidSpecification
+
+from utils.spec_artifact import (artifact_path, build_artifact,
+                                 load_specification, spec_hash)
+
+SPEC_PATH = pathlib.Path(__file__).parents[3] / "swagger.yaml"
+
+
+class TestSpecArtifact:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        self.spec_path = tmp_path / "swagger.yaml"
+        self.spec_path.write_bytes(SPEC_PATH.read_bytes())
+        self.artifact_dir = tmp_path / "build"
+
+    def test_artifact_path(self):
+        # When
+        path = artifact_path(self.spec_path, self.artifact_dir)
+
+        # Then
+        assert path == self.artifact_dir / f"swagger.{spec_hash(self.spec_path)[:16]}.json"
+
+    def test_build_artifact(self):
+        # When
+        path = build_artifact(self.spec_path, self.artifact_dir)
+
+        # Then
+        assert path == artifact_path(self.spec_path, self.artifact_dir)
+        assert list(self.artifact_dir.iterdir()) == [path]
+        assert json.loads(path.read_text()) == json.loads(
+            json.dumps(yaml.safe_load(self.spec_path.read_text()), default=str)
+        )
+
+    def test_build_invalid_specification(self):
+        # Given
+        self.spec_path.write_text("openapi: 3.0.0\npaths: []\n")
+
+        # When / Then
+        with pytest.raises(InvalidSpecification):
+            build_artifact(self.spec_path, self.artifact_dir)
+        assert not self.artifact_dir.exists()
+
+    def test_load_specification(self):
+        # Given
+        path = build_artifact(self.spec_path, self.artifact_dir)
+
+        # When
+        specification = load_specification(self.spec_path, self.artifact_dir)
+
+        # Then
+        assert specification == json.loads(path.read_text())
+
+    def test_load_specification_without_artifact(self, caplog):
+        # When
+        with caplog.at_level(logging.WARNING):
+            specification = load_specification(self.spec_path, self.artifact_dir)
+
+        # Then
+        assert specification == self.spec_path
+        assert "No artifact for swagger.yaml" in caplog.text
+
+    def test_load_specification_changed(self):
+        # Given
+        build_artifact(self.spec_path, self.artifact_dir)
+        self.spec_path.write_text(self.spec_path.read_text() + "\n")
+
+        # When
+        specification = load_specification(self.spec_path, self.artifact_dir)
+
+        # Then
+        assert specification == self.spec_path
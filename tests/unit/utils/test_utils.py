@@ -6,21 +6,53 @@ import pytest
 from flask_mail import Message
 from itsdangerous import URLSafeTimedSerializer
 
-from utils.utils import (generate_confirmation_token, handle_email_create_user,
-                         handle_email_forgotten_password,
-                         handle_email_password_changed,
-                         handle_email_suspicious_connection)
+from core.models import EmailKindEnum
+from utils.utils import (build_email_create_user,
+                         build_email_forgotten_password,
+                         build_email_password_changed,
+                         build_email_suspicious_connection,
+                         generate_confirmation_token, handle_email_create_user,
+                         handle_email_forgotten_password)
 
 
 @pytest.mark.usefixtures("session")
 class TestHandleEmail:
 
     @pytest.fixture(autouse=True)
-    def setup_method(self, request):
-        self.patch_send = patch("flask_mail.Mail.send")
-        self.mock_send = self.patch_send.start()
-        request.addfinalizer(self.patch_send.stop)
+    def setup_method(self, request, user):
+        self.patch_core = patch("utils.utils.tempo_core")
+        self.mock_core = self.patch_core.start()
+        request.addfinalizer(self.patch_core.stop)
+
+        self.user = user
+
+    def test_handle_email_create_user(self):
+        # When
+        result = handle_email_create_user(self.user)
+
+        # Then
+        self.mock_core.email_outbox.enqueue.assert_called_once_with(
+            EmailKindEnum.CREATE_USER,
+            user_id=self.user.id
+        )
+        assert result == self.mock_core.email_outbox.enqueue.return_value
+
+    def test_handle_email_forgotten_password(self):
+        # When
+        handle_email_forgotten_password(self.user)
+
+        # Then
+        self.mock_core.email_outbox.enqueue.assert_called_once_with(
+            EmailKindEnum.FORGOTTEN_PASSWORD,
+            user_id=self.user.id
+        )
 
+
+@pytest.mark.usefixtures("session")
+class TestBuildEmailCreateUser:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, request, user):
         self.patch_token = patch(
             "utils.utils.generate_confirmation_token"
         )
@@ -36,30 +68,29 @@ class TestHandleEmail:
         os.environ["API_URL"] = "http://localhost:5000"
         os.environ["MAIL_USERNAME"] = "test@example.com"
 
-    def test_handle_email(self):
+        self.user = user
+
+    def test_build_email_create_user(self):
         # Given
-        user_email = "user@example.com"
-        username = "testuser"
-        user_id = 1
+        user_id = self.user.id
         self.mock_token.return_value = "mocked_token"
         link = f"{os.environ.get('API_URL')}/checkmail/mocked_token?user_id={user_id}"
 
         # When
-        handle_email_create_user(user_email, username, user_id)
+        sent_msg = build_email_create_user(self.user)
 
         # Then
-        self.mock_token.assert_called_once_with(user_email)
+        self.mock_token.assert_called_once_with(self.user.email)
         self.mock_render_template.assert_called_once_with(
             "subscribe_template.html.j2",
-            username=username,
+            username=self.user.username,
             button_link=link
         )
-        sent_msg = self.mock_send.call_args[0][0]
         assert isinstance(sent_msg, Message)
         assert sent_msg.subject == "Confirme ton inscription !"
         assert sent_msg.sender == os.environ["MAIL_USERNAME"]
-        assert sent_msg.recipients == [user_email]
-        assert "Hello testuser," in sent_msg.body
+        assert sent_msg.recipients == [self.user.email]
+        assert f"Hello {self.user.username}," in sent_msg.body
         assert "merci de t’être inscrit(e) à Tempo !" in sent_msg.body
         assert (
             f"http://localhost:5000/checkmail/mocked_token?user_id={user_id}"
@@ -103,14 +134,10 @@ class TestGenerateConfirmationToken:
 
 
 @pytest.mark.usefixtures("session")
-class TestHandleEmailSuspiciousConnection:
+class TestBuildEmailSuspiciousConnection:
 
     @pytest.fixture(autouse=True)
     def setup_method(self, request, user, connection):
-        self.patch_send = patch("flask_mail.Mail.send")
-        self.mock_send = self.patch_send.start()
-        request.addfinalizer(self.patch_send.stop)
-
         self.patch_render_template = patch("utils.utils.render_template")
         self.mock_render_template = self.patch_render_template.start()
         request.addfinalizer(self.patch_render_template.stop)
@@ -121,7 +148,7 @@ class TestHandleEmailSuspiciousConnection:
         self.user = user
         self.connection = connection
 
-    def test_handle_email_suspicious_connection(self):
+    def test_build_email_suspicious_connection(self):
         # Given
         params = {
             "username": self.user.username,
@@ -130,11 +157,9 @@ class TestHandleEmailSuspiciousConnection:
         destination_link = f"http://localhost:5000/checkanswer?{urlencode(params)}"
 
         # When
-        handle_email_suspicious_connection(self.user, self.connection)
+        sent_msg = build_email_suspicious_connection(self.user, self.connection)
 
         # Then
-        self.mock_send.assert_called_once()
-        sent_msg = self.mock_send.call_args[0][0]
         assert isinstance(sent_msg, Message)
         assert sent_msg.subject == "Alerte de sécurité – Connexion suspecte détectée"
         assert sent_msg.sender == os.environ["MAIL_USERNAME"]
@@ -155,14 +180,10 @@ class TestHandleEmailSuspiciousConnection:
 
 
 @pytest.mark.usefixtures("session")
-class TestHandleEmailPasswordChanged:
+class TestBuildEmailPasswordChanged:
 
     @pytest.fixture(autouse=True)
     def setup_method(self, request, user, connection):
-        self.patch_send = patch("flask_mail.Mail.send")
-        self.mock_send = self.patch_send.start()
-        request.addfinalizer(self.patch_send.stop)
-
         self.patch_render_template = patch("utils.utils.render_template")
         self.mock_render_template = self.patch_render_template.start()
         request.addfinalizer(self.patch_render_template.stop)
@@ -173,13 +194,11 @@ class TestHandleEmailPasswordChanged:
 
         self.user = user
 
-    def test_handle_email_password_changed_suspicious_connection(self):
+    def test_build_email_password_changed(self):
         # When
-        handle_email_password_changed(self.user)
+        sent_msg = build_email_password_changed(self.user)
 
         # Then
-        self.mock_send.assert_called_once()
-        sent_msg = self.mock_send.call_args[0][0]
         assert isinstance(sent_msg, Message)
         assert sent_msg.subject == "Ton mot de passe a été modifié avec succès"
         assert sent_msg.sender == os.environ["MAIL_USERNAME"]
@@ -202,14 +221,10 @@ class TestHandleEmailPasswordChanged:
 
 
 @pytest.mark.usefixtures("session")
-class TestHandleEmailForgottenPassword:
+class TestBuildEmailForgottenPassword:
 
     @pytest.fixture(autouse=True)
     def setup_method(self, request, user):
-        self.patch_send = patch("flask_mail.Mail.send")
-        self.mock_send = self.patch_send.start()
-        request.addfinalizer(self.patch_send.stop)
-
         self.patch_render_template = patch("utils.utils.render_template")
         self.mock_render_template = self.patch_render_template.start()
         request.addfinalizer(self.patch_render_template.stop)
@@ -227,13 +242,11 @@ class TestHandleEmailForgottenPassword:
 
         self.user = user
 
-    def test_handle_email_forgotten_password(self):
+    def test_build_email_forgotten_password(self):
         # When
-        handle_email_forgotten_password(self.user)
+        sent_msg = build_email_forgotten_password(self.user)
 
         # Then
-        self.mock_send.assert_called_once()
-        sent_msg = self.mock_send.call_args[0][0]
         assert isinstance(sent_msg, Message)
         assert sent_msg.subject == "Confirme ton identité !"
         assert sent_msg.sender == os.environ["MAIL_USERNAME"]
@@ -0,0 +1,201 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from freezegun import freeze_time
+
+from core.models import EmailKindEnum, EmailOutbox, EmailStatusEnum
+from core.tempo_core import tempo_core
+from tests.unit.testing_utils import get_free_port, mail_state
+from workers.email_worker import EmailWorker, build_email
+
+
+class TestEmailWorker:
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self, session, user, connection):
+        os.environ["API_URL"] = "http://localhost:5000"
+        os.environ["MAIL_USERNAME"] = "test@example.com"
+        os.environ["SECRET_KEY"] = "testsecret"
+        os.environ["SECURITY_PASSWORD_SALT"] = "testsalt"
+
+        session.add(user)
+        session.add(connection)
+        session.commit()
+
+        self.session = session
+        self.user = user
+        self.connection = connection
+
+    def get_worker(self, port, batch_size=None, max_attempts=3):
+        worker = EmailWorker(mail_state(port), batch_size=batch_size)
+        worker.max_attempts = max_attempts
+        worker.base_delay = 60
+        worker.max_delay = 600
+        return worker
+
+    def test_run_once(self, smtp_sink):
+        # Given
+        controller, handler = smtp_sink
+        created = tempo_core.email_outbox.enqueue(EmailKindEnum.CREATE_USER, user_id=self.user.id)
+        suspicious = tempo_core.email_outbox.enqueue(
+            EmailKindEnum.SUSPICIOUS_CONNECTION,
+            user_id=self.user.id,
+            connection_id=self.connection.id
+        )
+
+        # When
+        processed = self.get_worker(controller.port).run_once()
+
+        # Then
+        assert processed == 2
+        assert len(handler.envelopes) == 2
+        assert handler.envelopes[0].rcpt_tos == [self.user.email]
+        assert b"Confirme ton inscription" in handler.envelopes[0].content
+        for email in (created, suspicious):
+            email = self.session.get(EmailOutbox, email.id)
+            assert email.status == EmailStatusEnum.SENT
+            assert email.attempts == 1
+            assert email.sent_at is not None
+
+    def test_run_once_batch_size(self, smtp_sink):
+        # Given
+        controller, handler = smtp_sink
+        tempo_core.email_outbox.enqueue(EmailKindEnum.PASSWORD_CHANGED, user_id=self.user.id)
+        tempo_core.email_outbox.enqueue(EmailKindEnum.FORGOTTEN_PASSWORD, user_id=self.user.id)
+
+        # When
+        processed = self.get_worker(controller.port, batch_size=1).run_once()
+
+        # Then
+        assert processed == 1
+        assert len(handler.envelopes) == 1
+
+    def test_run_once_reuses_smtp_connection(self, smtp_sink):
+        # Given
+        controller, handler = smtp_sink
+        worker = self.get_worker(controller.port)
+        tempo_core.email_outbox.enqueue(EmailKindEnum.PASSWORD_CHANGED, user_id=self.user.id)
+        worker.run_once()
+        tempo_core.email_outbox.enqueue(EmailKindEnum.PASSWORD_CHANGED, user_id=self.user.id)
+
+        # When
+        worker.run_once()
+
+        # Then
+        assert len(handler.envelopes) == 2
+        assert worker.pool.stats()["opened"] == 1
+        assert worker.pool.stats()["handshakes_saved"] == 1
+        worker.pool.close()
+
+    def test_run_once_nothing_to_send(self, smtp_sink):
+        # Given
+        controller, handler = smtp_sink
+
+        # When
+        processed = self.get_worker(controller.port).run_once()
+
+        # Then
+        assert processed == 0
+        assert not handler.envelopes
+
+    @freeze_time(datetime(2025, 1, 1, 12))
+    def test_run_once_smtp_unavailable(self):
+        # Given
+        email = tempo_core.email_outbox.enqueue(EmailKindEnum.CREATE_USER, user_id=self.user.id)
+
+        # When
+        self.get_worker(get_free_port()).run_once()
+
+        # Then
+        email = self.session.get(EmailOutbox, email.id)
+        assert email.status == EmailStatusEnum.PENDING
+        assert email.attempts == 1
+        assert email.next_attempt_at == datetime(2025, 1, 1, 12, 1)
+        assert "ConnectionRefusedError" in email.last_error
+
+    def test_run_once_dead_letter(self):
+        # Given
+        email = tempo_core.email_outbox.enqueue(EmailKindEnum.CREATE_USER, user_id=self.user.id)
+        tempo_core.email_outbox.update(email.id, attempts=2)
+
+        # When
+        self.get_worker(get_free_port()).run_once()
+
+        # Then
+        email = self.session.get(EmailOutbox, email.id)
+        assert email.status == EmailStatusEnum.DEAD
+        assert email.attempts == 3
+
+    def test_run_once_render_error(self, smtp_sink):
+        # Given
+        controller, handler = smtp_sink
+        broken = tempo_core.email_outbox.enqueue(EmailKindEnum.CREATE_USER, user_id=self.user.id)
+        sent = tempo_core.email_outbox.enqueue(EmailKindEnum.CREATE_USER, user_id=self.user.id)
+
+        with patch(
+                "workers.email_worker.build_email",
+                side_effect=[KeyError("API_URL"), build_email(sent)]
+        ):
+            # When
+            self.get_worker(controller.port).run_once()
+
+        # Then
+        assert len(handler.envelopes) == 1
+        broken = self.session.get(EmailOutbox, broken.id)
+        assert broken.status == EmailStatusEnum.PENDING
+        assert broken.last_error == "KeyError('API_URL')"
+        assert self.session.get(EmailOutbox, sent.id).status == EmailStatusEnum.SENT
+
+    @pytest.mark.parametrize("attempts, delay", [(1, 60), (2, 120), (3, 240), (5, 600)])
+    @freeze_time(datetime(2025, 1, 1, 12))
+    def test_next_attempt(self, attempts, delay):
+        # Given
+        worker = self.get_worker(25, max_attempts=10)
+
+        # When
+        retry_at = worker.next_attempt(attempts)
+
+        # Then
+        assert retry_at == datetime(2025, 1, 1, 12) + timedelta(seconds=delay)
+
+    def test_next_attempt_max_attempts(self):
+        # Given
+        worker = self.get_worker(25)
+
+        # When
+        retry_at = worker.next_attempt(3)
+
+        # Then
+        assert retry_at is None
+
+    def test_run(self):
+        # Given
+        worker = self.get_worker(25, batch_size=5)
+        stop_event = threading.Event()
+        processed = iter([5, 0])
+
+        def run_once():
+            count = next(processed)
+            if count == 0:
+                stop_event.set()
+            return count
+
+        with patch.object(worker, "run_once", side_effect=run_once) as mock_run_once:
+            # When
+            worker.run(stop_event, poll_interval=0)
+
+        # Then
+        assert mock_run_once.call_count == 2
+
+    def test_default_configuration(self, test_app):
+        # When
+        worker = EmailWorker()
+
+        # Then
+        assert worker.mail_state is test_app.extensions["mail"]
+        assert worker.batch_size == 50
+        assert worker.max_attempts == 6
+        assert worker.lease == timedelta(minutes=5)
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time to live or at a given timestamp
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float | None = None):
+        """
+        Initialize the cache
+        :param max_size: maximum number of entries, the least recently used one is evicted first
+        :param ttl: default time to live of an entry in seconds, None to keep it until evicted
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Get a value from the cache
+        :param key: key of the entry
+        :param default: value returned if the entry is missing or expired
+        :return: the cached value or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None, expires_at: float | None = None):
+        """
+        Add or replace a value in the cache
+        :param key: key of the entry
+        :param value: value to cache
+        :param ttl: time to live in seconds, defaults to the ttl of the cache
+        :param expires_at: UNIX timestamp at which the entry expires, overrides ttl
+        """
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Remove an entry from the cache if present
+        :param key: key of the entry
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all the entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Usage statistics of the cache
+        :return: number of hits, misses and entries
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
@@ -0,0 +1,192 @@
+import os
+import zlib
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+# Content types which are already compressed, compressing them again only costs CPU
+UNCOMPRESSIBLE_TYPES = (
+    "image/", "video/", "audio/", "font/woff", "application/zip", "application/gzip",
+    "application/x-gzip", "application/octet-stream", "application/pdf",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """
+    Choose the encoding of a response from the Accept-Encoding header of the request
+    :param accept_encoding: the header, like "gzip, deflate, br;q=0.9"
+    :return: "br" or "gzip", None if the client accepts neither
+    """
+    qualities = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, parameters = item.strip().partition(";")
+        quality = 1.0
+        if parameters.strip().startswith("q="):
+            try:
+                quality = float(parameters.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    candidates = [
+        (qualities.get(coding, wildcard), preference, coding)
+        for preference, coding in enumerate(("gzip", "br"))
+    ]
+    quality, _, coding = max(candidates)
+    return coding if quality > 0 else None
+
+
+class Compressor:
+    """
+    Incremental compressor of a response body, each chunk is flushed so a streamed
+    response is sent as soon as it is produced
+    """
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes the gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            return output + (self._brotli.finish() if final else self._brotli.flush())
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing the responses with brotli or gzip, as accepted by the
+    client. Small bodies and already compressed content are sent as they are
+    """
+
+    def __init__(
+            self,
+            app,
+            minimum_size: int | None = None,
+            gzip_level: int | None = None,
+            brotli_quality: int | None = None
+    ):
+        """
+        Initialize the middleware
+        :param app: the ASGI application
+        :param minimum_size: bodies smaller than this number of bytes are not compressed
+        :param gzip_level: gzip compression level, from 1 to 9
+        :param brotli_quality: brotli compression quality, from 0 to 11
+        """
+        self.app = app
+        self.minimum_size = (
+            minimum_size if minimum_size is not None
+            else int(os.environ.get("COMPRESSION_MINIMUM_SIZE", "1024"))
+        )
+        self.gzip_level = (
+            gzip_level if gzip_level is not None
+            else int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+        )
+        self.brotli_quality = (
+            brotli_quality if brotli_quality is not None
+            else int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """
+    Compression of a single response, decided from its Content-Length or, without one,
+    once enough of its body is known
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start = None
+        self._compressor = None
+        self._passthrough = False
+        self._buffer = []
+        self._buffered = 0
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "").lower()
+        return (
+            "content-encoding" not in headers
+            and not content_type.startswith(UNCOMPRESSIBLE_TYPES)
+        )
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = MutableHeaders(scope=message)
+            content_length = headers.get("content-length")
+            self._passthrough = not self._compressible(headers) or (
+                content_length is not None
+                and int(content_length) < self.middleware.minimum_size
+            )
+            if self._passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is None:
+            # Without a Content-Length, the chunks are kept until the body is known to be
+            # large enough, the WSGI bridge sends a final empty chunk after the body
+            self._buffer.append(body)
+            self._buffered += len(body)
+            body = b"".join(self._buffer)
+            if self._buffered < self.middleware.minimum_size:
+                if more_body:
+                    return
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            self._buffer = None
+            self._start_compression()
+
+        compressed = self._compressor.compress(body, final=not more_body)
+        if self._start is not None:
+            headers = MutableHeaders(scope=self._start)
+            if more_body:
+                # The length of a streamed body is unknown until its last chunk
+                del headers["content-length"]
+            else:
+                headers["Content-Length"] = str(len(compressed))
+            await self._send(self._start)
+            self._start = None
+
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _start_compression(self):
+        self._compressor = Compressor(
+            self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+        )
+        headers = MutableHeaders(scope=self._start)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # The compressed bytes differ from the ones the strong ETag was computed on
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
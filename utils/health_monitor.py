@@ -0,0 +1,126 @@
+import contextlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Probe the dependencies of the API concurrently in a background thread and
+    keep their last results, so the health endpoint never waits for them
+    """
+
+    def __init__(
+            self,
+            probes: dict,
+            interval: float | None = None,
+            timeout: float | None = None,
+            context=None
+    ):
+        """
+        Initialize the monitor
+        :param probes: functions returning True if their dependency is healthy, by name
+        :param interval: seconds between two rounds of probes
+        :param timeout: seconds after which a probe still running is considered failed
+        :param context: factory of the context manager each probe runs in
+        """
+        self.probes = probes
+        self.interval = (
+            interval if interval is not None
+            else float(os.environ.get("HEALTH_PROBE_INTERVAL", "15"))
+        )
+        self.timeout = (
+            timeout if timeout is not None
+            else float(os.environ.get("HEALTH_PROBE_TIMEOUT", "5"))
+        )
+        self.context = context or contextlib.nullcontext
+        self.statuses = {
+            name: {"healthy": None, "latency_ms": None, "last_check": None, "last_success": None}
+            for name in probes
+        }
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _probe(self, probe) -> tuple[bool, float]:
+        start = time.monotonic()
+        with self.context():
+            healthy = bool(probe())
+        return healthy, time.monotonic() - start
+
+    def probe_all(self):
+        """
+        Run every probe at the same time and store their results
+        """
+        executor = ThreadPoolExecutor(max_workers=len(self.probes))
+        start = time.monotonic()
+        futures = {
+            name: executor.submit(self._probe, probe)
+            for name, probe in self.probes.items()
+        }
+        for name, future in futures.items():
+            try:
+                healthy, duration = future.result(
+                    timeout=max(0.0, start + self.timeout - time.monotonic())
+                )
+            except FutureTimeoutError:
+                healthy, duration = False, self.timeout
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Health probe %s failed", name)
+                healthy, duration = False, time.monotonic() - start
+            self._store(name, healthy, duration)
+
+        # A probe stuck past its timeout must not block the next rounds
+        executor.shutdown(wait=False)
+
+    def _store(self, name: str, healthy: bool, duration: float):
+        now = datetime.now().isoformat()
+        with self._lock:
+            status = self.statuses[name]
+            status["healthy"] = healthy
+            status["latency_ms"] = round(duration * 1000, 1)
+            status["last_check"] = now
+            if healthy:
+                status["last_success"] = now
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.probe_all()
+
+    def ensure_started(self):
+        """
+        Start the background probes if they are not running in this process,
+        the first round is run right away so the statuses are known
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads do not survive a fork, each worker starts its own probes
+            self._pid = os.getpid()
+            self._stop_event = threading.Event()
+
+        self.probe_all()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._pid = None
+
+    def snapshot(self) -> dict:
+        """
+        Get the last results of the probes
+        :return: status of each dependency, by name
+        """
+        with self._lock:
+            return {name: dict(status) for name, status in self.statuses.items()}
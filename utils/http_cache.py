@@ -0,0 +1,106 @@
+import hashlib
+import json
+
+from connexion.frameworks.flask import flaskify_endpoint
+from flask import Flask, current_app, request
+from werkzeug.http import quote_etag
+
+
+def make_etag(payload) -> str:
+    """
+    Build a strong ETag from the content of a JSON response
+    :param payload: the body of the response, before serialization
+    :return: the unquoted ETag, the same in every process for the same content
+    """
+    serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:32]
+
+
+def cache_headers(etag: str, max_age: int) -> dict:
+    """
+    Headers letting the clients and the CDN cache a response, then revalidate it
+    :param etag: the unquoted ETag of the response
+    :param max_age: seconds during which the response can be used without revalidation
+    :return: the ETag and Cache-Control headers
+    """
+    return {"ETag": quote_etag(etag), "Cache-Control": f"public, max-age={max_age}"}
+
+
+def is_not_modified(etag: str) -> bool:
+    """
+    Check the If-None-Match header of the current request
+    :param etag: the unquoted ETag of the current version of the resource
+    :return: True if the client already has this version
+    """
+    # The weak comparison is used for If-None-Match, the compressed responses have weak ETags
+    return request.if_none_match.contains_weak(etag)
+
+
+class ConditionalGet:
+    """
+    Answer the GET requests of JSON endpoints with 304 when the client already has the
+    response. Every JSON response gets an ETag hashed from its body, and the controllers
+    able to tell the ETag of their response beforehand are not called at all, unless
+    their endpoint is secured
+    """
+
+    def __init__(self):
+        self.providers = {}
+        # Secured endpoints, indexed like SECURE_ENDPOINTS by Flask endpoint and HTTP method
+        self.secure_endpoints = {}
+
+    def etag(self, provider):
+        """
+        Register the function giving the ETag of the responses of a controller
+        :param provider: function called with the path parameters of the request,
+            returning the unquoted ETag of the response, None if it is unknown
+        :return: decorator of the controller, returned unchanged
+        """
+        def decorator(controller):
+            operation_id = f"{controller.__module__}.{controller.__name__}"
+            self.providers[flaskify_endpoint(operation_id)] = provider
+            return controller
+        return decorator
+
+    def init_app(self, flask_app: Flask):
+        flask_app.before_request(self.before_request)
+        flask_app.after_request(self.after_request)
+
+    def before_request(self):
+        if request.method != "GET" or request.url_rule is None:
+            return None
+
+        # The checks of the authentication hook can not be skipped by a 304,
+        # the ETag of the body is still compared once the controller answered
+        if (request.url_rule.endpoint, request.method) in self.secure_endpoints:
+            return None
+
+        # Endpoints of the API are named "<blueprint>.<flaskified operationId>"
+        provider = self.providers.get(request.url_rule.endpoint.rsplit(".", 1)[-1])
+        if provider is None:
+            return None
+
+        etag = provider(**request.view_args)
+        if etag is None or not is_not_modified(etag):
+            return None
+
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    @staticmethod
+    def after_request(response):
+        if (
+            request.method != "GET"
+            or response.status_code != 200
+            or response.is_streamed
+            or not response.is_json
+        ):
+            return response
+
+        # The ETag set by the controller is kept
+        response.add_etag()
+        return response.make_conditional(request)
+
+
+conditional_get = ConditionalGet()
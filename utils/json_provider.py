@@ -0,0 +1,59 @@
+import enum
+import os
+
+from connexion.frameworks.flask import FlaskJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JSONProvider(FlaskJSONProvider):
+    """
+    JSON provider of the standard library, with the connexion defaults for the
+    datetimes and the values of the enums, like StatusEnum
+    """
+
+    def default(self, o):
+        if isinstance(o, enum.Enum):
+            return o.value
+        return super().default(o)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson, which serializes the enums and the datetimes
+    natively. Objects orjson refuses, like integers over 64 bits, go through the
+    standard library
+    """
+
+    # The naive datetimes are in UTC, written with a "Z" like connexion does
+    options = (orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = self.options
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def json_provider_class(name: str | None = None) -> type[JSONProvider]:
+    """
+    Choose the JSON provider of the Flask application
+    :param name: "orjson" or "json", by default the JSON_PROVIDER environment variable
+    :return: the orjson provider, or the standard library one if orjson is not installed
+    """
+    name = name or os.environ.get("JSON_PROVIDER", "orjson")
+    if name == "orjson" and orjson is not None:
+        return OrjsonProvider
+    return JSONProvider
@@ -0,0 +1,31 @@
+import base64
+import binascii
+import json
+
+
+def encode_cursor(position: dict) -> str:
+    """
+    Build the opaque cursor pointing after the last item of a page
+    :param position: the keys of the last item, by column
+    :return: the cursor, safe to be used in a URL
+    """
+    payload = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Read a cursor built by encode_cursor
+    :param cursor: the cursor sent by the client
+    :return: the keys of the last item of the previous page, by column
+    :raise ValueError: if the cursor is invalid
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise ValueError("Invalid cursor") from error
+
+    if not isinstance(position, dict) or not isinstance(position.get("id"), int):
+        raise ValueError("Invalid cursor")
+    return position
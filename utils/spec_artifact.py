@@ -0,0 +1,89 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pathlib
+
+import yaml
+from connexion.spec import Specification
+
+logger = logging.getLogger(__name__)
+
+# The C loader of libyaml is much faster than the pure Python one used by connexion
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def spec_hash(spec_path: pathlib.Path) -> str:
+    """
+    Hash the content of a specification
+    :param spec_path: path of the YAML specification
+    :return: the hexadecimal SHA256 of the file
+    """
+    return hashlib.sha256(spec_path.read_bytes()).hexdigest()
+
+
+def artifact_path(spec_path: pathlib.Path, artifact_dir: pathlib.Path) -> pathlib.Path:
+    """
+    Path of the artifact of a specification, which changes with its content
+    :param spec_path: path of the YAML specification
+    :param artifact_dir: directory of the artifacts
+    :return: the path, like build/swagger.<hash>.json
+    """
+    return artifact_dir / f"{spec_path.stem}.{spec_hash(spec_path)[:16]}.json"
+
+
+def build_artifact(spec_path: pathlib.Path, artifact_dir: pathlib.Path) -> pathlib.Path:
+    """
+    Parse and validate a specification, then write it as JSON for the workers
+    :param spec_path: path of the YAML specification
+    :param artifact_dir: directory of the artifacts
+    :return: the path of the artifact
+    :raise InvalidSpecification: if the specification is invalid, so it fails the build
+    """
+    specification = yaml.load(spec_path.read_bytes(), Loader=Loader)
+    Specification.from_dict(specification)
+
+    destination = artifact_path(spec_path, artifact_dir)
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    temporary = destination.with_suffix(".tmp")
+    # YAML dates, like in the examples, are written as strings
+    temporary.write_text(json.dumps(specification, default=str), encoding="utf-8")
+
+    # The artifact is replaced at once, so starting workers never read a partial file
+    os.replace(temporary, destination)
+    return destination
+
+
+def load_specification(
+        spec_path: pathlib.Path,
+        artifact_dir: pathlib.Path
+) -> dict | pathlib.Path:
+    """
+    Load the artifact of a specification, if it was built from its current content
+    :param spec_path: path of the YAML specification
+    :param artifact_dir: directory of the artifacts
+    :return: the specification read from the artifact, or its path for connexion to parse it
+    """
+    path = artifact_path(spec_path, artifact_dir)
+    try:
+        return json.loads(path.read_bytes())
+    except FileNotFoundError:
+        logger.warning("No artifact for %s, run make build_spec", spec_path.name)
+        return spec_path
+
+
+def main():  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description="Validate the OpenAPI specification and write the artifact of the workers"
+    )
+    parser.add_argument("specification", type=pathlib.Path, help="YAML specification")
+    parser.add_argument("artifact_dir", type=pathlib.Path, help="directory of the artifacts")
+    arguments = parser.parse_args()
+
+    destination = build_artifact(arguments.specification, arguments.artifact_dir)
+    print(f"{arguments.specification} compiled to {destination}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -5,44 +5,64 @@ from flask import render_template
 from flask_mail import Message
 from itsdangerous import URLSafeTimedSerializer
 
-from app import mail
-from core.models import Connection, User
+from core.models import Connection, EmailKindEnum, User
+from core.tempo_core import tempo_core
 
 
-def handle_email_create_user(user_email: str, username: str, user_id: int):
+def handle_email_create_user(user: User):
     """
-    Send an email to confirm identity of the created user
-    :param user_email: email of the created user
-    :param username: username of the created user
-    :param user_id: id of the created user
-    :return: send the email
+    Queue an email to confirm identity of the created user
+    :param user: the created user
+    :return: the queued email
     """
+    return tempo_core.email_outbox.enqueue(EmailKindEnum.CREATE_USER, user_id=user.id)
 
-    token = generate_confirmation_token(user_email)
-    link = f"{os.environ.get('API_URL')}/checkmail/{token}?user_id={user_id}"
+
+def handle_email_forgotten_password(user: User):
+    """
+    Queue an email to confirm identity of the user if user has forgot its password
+    :param user: the user
+    :return: the queued email
+    """
+    return tempo_core.email_outbox.enqueue(EmailKindEnum.FORGOTTEN_PASSWORD, user_id=user.id)
+
+
+def build_email_create_user(user: User) -> Message:
+    """
+    Build the email to confirm identity of the created user
+    :param user: the created user
+    :return: the message to send
+    """
+
+    token = generate_confirmation_token(user.email)
+    link = f"{os.environ.get('API_URL')}/checkmail/{token}?user_id={user.id}"
 
     msg = Message(
         "Confirme ton inscription !",
         sender=os.environ.get("MAIL_USERNAME"),
-        recipients=[user_email]
+        recipients=[user.email]
     )
     msg.body = (
-        f"Hello {username}, "
+        f"Hello {user.username}, "
         f"merci de t’être inscrit(e) à Tempo ! "
         f"Pour vérifier ton adresse email, clique sur le lien suivant : {link}"
     )
 
-    msg.html = render_template("subscribe_template.html.j2", username=username, button_link=link)
+    msg.html = render_template(
+        "subscribe_template.html.j2",
+        username=user.username,
+        button_link=link
+    )
 
-    mail.send(msg)
+    return msg
 
 
-def handle_email_suspicious_connection(user: User, connection: Connection):
+def build_email_suspicious_connection(user: User, connection: Connection) -> Message:
     """
-    Send an email to confirm identity of the created user
+    Build the alert about a suspicious connection
     :param user: the user
     :param connection: the suspicious connection
-    :return: send the email
+    :return: the message to send
     """
 
     params = {
@@ -83,14 +103,14 @@ def handle_email_suspicious_connection(user: User, connection: Connection):
         button_link=link,
         button_link_reset=link_reset
     )
-    mail.send(msg)
+    return msg
 
 
-def handle_email_password_changed(user: User):
+def build_email_password_changed(user: User) -> Message:
     """
-    Send a confirmation email after a request to change password
+    Build the confirmation email after a request to change password
     :param user: the user
-    :return: send the email
+    :return: the message to send
     """
     serializer = URLSafeTimedSerializer(os.environ.get('SECRET_KEY'))
     token = serializer.dumps({'username': user.username}, salt="ban-account")
@@ -117,14 +137,14 @@ def handle_email_password_changed(user: User):
         button_link=link_block
     )
 
-    mail.send(msg)
+    return msg
 
 
-def handle_email_forgotten_password(user: User):
+def build_email_forgotten_password(user: User) -> Message:
     """
-    Send an email to confirm identity of the user if user has forgot its password
+    Build the email to confirm identity of the user if user has forgot its password
     :param user: the user
-    :return: send the email
+    :return: the message to send
     """
 
     token = generate_confirmation_token(user.email)
@@ -151,7 +171,7 @@ def handle_email_forgotten_password(user: User):
         button_link_reset=link_block
     )
 
-    mail.send(msg)
+    return msg
 
 
 def generate_confirmation_token(email: str):
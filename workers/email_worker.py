@@ -0,0 +1,136 @@
+import logging
+import os
+import signal
+import smtplib
+import threading
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+
+from adapters.smtp_pool import SmtpPool
+from app import app
+from core.models import EmailKindEnum, EmailOutbox
+from core.tempo_core import tempo_core
+from utils.utils import (build_email_create_user,
+                         build_email_forgotten_password,
+                         build_email_password_changed,
+                         build_email_suspicious_connection)
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the SMTP server cannot be used at all, rather than a failure of one email
+SERVER_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPAuthenticationError,
+)
+
+EMAIL_BUILDERS = {
+    EmailKindEnum.CREATE_USER: lambda email: build_email_create_user(email.user),
+    EmailKindEnum.SUSPICIOUS_CONNECTION: lambda email: build_email_suspicious_connection(
+        email.user, email.connection
+    ),
+    EmailKindEnum.PASSWORD_CHANGED: lambda email: build_email_password_changed(email.user),
+    EmailKindEnum.FORGOTTEN_PASSWORD: lambda email: build_email_forgotten_password(email.user),
+}
+
+
+def build_email(email: EmailOutbox) -> Message:
+    """
+    Render a queued email from the current state of its user and connection
+    :param email: the queued email
+    :return: the message to send
+    """
+    return EMAIL_BUILDERS[email.kind](email)
+
+
+class EmailWorker:
+    """
+    Send the queued emails in batches over pooled SMTP connections.
+    Failed emails are retried with an exponential backoff, then marked as DEAD
+    once they reach the maximum number of attempts
+    """
+
+    def __init__(self, mail_state=None, batch_size: int | None = None):
+        self.mail_state = mail_state or app.app.extensions["mail"]
+        self.pool = SmtpPool(self.mail_state)
+        self.batch_size = batch_size or int(os.environ.get("EMAIL_BATCH_SIZE", "50"))
+        self.max_attempts = int(os.environ.get("EMAIL_MAX_ATTEMPTS", "6"))
+        self.base_delay = float(os.environ.get("EMAIL_RETRY_DELAY", "30"))
+        self.max_delay = float(os.environ.get("EMAIL_RETRY_MAX_DELAY", "3600"))
+        self.lease = timedelta(seconds=float(os.environ.get("EMAIL_LEASE", "300")))
+
+    def next_attempt(self, attempts: int) -> datetime | None:
+        """
+        Compute the date of the next attempt after a failure
+        :param attempts: number of attempts already made, including the failed one
+        :return: the date of the next attempt, None if the email must not be retried
+        """
+        if attempts >= self.max_attempts:
+            return None
+
+        delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+        return datetime.now() + timedelta(seconds=delay)
+
+    def fail(self, email: EmailOutbox, error: Exception):
+        attempts = email.attempts + 1
+        retry_at = self.next_attempt(attempts)
+        if retry_at is None:
+            logger.error("Email %s is dead after %s attempts: %r", email.id, attempts, error)
+        tempo_core.email_outbox.mark_failed(email, repr(error), retry_at)
+
+    def run_once(self) -> int:
+        """
+        Send one batch of due emails
+        :return: the number of emails processed
+        """
+        emails = tempo_core.email_outbox.claim_due(self.batch_size, self.lease)
+        if not emails:
+            return 0
+
+        pending = list(emails)
+        while pending:
+            email = pending.pop(0)
+            try:
+                self.pool.send(build_email(email))
+            except SERVER_ERRORS as error:
+                # SMTP server unavailable, the rest of the batch is retried later
+                for failed in [email, *pending]:
+                    self.fail(failed, error)
+                break
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                self.fail(email, error)
+            else:
+                tempo_core.email_outbox.mark_sent(email)
+
+        return len(emails)
+
+    def run(self, stop_event: threading.Event, poll_interval: float = 5):
+        """
+        Send the queued emails until the stop event is set
+        :param stop_event: event set to stop the worker
+        :param poll_interval: seconds to wait when there is no more email to send
+        """
+        while not stop_event.is_set():
+            if self.run_once() < self.batch_size:
+                stop_event.wait(poll_interval)
+        self.pool.close()
+
+
+def main():  # pragma: no cover
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    with app.app.app_context():
+        EmailWorker().run(
+            stop_event,
+            poll_interval=float(os.environ.get("EMAIL_POLL_INTERVAL", "5"))
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()